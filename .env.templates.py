@@ -17,4 +17,70 @@ DB_PASSWORD=your_password
 DB_POOL_SIZE=20
 DB_MAX_OVERFLOW=10
 DB_POOL_RECYCLE=3600
-DB_POOL_TIMEOUT=30
\ No newline at end of file
+DB_POOL_TIMEOUT=30
+
+# Health & Admission Control
+DB_HEALTH_TIMEOUT=2.0
+DB_POOL_MAX_WAITERS=50
+DB_POOL_ADMISSION_TIMEOUT=5.0
+
+# Statement Timeouts
+DB_STATEMENT_TIMEOUT=30000
+DB_ROUTE_STATEMENT_TIMEOUTS=/search/=5000
+DB_CANCEL_ON_DISCONNECT=True
+
+# Read Replicas
+DB_REPLICA_HOSTS=
+DB_REPLICA_HEALTH_INTERVAL=5.0
+DB_READ_YOUR_WRITES_WINDOW=2.0
+
+# Schema Migrations
+DB_MIGRATE_ON_STARTUP=False
+
+# Connection Warm-up
+DB_PREPARED_STATEMENT_CACHE_SIZE=500
+DB_WARMUP_ENABLED=True
+
+# Change Notifications & Read Cache
+CHANGE_NOTIFICATIONS_ENABLED=True
+CHANGE_LISTENER_RECONNECT_DELAY=1.0
+READ_CACHE_TTL=3600
+READ_CACHE_MAX_ENTRIES=10000
+
+# Server-Sent Events
+EVENTS_QUEUE_SIZE=100
+EVENTS_MAX_SUBSCRIBERS=1000
+EVENTS_KEEPALIVE_INTERVAL=15.0
+EVENTS_BATCH_DELAY=0.05
+
+# Idempotency
+IDEMPOTENCY_TTL=86400
+IDEMPOTENCY_MAX_ENTRIES=10000
+
+# Directory Snapshot
+SNAPSHOT_ENABLED=False
+SNAPSHOT_PATH=data/directory.snapshot
+SNAPSHOT_CHECK_INTERVAL=1.0
+SNAPSHOT_REBUILD_DELAY=0.5
+
+# Read Model
+READ_MODEL_ENABLED=False
+
+# Write Batching
+WRITE_BATCHING_ENABLED=False
+WRITE_BATCH_WINDOW=0.005
+WRITE_BATCH_MAX_SIZE=100
+
+# Read-only Mode
+READ_ONLY_MODE=False
+
+# SQL Instrumentation
+SQL_STATEMENTS_HEADER=False
+SQL_STATEMENTS_WARN_THRESHOLD=50
+
+# Profiling
+PROFILING_ADMIN_KEY=
+PROFILING_SAMPLE_RATE=0.0
+PROFILING_INTERVAL=0.005
+PROFILING_DIR=data/profiles
+PROFILING_MAX_FILES=200
@@ -0,0 +1,9 @@
+"""
+Нагрузочный бенчмарк справочника.
+
+- datagen: генератор синтетических данных (здания, организации, дерево видов деятельности);
+- scenarios: сценарии запросов ко всем роутерам;
+- runner: прогон сценариев с отчётом p50/p95/p99, пропускной способности и числа SQL-запросов.
+
+Запуск: python -m bench generate ..., python -m bench run ... (см. python -m bench --help).
+"""
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import logging
+import sys
+
+from bench.datagen import generate
+from bench.runner import compare, format_report, load_results, run, save_results
+from bench.scenarios import READ_SCENARIOS, SCENARIOS
+from src.core.config import settings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Бенчмарк справочника организаций")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Загрузить синтетические данные в БД из настроек")
+    gen.add_argument("--buildings", type=int, default=10_000)
+    gen.add_argument("--organizations", type=int, default=50_000)
+    gen.add_argument("--seed", type=int, default=1)
+    gen.add_argument("--reset", action="store_true", help="Очистить таблицы справочника перед загрузкой")
+
+    bench = commands.add_parser("run", help="Выполнить сценарии и вывести отчёт")
+    bench.add_argument("scenarios", nargs="*", help=f"Сценарии (по умолчанию все чтения): {', '.join(SCENARIOS)}")
+    bench.add_argument("--writes", action="store_true", help="Добавить пишущие сценарии")
+    bench.add_argument("--duration", type=float, default=10.0, help="Длительность фазы сценария (сек)")
+    bench.add_argument("--warmup", type=float, default=2.0, help="Прогрев перед фазой (сек)")
+    bench.add_argument("--concurrency", type=int, default=8)
+    bench.add_argument("--seed", type=int, default=1)
+    bench.add_argument("--url", help="Нагружать запущенный сервер вместо приложения в процессе")
+    bench.add_argument("--output", help="Сохранить результаты в JSON")
+    bench.add_argument("--baseline", help="Сравнить с сохранённым JSON; код выхода 1 при регрессии")
+    bench.add_argument("--tolerance", type=float, default=0.2, help="Допустимый рост p95 (доля)")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.command == "generate":
+        loaded = asyncio.run(generate(settings.DATABASE_URL, args.buildings, args.organizations, args.seed, args.reset))
+        print(", ".join(f"{table}: {count}" for table, count in loaded.items()))
+        return 0
+
+    scenarios = args.scenarios or list(READ_SCENARIOS) + (
+        [name for name in SCENARIOS if name not in READ_SCENARIOS] if args.writes else []
+    )
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(unknown)}")
+
+    results = asyncio.run(run(scenarios, args.duration, args.warmup, args.concurrency, args.seed, args.url))
+    print(format_report(results))
+    if args.output:
+        save_results(args.output, results)
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"РЕГРЕССИЯ {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Генератор синтетического справочника для бенчмарков.
+
+Данные детерминированы (seed) и загружаются через COPY, поэтому 1M организаций
+загружается за минуты. Здания сгруппированы вокруг центров городов,
+организации распределены по зданиям неравномерно (бизнес-центры), у
+организации 1–3 вида деятельности из трёхуровневого дерева и 1–3 телефона.
+
+Триггеры уведомлений об изменениях на время загрузки отключаются: после
+генерации перезапустите сервис и перестройте снимок (python -m src.snapshot).
+"""
+import logging
+import random
+from datetime import datetime
+from typing import Iterator
+
+import asyncpg
+
+from src.core.changes import WATCHED_TABLES
+from src.core.read_model import REFRESH_ALL
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50_000
+
+CITIES = [
+    ("Москва", 55.7558, 37.6173),
+    ("Санкт-Петербург", 59.9343, 30.3351),
+    ("Новосибирск", 55.0084, 82.9357),
+    ("Екатеринбург", 56.8389, 60.6057),
+    ("Казань", 55.7961, 49.1064),
+    ("Нижний Новгород", 56.3269, 44.0059),
+]
+STREETS = ["Ленина", "Мира", "Советская", "Гагарина", "Садовая", "Лесная", "Центральная", "Победы", "Новая",
+           "Школьная", "Молодёжная", "Строителей", "Заводская", "Пушкина", "Набережная"]
+
+# Корень -> подкатегория -> листья: 3 уровня, как ограничивает check_level_range
+ACTIVITY_TREE = {
+    "Еда": {
+        "Мясная продукция": ["Говядина", "Птица", "Колбасы"],
+        "Молочная продукция": ["Сыры", "Йогурты", "Молоко"],
+        "Выпечка": ["Хлеб", "Кондитерские изделия"],
+        "Напитки": ["Соки", "Кофе и чай"],
+    },
+    "Автомобили": {
+        "Грузовые": ["Запчасти для грузовых", "Шиномонтаж грузовых"],
+        "Легковые": ["Запчасти", "Аксессуары", "Автосервис"],
+        "Мототехника": ["Мотоциклы", "Экипировка"],
+    },
+    "Медицина": {
+        "Клиники": ["Стоматология", "Педиатрия", "Диагностика"],
+        "Аптеки": ["Лекарства", "Медтехника"],
+    },
+    "Образование": {
+        "Школы": ["Частные школы", "Языковые школы"],
+        "Курсы": ["IT-курсы", "Курсы вождения"],
+    },
+    "Строительство": {
+        "Материалы": ["Кирпич", "Пиломатериалы", "Отделка"],
+        "Услуги": ["Ремонт квартир", "Кровельные работы"],
+    },
+    "Услуги": {
+        "Красота": ["Парикмахерские", "Маникюр"],
+        "Бытовые": ["Химчистка", "Ремонт обуви", "Ремонт техники"],
+        "Юридические": ["Нотариусы", "Адвокаты"],
+    },
+}
+
+ORG_PREFIXES = ["ООО", "ИП", "АО", "ЗАО"]
+ORG_WORDS = ["Альфа", "Вектор", "Гранит", "Рассвет", "Сфера", "Орион", "Север", "Меридиан", "Восход", "Импульс",
+             "Радуга", "Титан", "Звезда", "Эталон", "Прогресс", "Маяк", "Квант", "Феникс"]
+
+
+def activity_rows() -> list[tuple[int, str, int | None, int]]:
+    """(id, name, parent_id, level) для дерева ACTIVITY_TREE."""
+    rows = []
+    for root, groups in ACTIVITY_TREE.items():
+        root_id = len(rows) + 1
+        rows.append((root_id, root, None, 0))
+        for group, leaves in groups.items():
+            group_id = len(rows) + 1
+            rows.append((group_id, group, root_id, 1))
+            for leaf in leaves:
+                rows.append((len(rows) + 1, leaf, group_id, 2))
+    return rows
+
+
+def building_rows(count: int, rng: random.Random) -> Iterator[tuple[int, str, float, float]]:
+    """(id, address, latitude, longitude): нормальное распределение вокруг центров городов."""
+    seen = set()
+    for building_id in range(1, count + 1):
+        city, lat, lon = CITIES[building_id % len(CITIES)]
+        while True:
+            point = (round(rng.gauss(lat, 0.08), 6), round(rng.gauss(lon, 0.12), 6))
+            if point not in seen:
+                seen.add(point)
+                break
+        street = STREETS[rng.randrange(len(STREETS))]
+        yield building_id, f"г. {city}, ул. {street}, д. {building_id}", point[0], point[1]
+
+
+def organization_rows(count: int, buildings: int, rng: random.Random) -> Iterator[tuple[int, str, int]]:
+    """(id, name, building_id): пятая часть организаций — в 1% зданий (бизнес-центры)."""
+    hubs = max(1, buildings // 100)
+    for org_id in range(1, count + 1):
+        building_id = rng.randint(1, hubs) if rng.random() < 0.2 else rng.randint(1, buildings)
+        name = f"{rng.choice(ORG_PREFIXES)} «{rng.choice(ORG_WORDS)} {rng.choice(ORG_WORDS)}» №{org_id}"
+        yield org_id, name, building_id
+
+
+def link_rows(organizations: int, activities: list[tuple], rng: random.Random) -> Iterator[tuple[int, int]]:
+    """(organization_id, activity_id): 1–3 вида, в основном листья дерева."""
+    leaves = [row[0] for row in activities if row[3] == 2]
+    groups = [row[0] for row in activities if row[3] == 1]
+    for org_id in range(1, organizations + 1):
+        chosen = set()
+        for _ in range(rng.choice((1, 1, 2, 3))):
+            chosen.add(rng.choice(leaves) if rng.random() < 0.85 else rng.choice(groups))
+        for activity_id in sorted(chosen):
+            yield org_id, activity_id
+
+
+def phone_rows(organizations: int, rng: random.Random) -> Iterator[tuple[int, str, int]]:
+    """(id, number, organization_id): 1–3 уникальных номера на организацию."""
+    phone_id = 0
+    for org_id in range(1, organizations + 1):
+        for n in range(rng.choice((1, 1, 2, 3))):
+            phone_id += 1
+            yield phone_id, f"8-9{org_id % 100:02d}-{org_id // 100 % 1000:03d}-{n:02d}-{org_id % 97:02d}", org_id
+
+
+def _chunks(rows: Iterator[tuple], suffix: tuple) -> Iterator[list[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row + suffix)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _copy(
+        connection: asyncpg.Connection,
+        table: str,
+        columns: list[str],
+        rows: Iterator[tuple],
+        timestamps: bool = True
+) -> int:
+    """COPY строк пачками по CHUNK_SIZE; timestamps дописывает created_at и updated_at."""
+    suffix = (datetime.utcnow(),) * 2 if timestamps else ()
+    if timestamps:
+        columns = [*columns, "created_at", "updated_at"]
+    total = 0
+    for chunk in _chunks(rows, suffix):
+        await connection.copy_records_to_table(table, records=chunk, columns=columns)
+        total += len(chunk)
+    logger.info(f"{table}: загружено {total} строк")
+    return total
+
+
+async def generate(url: str, buildings: int, organizations: int, seed: int = 1, reset: bool = False) -> dict:
+    """
+    Загрузить синтетический справочник в пустую БД (или очистив её при reset).
+
+    Схема должна существовать (python -m src.core.migrations). Возвращает число
+    загруженных строк по таблицам.
+    """
+    rng = random.Random(seed)
+    activities = activity_rows()
+    connection = await asyncpg.connect(url)
+    try:
+        async with connection.transaction():
+            if reset:
+                await connection.execute(
+                    "TRUNCATE organization_documents, organization_activity, phones, organizations, buildings, activities "
+                    "RESTART IDENTITY"
+                )
+            elif await connection.fetchval("SELECT EXISTS (SELECT 1 FROM organizations)"):
+                raise RuntimeError("База уже содержит организации: используйте --reset")
+
+            for table in WATCHED_TABLES:
+                await connection.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+
+            loaded = {
+                "activities": await _copy(
+                    connection, "activities", ["id", "name", "parent_id", "level"], iter(activities)
+                ),
+                "buildings": await _copy(
+                    connection, "buildings", ["id", "address", "latitude", "longitude"], building_rows(buildings, rng)
+                ),
+                "organizations": await _copy(
+                    connection, "organizations", ["id", "name", "building_id"],
+                    organization_rows(organizations, buildings, rng)
+                ),
+                "organization_activity": await _copy(
+                    connection, "organization_activity", ["organization_id", "activity_id"],
+                    link_rows(organizations, activities, rng), timestamps=False
+                ),
+                "phones": await _copy(connection, "phones", ["id", "number", "organization_id"],
+                                      phone_rows(organizations, rng)),
+            }
+
+            for table in WATCHED_TABLES:
+                await connection.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+            # Триггеры модели чтения были выключены на время загрузки
+            await connection.execute(REFRESH_ALL)
+            for table in ("activities", "buildings", "organizations", "phones"):
+                await connection.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                )
+        await connection.execute("ANALYZE")
+    finally:
+        await connection.close()
+    return loaded
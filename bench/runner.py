@@ -0,0 +1,170 @@
+"""
+Прогон сценариев и отчёт.
+
+Каждый сценарий выполняется отдельной фазой: прогрев, затем concurrency
+параллельных клиентов в течение duration секунд. По фазе считаются
+p50/p95/p99 задержки, пропускная способность, доля ошибок и число
+SQL-запросов на запрос.
+
+По умолчанию приложение запускается в том же процессе (ASGI-транспорт httpx,
+с lifespan), и SQL-запросы считаются через count_statements. С --url
+нагружается уже запущенный сервер; число SQL-запросов тогда не известно.
+"""
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from contextlib import AsyncExitStack
+
+import httpx
+
+from bench.scenarios import SCENARIOS, Dataset, Scenario
+from src.core.config import settings
+from src.core.instrumentation import count_statements
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+class PhaseResult:
+    def __init__(self, name: str, latencies: list[float], errors: int, elapsed: float, statements: int | None):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+        self.statements = statements
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    def to_dict(self) -> dict:
+        requests = self.requests
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "throughput_rps": round(requests / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "statements_per_request": (
+                round(self.statements / requests, 2) if self.statements is not None and requests else None
+            ),
+        }
+
+
+async def _drive(client: httpx.AsyncClient, scenario: Scenario, dataset: Dataset, rng: random.Random,
+                 deadline: float, latencies: list[float] | None) -> int:
+    errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await scenario(client, dataset, rng)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        if latencies is not None:
+            latencies.append(time.perf_counter() - started)
+        errors += failed
+    return errors
+
+
+async def run_phase(client: httpx.AsyncClient, name: str, dataset: Dataset, duration: float, warmup: float,
+                    concurrency: int, seed: int, count_sql: bool) -> PhaseResult:
+    scenario = SCENARIOS[name]
+    rngs = [random.Random(f"{seed}:{name}:{worker}") for worker in range(concurrency)]
+
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(_drive(client, scenario, dataset, rng, deadline, None) for rng in rngs))
+
+    latencies: list[float] = []
+    started = time.perf_counter()
+    deadline = started + duration
+    with count_statements() as stats:
+        errors = sum(await asyncio.gather(
+            *(_drive(client, scenario, dataset, rng, deadline, latencies) for rng in rngs)
+        ))
+    elapsed = time.perf_counter() - started
+    statements = stats.count if count_sql else None
+    return PhaseResult(name, latencies, errors, elapsed, statements)
+
+
+async def run(
+        scenarios: list[str],
+        duration: float = 10.0,
+        warmup: float = 2.0,
+        concurrency: int = 8,
+        seed: int = 1,
+        url: str | None = None
+) -> dict[str, dict]:
+    """Выполнить сценарии по очереди и вернуть метрики по каждому."""
+    dataset = await Dataset.load(settings.DATABASE_URL)
+    headers = {"x-api-key": settings.API_KEY}
+    results = {}
+
+    async with AsyncExitStack() as stack:
+        if url is None:
+            import main
+
+            await stack.enter_async_context(main.app.router.lifespan_context(main.app))
+            transport = httpx.ASGITransport(app=main.app)
+            client = httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers)
+        else:
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            client = httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30)
+        await stack.enter_async_context(client)
+
+        for name in scenarios:
+            result = await run_phase(client, name, dataset, duration, warmup, concurrency, seed, url is None)
+            results[name] = result.to_dict()
+            logger.info(f"{name}: {results[name]}")
+    return results
+
+
+def format_report(results: dict[str, dict]) -> str:
+    header = f"{'scenario':<28}{'req':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'sql/req':>9}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        sql = "-" if r["statements_per_request"] is None else f"{r['statements_per_request']:.1f}"
+        lines.append(
+            f"{name:<28}{r['requests']:>8}{r['errors']:>6}{r['throughput_rps']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{sql:>9}"
+        )
+    return "\n".join(lines)
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """
+    Регрессии относительно сохранённого прогона: рост p95 больше чем на
+    tolerance (доля) или любой рост числа SQL-запросов на запрос.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        before, after = previous.get("statements_per_request"), current.get("statements_per_request")
+        if before is not None and after is not None and after > before + 0.5:
+            regressions.append(f"{name}: SQL-запросов на запрос {before} -> {after}")
+    return regressions
+
+
+def load_results(path: str) -> dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(path: str, results: dict[str, dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,167 @@
+"""
+Сценарии нагрузки: по одному на каждый вид запроса к роутерам.
+
+Сценарий — функция (client, dataset, rng) -> httpx.Response; параметры
+выбираются случайно из границ сгенерированных данных (Dataset), поэтому
+прогоны с одинаковым seed воспроизводимы.
+"""
+import random
+import uuid
+from typing import Awaitable, Callable
+
+import asyncpg
+import httpx
+
+from bench.datagen import CITIES, ORG_WORDS
+
+
+class Dataset:
+    """Границы данных в БД, из которых сценарии выбирают параметры."""
+
+    def __init__(self, organizations: int, buildings: int, activities: list[tuple[int, int]]):
+        self.organizations = organizations
+        self.buildings = buildings
+        self.activity_ids = [activity_id for activity_id, _ in activities]
+        self.root_activity_ids = [activity_id for activity_id, level in activities if level == 0]
+
+    @classmethod
+    async def load(cls, url: str) -> "Dataset":
+        connection = await asyncpg.connect(url)
+        try:
+            organizations = await connection.fetchval("SELECT coalesce(max(id), 0) FROM organizations")
+            buildings = await connection.fetchval("SELECT coalesce(max(id), 0) FROM buildings")
+            activities = await connection.fetch("SELECT id, level FROM activities ORDER BY id")
+        finally:
+            await connection.close()
+        if not organizations or not buildings or not activities:
+            raise RuntimeError("В БД нет данных: сначала выполните python -m bench generate")
+        return cls(organizations, buildings, [(row["id"], row["level"]) for row in activities])
+
+    def organization_id(self, rng: random.Random) -> int:
+        return rng.randint(1, self.organizations)
+
+    def building_id(self, rng: random.Random) -> int:
+        return rng.randint(1, self.buildings)
+
+    @staticmethod
+    def point(rng: random.Random) -> tuple[float, float]:
+        _, lat, lon = rng.choice(CITIES)
+        return rng.gauss(lat, 0.05), rng.gauss(lon, 0.08)
+
+
+Scenario = Callable[[httpx.AsyncClient, Dataset, random.Random], Awaitable[httpx.Response]]
+
+
+async def organizations_list(client, data, rng):
+    return await client.get("/organizations/", params={"page": rng.randint(1, 5), "size": 20})
+
+
+async def organizations_deep_page(client, data, rng):
+    last_page = max(1, data.organizations // 20)
+    return await client.get("/organizations/", params={"page": rng.randint(last_page * 9 // 10, last_page), "size": 20})
+
+
+async def organizations_by_building(client, data, rng):
+    return await client.get("/organizations/", params={"building_id": data.building_id(rng)})
+
+
+async def organizations_by_activity(client, data, rng):
+    return await client.get("/organizations/", params={"activity_id": rng.choice(data.activity_ids), "size": 20})
+
+
+async def organizations_name_search(client, data, rng):
+    return await client.get("/organizations/", params={"name": rng.choice(ORG_WORDS)[:4].lower(), "size": 20})
+
+
+async def organizations_facets(client, data, rng):
+    return await client.get(
+        "/organizations/", params={"activity_id": rng.choice(data.root_activity_ids), "facets": "true"}
+    )
+
+
+async def organization_get(client, data, rng):
+    return await client.get(f"/organizations/{data.organization_id(rng)}")
+
+
+async def buildings_list(client, data, rng):
+    return await client.get("/buildings/", params={"page": rng.randint(1, 50), "size": 50})
+
+
+async def building_get(client, data, rng):
+    return await client.get(f"/buildings/{data.building_id(rng)}")
+
+
+async def activities_tree(client, data, rng):
+    return await client.get("/activities/")
+
+
+async def activity_get(client, data, rng):
+    return await client.get(f"/activities/{rng.choice(data.root_activity_ids)}")
+
+
+async def search_rectangle(client, data, rng):
+    lat, lon = data.point(rng)
+    box = {"min_lat": lat - 0.01, "max_lat": lat + 0.01, "min_lng": lon - 0.015, "max_lng": lon + 0.015}
+    return await client.post("/search/rectangle", json=box, params={"size": 20})
+
+
+async def search_radius(client, data, rng):
+    lat, lon = data.point(rng)
+    body = {"latitude": lat, "longitude": lon, "radius_km": rng.uniform(0.5, 3)}
+    return await client.post("/search/radius", json=body, params={"size": 20})
+
+
+async def search_radius_by_distance(client, data, rng):
+    lat, lon = data.point(rng)
+    body = {"latitude": lat, "longitude": lon, "radius_km": rng.uniform(0.5, 3)}
+    return await client.post("/search/radius", json=body, params={"size": 20, "order_by": "distance"})
+
+
+async def create_organization(client, data, rng):
+    body = {
+        "name": f"Бенчмарк {uuid.uuid4().hex}",
+        "building_id": data.building_id(rng),
+        "activity_ids": rng.sample(data.activity_ids, 2),
+        "phones": [{"number": f"8-800-{rng.randint(0, 999):03d}-{rng.randint(0, 9999):04d}"}],
+    }
+    return await client.post("/organizations/", json=body)
+
+
+async def update_organization(client, data, rng):
+    body = {
+        "activity_ids": rng.sample(data.activity_ids, rng.randint(1, 3)),
+        "phones": [{"number": f"8-900-{rng.randint(0, 999):03d}-{n:02d}"} for n in range(rng.randint(1, 3))],
+    }
+    return await client.put(f"/organizations/{data.organization_id(rng)}", json=body)
+
+
+async def create_building(client, data, rng):
+    lat, lon = data.point(rng)
+    body = {"address": f"Бенчмарк, {uuid.uuid4().hex}", "latitude": lat, "longitude": lon}
+    return await client.post("/buildings/", json=body)
+
+
+READ_SCENARIOS: dict[str, Scenario] = {
+    "organizations_list": organizations_list,
+    "organizations_deep_page": organizations_deep_page,
+    "organizations_by_building": organizations_by_building,
+    "organizations_by_activity": organizations_by_activity,
+    "organizations_name_search": organizations_name_search,
+    "organizations_facets": organizations_facets,
+    "organization_get": organization_get,
+    "buildings_list": buildings_list,
+    "building_get": building_get,
+    "activities_tree": activities_tree,
+    "activity_get": activity_get,
+    "search_rectangle": search_rectangle,
+    "search_radius": search_radius,
+    "search_radius_by_distance": search_radius_by_distance,
+}
+
+WRITE_SCENARIOS: dict[str, Scenario] = {
+    "create_organization": create_organization,
+    "update_organization": update_organization,
+    "create_building": create_building,
+}
+
+SCENARIOS: dict[str, Scenario] = {**READ_SCENARIOS, **WRITE_SCENARIOS}
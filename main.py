@@ -1,14 +1,27 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
-from src.api.routers import organizations, buildings, activities
-from src.core.database import engine, Base
+from src.api import organizations, building, activities, search, events
+from src.core.changes import change_bus, change_listener
+from src.core.database import async_engine, check_database, pool_status
+from src.core.events import event_hub
+from src.core.migrations import check_schema, migrate
+from src.core.profiling import profiler
+from src.core.routing import replica_router
+from src.core.session import commit_hooks, session_tracker
+from src.core.singleflight import invalidate_reads, read_cache, read_flights
+from src.core.warmup import warm_up_pool
+from src.core.write_batch import write_batcher
+from src.snapshot import snapshot_manager
 from src.core.logging import setup_logging
 from src.core.config import settings
-from src.middleware import APIKeyMiddleware
-
-setup_logging()
+from src.middleware import (
+    APIKeyMiddleware, DisconnectCancelMiddleware, IdempotencyMiddleware, ProfilingMiddleware, ReadOnlyMiddleware,
+    StatementCountMiddleware
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,22 +29,65 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events for the application."""
+    # Логирование настраивается при старте, а не при импорте модуля
+    setup_logging()
     logger.info("Starting application...")
     if settings.DEBUG:
         logger.debug("Debug mode enabled - detailed logging will be provided")
-
-    # Create tables on startup
+    if settings.PROFILING_ENABLED and profiler.install():
+        logger.info(f"Request profiling enabled, sample rate: {settings.PROFILING_SAMPLE_RATE}")
+
+    if settings.READ_ONLY_MODE:
+        # Без БД: только локальный снимок, без схемы, прогрева и реплик
+        await snapshot_manager.start(build_missing=False)
+        logger.info(f"Read-only mode: serving snapshot v{snapshot_manager.version}")
+        yield
+        logger.info("Shutting down application...")
+        return
+
+    # Миграции выполняются один раз на выкладку; воркер только сверяет версию схемы
     try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
+        if settings.DB_MIGRATE_ON_STARTUP:
+            applied = await migrate(async_engine)
+            if applied:
+                logger.info(f"Applied migrations: {applied}")
+        version = await check_schema(async_engine)
+        logger.info(f"Database schema version {version}")
     except Exception as e:
-        logger.error(f"Failed to create database tables: {e}")
+        logger.error(f"Database schema check failed: {e}")
         raise
 
+    if settings.DB_WARMUP_ENABLED:
+        engines = [async_engine] + [node.engine for node in replica_router.nodes]
+        await asyncio.gather(*(warm_up_pool(engine, settings.DB_POOL_SIZE) for engine in engines))
+
+    replica_router.start()
+
+    if settings.SNAPSHOT_ENABLED:
+        await snapshot_manager.start()
+        commit_hooks.append(snapshot_manager.schedule_rebuild)
+
+    if settings.CHANGE_NOTIFICATIONS_ENABLED:
+        # Записи других воркеров и внешних загрузчиков приходят через LISTEN/NOTIFY
+        change_bus.subscribe(invalidate_reads)
+        change_bus.subscribe(event_hub.on_change)
+        # Свои записи сбрасывают кэш сразу, не дожидаясь уведомления
+        commit_hooks.append(read_cache.clear)
+        if settings.SNAPSHOT_ENABLED:
+            change_bus.subscribe(snapshot_manager.on_change)
+        change_listener.start()
+
     yield
 
     logger.info("Shutting down application...")
     # Cleanup on shutdown
+    await write_batcher.stop()
+    await change_listener.stop()
+    await event_hub.stop()
+    await replica_router.stop()
+    if settings.SNAPSHOT_ENABLED:
+        await snapshot_manager.stop()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -41,13 +97,23 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Include middleware
+# Include middleware (последний добавленный выполняется первым)
+if settings.READ_ONLY_MODE:
+    app.add_middleware(ReadOnlyMiddleware)
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(APIKeyMiddleware)
+app.add_middleware(StatementCountMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+if settings.DB_CANCEL_ON_DISCONNECT:
+    app.add_middleware(DisconnectCancelMiddleware)
 
 # Include routers
 app.include_router(organizations.router)
-app.include_router(buildings.router)
+app.include_router(building.router)
 app.include_router(activities.router)
+app.include_router(search.router)
+app.include_router(events.router)
 
 
 @app.get("/")
@@ -64,6 +130,51 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness probe: процесс жив и обрабатывает запросы."""
     logger.debug("Health check requested")
-    return {"status": "healthy", "database": "connected"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe: проверяет БД с ограничением по времени и сообщает о насыщении пула.
+
+    Возвращает 503, если БД недоступна или очередь ожидания соединений переполнена.
+    """
+    if settings.READ_ONLY_MODE:
+        ready = snapshot_manager.current() is not None
+        return JSONResponse(
+            status_code=200 if ready else 503,
+            content={
+                "status": "ready" if ready else "unavailable",
+                "database": "disabled",
+                "snapshot_version": snapshot_manager.version,
+            }
+        )
+
+    pool = pool_status()
+    try:
+        await check_database()
+        database = "connected"
+    except Exception as e:
+        logger.warning(f"Readiness check failed: {e!r}")
+        database = "unavailable"
+
+    ready = database == "connected" and not pool["admission"]["saturated"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "unavailable",
+            "database": database,
+            "pool": pool,
+            "sessions": session_tracker.stats(),
+            "changes": change_listener.stats(),
+            "read_cache": read_cache.stats(),
+            "events": event_hub.stats(),
+            "profiling": profiler.stats(),
+            "replicas": replica_router.stats(),
+            "coalescing": read_flights.stats(),
+            "write_batching": write_batcher.stats(),
+        }
+    )
\ No newline at end of file
@@ -1,60 +1,107 @@
 import logging
+from collections import defaultdict
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-
-from src.core.database import get_session
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+
+from src.core.config import settings
+from src.core.errors import integrity_error_to_http, is_statement_timeout, statement_timeout_to_http
+from src.core.serialization import RawJSONResponse, dump_activity, dumps
+from src.core.session import get_session
+from src.core.singleflight import coalesced_read
 from src.models.activity import Activity as ActivityModel
 from src.schemas.activity import ActivityWithChildren, Activity, ActivityCreate
+from src.snapshot import current_snapshot, serving_snapshot
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/activities", tags=["Деятельности"])
 
 
-@router.get("/", response_model=list[ActivityWithChildren])
-async def list_activities(session: AsyncSession = get_session()):
+def build_tree(activity: ActivityModel, current_level: int, children: dict[int, list[ActivityModel]],
+               max_level: int = 2) -> dict:
+    """Строит дерево активности по заранее загруженным дочерним элементам (parent_id -> список)."""
+    children_list = []
+    if current_level < max_level:
+        children_list = [
+            build_tree(child, current_level + 1, children, max_level) for child in children.get(activity.id, ())
+        ]
+
+    return {**dump_activity(activity), "level": current_level, "children": children_list}
+
+
+def group_children(activities: list[ActivityModel]) -> dict[int, list[ActivityModel]]:
+    children: dict[int, list[ActivityModel]] = defaultdict(list)
+    for activity in activities:
+        if activity.parent_id is not None:
+            children[activity.parent_id].append(activity)
+    return children
+
+
+async def load_activity_forest(session: AsyncSession) -> bytes:
+    # Все уровни одним запросом: дерево собирается в памяти, а не запросом на каждый узел
+    result = await session.execute(select(ActivityModel).order_by(ActivityModel.id))
+    activities = result.scalars().all()
+
+    children = group_children(activities)
+    tree = [build_tree(act, 0, children) for act in activities if act.parent_id is None]
+
+    logger.debug(f"Сформировано дерево видов деятельности, корневых элементов: {len(tree)}")
+    return dumps(tree)
+
+
+async def load_activity_tree(session: AsyncSession, activity_id: int) -> bytes:
+    # Глубина дерева не больше трёх уровней: сам вид, дочерние и их дочерние — одним запросом
+    child_ids = select(ActivityModel.id).where(ActivityModel.parent_id == activity_id)
+    result = await session.execute(
+        select(ActivityModel)
+        .where(or_(
+            ActivityModel.id == activity_id,
+            ActivityModel.parent_id == activity_id,
+            ActivityModel.parent_id.in_(child_ids)
+        ))
+        .order_by(ActivityModel.id)
+    )
+    activities = result.scalars().all()
+
+    activity = next((act for act in activities if act.id == activity_id), None)
+    if not activity:
+        logger.warning(f"Вид деятельности ID={activity_id} не найден")
+        raise HTTPException(status_code=404, detail="Вид деятельности не найден")
+
+    tree = build_tree(activity, activity.level, group_children(activities))
+    logger.debug(f"Вид деятельности с дочерними элементами сформирован: ID={activity.id}")
+    return dumps(tree)
+
+
+@router.get("/", response_model=list[ActivityWithChildren], response_class=RawJSONResponse)
+async def list_activities(request: Request):
     """
     Получить список всех видов деятельности с дочерними элементами.
+
+    Одновременные одинаковые запросы разделяют одно выполнение в БД.
     """
     try:
         logger.info("Запрошен список всех видов деятельности с дочерними элементами")
 
-        result = await session.execute(select(ActivityModel).where(ActivityModel.parent_id == None))
-        root_activities = result.scalars().all()
-
-        async def build_tree(activity: ActivityModel, current_level: int = 0,
-                             max_level: int = 2) -> ActivityWithChildren:
-            """Рекурсивно строит дерево активности."""
-            children_list = []
-            if current_level < max_level:
-                result = await session.execute(select(ActivityModel).where(ActivityModel.parent_id == activity.id))
-                children = result.scalars().all()
-                for child in children:
-                    children_list.append(await build_tree(child, current_level + 1, max_level))
-
-            return ActivityWithChildren(
-                id=activity.id,
-                name=activity.name,
-                parent_id=activity.parent_id,
-                level=current_level,
-                children=children_list
-            )
-
-        tree = []
-        for act in root_activities:
-            tree.append(await build_tree(act))
-
-        logger.debug(f"Сформировано дерево видов деятельности, корневых элементов: {len(tree)}")
-        return tree
+        snapshot = serving_snapshot() if settings.READ_ONLY_MODE else current_snapshot(request)
+        if snapshot is not None:
+            return RawJSONResponse(dumps(snapshot.activity_forest()))
 
+        return RawJSONResponse(await coalesced_read(request, ("activities",), load_activity_forest))
+
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при получении списка видов деятельности: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
 @router.post("/", response_model=Activity)
-async def create_activity(data: ActivityCreate, session: AsyncSession = get_session()):
+async def create_activity(data: ActivityCreate, session: AsyncSession = Depends(get_session)):
     """
     Создать новый вид деятельности.
     """
@@ -87,49 +134,43 @@ async def create_activity(data: ActivityCreate, session: AsyncSession = get_sess
     except HTTPException:
         await session.rollback()
         raise
+    except IntegrityError as e:
+        await session.rollback()
+        raise integrity_error_to_http(e)
     except Exception as e:
         await session.rollback()
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при создании вида деятельности: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.get("/{activity_id}", response_model=ActivityWithChildren)
-async def get_activity(activity_id: int, session: AsyncSession = get_session()):
+@router.get("/{activity_id}", response_model=ActivityWithChildren, response_class=RawJSONResponse)
+async def get_activity(activity_id: int, request: Request):
     """
     Получить вид деятельности по ID, включая дочерние элементы.
+
+    Одновременные одинаковые запросы разделяют одно выполнение в БД.
     """
     try:
         logger.info(f"Запрошен вид деятельности ID={activity_id}")
 
-        activity = await session.get(ActivityModel, activity_id)
-        if not activity:
+        snapshot = serving_snapshot() if settings.READ_ONLY_MODE else current_snapshot(request)
+        tree = snapshot.activity_tree(activity_id) if snapshot is not None else None
+        if tree is not None:
+            return RawJSONResponse(dumps(tree))
+        if settings.READ_ONLY_MODE:
             logger.warning(f"Вид деятельности ID={activity_id} не найден")
             raise HTTPException(status_code=404, detail="Вид деятельности не найден")
 
-        async def build_tree(activity: ActivityModel, current_level: int = activity.level,
-                             max_level: int = 2) -> ActivityWithChildren:
-            """Рекурсивно строит дерево активности."""
-            children_list = []
-            if current_level < max_level:
-                result = await session.execute(select(ActivityModel).where(ActivityModel.parent_id == activity.id))
-                children = result.scalars().all()
-                for child in children:
-                    children_list.append(await build_tree(child, current_level + 1, max_level))
-
-            return ActivityWithChildren(
-                id=activity.id,
-                name=activity.name,
-                parent_id=activity.parent_id,
-                level=current_level,
-                children=children_list
-            )
-
-        tree = await build_tree(activity)
-        logger.debug(f"Вид деятельности с дочерними элементами сформирован: ID={activity.id}")
-        return tree
+        return RawJSONResponse(await coalesced_read(
+            request, ("activity", activity_id), lambda session: load_activity_tree(session, activity_id)
+        ))
 
     except HTTPException:
         raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при получении вида деятельности {activity_id}: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
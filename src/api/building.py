@@ -1,22 +1,29 @@
 import logging
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-
-from src.core.database import get_session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from src.core.config import settings
+from src.core.errors import integrity_error_to_http, is_statement_timeout, statement_timeout_to_http
+from src.core.serialization import FastJSONResponse, dump_building
+from src.core.session import get_read_session, get_session, remember_write
+from src.crud.buildings import find_conflicting_building, insert_building
 from src.models.building import Building as BuildingModel
 from src.schemas.building import Building, BuildingCreate
+from src.snapshot import current_snapshot, serving_snapshot
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/buildings", tags=["Здания"])
 
 
-@router.get("/", response_model=list[Building])
+@router.get("/", response_model=list[Building], response_class=FastJSONResponse)
 async def list_buildings(
+        request: Request,
         page: int = Query(1, ge=1, description="Номер страницы"),
         size: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
-        session: AsyncSession = get_session()
+        session: AsyncSession = Depends(get_read_session)
 ):
     """
     Получить список всех зданий с пагинацией.
@@ -24,77 +31,100 @@ async def list_buildings(
     try:
         logger.info("Запрошен список всех зданий")
 
-        query = select(BuildingModel).offset((page - 1) * size).limit(size)
+        snapshot = serving_snapshot() if settings.READ_ONLY_MODE else current_snapshot(request)
+        if snapshot is not None:
+            return FastJSONResponse(snapshot.buildings_page((page - 1) * size, size))
+
+        query = select(BuildingModel).order_by(BuildingModel.id).offset((page - 1) * size).limit(size)
         result = await session.execute(query)
         buildings = result.scalars().all()
 
-        count_result = await session.execute(select(func.count()).select_from(BuildingModel))
-        total = count_result.scalar()
-
-        logger.debug(f"Найдено зданий: {len(buildings)} из {total}")
-        return buildings
+        logger.debug(f"Найдено зданий: {len(buildings)}")
+        return FastJSONResponse([dump_building(building) for building in buildings])
 
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при получении списка зданий: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.post("/", response_model=Building)
-async def create_building(data: BuildingCreate, session: AsyncSession = get_session()):
+@router.post("/", response_model=Building, response_class=FastJSONResponse)
+async def create_building(
+        data: BuildingCreate,
+        return_existing: bool = Query(
+            False, description="Вернуть существующее здание вместо ошибки 409, если координаты или адрес заняты"
+        ),
+        session: AsyncSession = Depends(get_session, scope="function")
+):
     """
     Создать новое здание.
+
+    Вставка выполняется одним запросом INSERT ... ON CONFLICT; при конфликте
+    возвращается 409 либо существующее здание в режиме return_existing.
+    Коммит и откат выполняет get_session; scope="function" фиксирует
+    транзакцию до отправки ответа, а не после.
     """
     try:
         logger.info(f"Создание нового здания: {data.address}")
 
-        existing_building = await session.execute(
-            select(BuildingModel).where(
-                (BuildingModel.latitude == data.latitude) &
-                (BuildingModel.longitude == data.longitude)
-            )
-        )
-        if existing_building.scalar():
-            raise HTTPException(status_code=400, detail="Здание с такими координатами уже существует")
-
-        new_building = BuildingModel(
-            address=data.address,
-            latitude=data.latitude,
-            longitude=data.longitude
-        )
-        session.add(new_building)
-        await session.commit()
-        await session.refresh(new_building)
-
-        logger.info(f"Здание создано с ID={new_building.id}")
-        return new_building
+        building = await insert_building(session, data)
+        if building is None:
+            existing = await find_conflicting_building(session, data)
+            if existing is None or not return_existing:
+                logger.warning(f"Здание с такими координатами или адресом уже существует: {data.address}")
+                raise HTTPException(status_code=409, detail="Здание с такими координатами или адресом уже существует")
+            logger.info(f"Возвращено существующее здание ID={existing.id}")
+            return remember_write(FastJSONResponse(dump_building(existing)))
+
+        logger.info(f"Здание создано с ID={building.id}")
+        return remember_write(FastJSONResponse(dump_building(building)))
 
     except HTTPException:
-        await session.rollback()
         raise
+    except IntegrityError as e:
+        raise integrity_error_to_http(e)
     except Exception as e:
-        await session.rollback()
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при создании здания: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.get("/{building_id}", response_model=Building)
-async def get_building(building_id: int, session: AsyncSession = get_session()):
+@router.get("/{building_id}", response_model=Building, response_class=FastJSONResponse)
+async def get_building(
+        request: Request,
+        building_id: int,
+        session: AsyncSession = Depends(get_read_session)
+):
     """
     Получить здание по его идентификатору.
     """
     try:
         logger.info(f"Запрошено здание ID={building_id}")
 
+        snapshot = serving_snapshot() if settings.READ_ONLY_MODE else current_snapshot(request)
+        cached = snapshot.building(building_id) if snapshot is not None else None
+        if cached is not None:
+            return FastJSONResponse(cached)
+        if settings.READ_ONLY_MODE:
+            logger.warning(f"Здание ID={building_id} не найдено")
+            raise HTTPException(status_code=404, detail="Здание не найдено")
+
         building = await session.get(BuildingModel, building_id)
         if not building:
             logger.warning(f"Здание ID={building_id} не найдено")
             raise HTTPException(status_code=404, detail="Здание не найдено")
 
         logger.debug(f"Здание найдено: {building.address}")
-        return building
+        return FastJSONResponse(dump_building(building))
 
     except HTTPException:
         raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при получении здания {building_id}: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
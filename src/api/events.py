@@ -0,0 +1,69 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.core.config import settings
+from src.core.events import RESYNC, EventFilter, event_hub
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/events", tags=["События"])
+
+# Клиент переподключается через 3 с; после переподключения он получает resync
+STREAM_PREAMBLE = b"retry: 3000\n\nevent: resync\ndata: {}\n\n"
+RESYNC_EVENT = b"event: resync\ndata: {}\n\n"
+KEEPALIVE = b": keepalive\n\n"
+
+
+@router.get("/", response_class=StreamingResponse)
+async def stream_changes(
+        building_id: int | None = Query(None, description="Только изменения организаций и здания с этим ID"),
+        activity_id: int | None = Query(None, description="Только изменения, связанные с видом деятельности"),
+        min_lat: float | None = Query(None, description="Минимальная широта области"),
+        max_lat: float | None = Query(None, description="Максимальная широта области"),
+        min_lng: float | None = Query(None, description="Минимальная долгота области"),
+        max_lng: float | None = Query(None, description="Максимальная долгота области"),
+):
+    """
+    Поток изменений справочника (Server-Sent Events) вместо периодического опроса.
+
+    Событие `change` содержит тип сущности (organization, building, activity),
+    ID, операцию (insert, update, delete) и updated_at. Событие `resync`
+    означает, что часть изменений могла быть пропущена (переподключение,
+    переполнение очереди медленного клиента) и данные нужно перечитать.
+    Фильтры по зданию, виду деятельности и области можно сочетать.
+    """
+    if not settings.CHANGE_NOTIFICATIONS_ENABLED or settings.READ_ONLY_MODE:
+        raise HTTPException(status_code=503, detail="Поток изменений недоступен")
+
+    bounds = (min_lat, max_lat, min_lng, max_lng)
+    if any(value is not None for value in bounds) and any(value is None for value in bounds):
+        raise HTTPException(status_code=400, detail="Область задаётся всеми четырьмя границами")
+    bbox = bounds if min_lat is not None else None
+
+    if event_hub.full:
+        logger.warning("Достигнут лимит подписчиков потока изменений")
+        raise HTTPException(status_code=503, detail="Слишком много подписчиков", headers={"Retry-After": "5"})
+
+    subscription = event_hub.subscribe(EventFilter(building_id, activity_id, bbox))
+    logger.info(f"Подписка на поток изменений: building_id={building_id}, activity_id={activity_id}, bbox={bbox}")
+
+    async def stream():
+        try:
+            yield STREAM_PREAMBLE
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                yield RESYNC_EVENT if item is RESYNC else item
+        finally:
+            event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
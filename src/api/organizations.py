@@ -1,214 +1,300 @@
 import logging
 
-from fastapi import APIRouter, HTTPException, Query
-from sqlalchemy.orm import selectinload
+from fastapi import APIRouter, HTTPException, Query, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
 
-from src.core.database import get_session
-from src.models.organization import Organization as OrganizationModel
-from src.models.building import Building as BuildingModel
-from src.models.activity import Activity as ActivityModel
-from src.models import OrganizationPhone as PhoneModel
+from src.core.config import settings
+from src.core.errors import (
+    FOREIGN_KEY_VIOLATION, integrity_error_to_http, is_statement_timeout, sqlstate, statement_timeout_to_http
+)
+from src.core.serialization import (
+    COMPACT_PAGE_RESPONSES, FastJSONResponse, RawJSONResponse, dump_facets, dump_organization, dump_page,
+    dump_raw_page, dump_written_organization, dumps, page_response
+)
+from src.core.session import remember_write
+from src.core.singleflight import coalesced_read
+from src.core.write_batch import run_write
+from src.crud.documents import document_page, select_document, select_document_list
+from src.crud.facets import select_activity_facets
+from src.crud.organizations import (
+    add_activity_links,
+    add_phones,
+    existing_activities,
+    find_organization_id,
+    insert_organization,
+    load_organization,
+    organization_activities,
+    organization_phones,
+    select_organization,
+    select_organization_ids,
+    select_organizations,
+    sync_activity_links,
+    sync_phones,
+    update_organization_row
+)
 from src.schemas import PaginatedResponse
 from src.schemas.organization import (
     Organization, OrganizationCreate, OrganizationUpdate
 )
+from src.snapshot import serving_snapshot
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/organizations", tags=["Организации"])
 
 
-@router.get("/", response_model=PaginatedResponse)
+async def load_organizations_page(
+        session: AsyncSession,
+        building_id: int | None,
+        activity_id: int | None,
+        name: str | None,
+        page: int,
+        size: int,
+        facets: bool = False
+) -> bytes:
+    if settings.READ_MODEL_ENABLED:
+        return await load_document_page(session, building_id, activity_id, name, page, size, facets)
+
+    query, count_query = select_organizations(building_id, activity_id, name)
+
+    query = query.offset((page - 1) * size).limit(size)
+    result = await session.execute(query)
+    items = result.scalars().all()
+
+    total_result = await session.execute(count_query)
+    total = total_result.scalar()
+
+    logger.debug(f"Пагинация: страница {page}, элементов {len(items)}, всего {total}")
+    response = dump_page(total, page, size, items, dump_organization)
+    if facets:
+        rows = await session.execute(select_activity_facets(select_organization_ids(building_id, activity_id, name)))
+        response["facets"] = dump_facets(rows)
+    return dumps(response)
+
+
+async def load_document_page(
+        session: AsyncSession,
+        building_id: int | None,
+        activity_id: int | None,
+        name: str | None,
+        page: int,
+        size: int,
+        facets: bool = False
+) -> bytes:
+    """Страница из модели чтения: документы и общее число одним запросом."""
+    query, count_query = select_document_list(building_id, activity_id, name)
+    total, documents = await document_page(session, query, count_query, page, size)
+
+    logger.debug(f"Пагинация (модель чтения): страница {page}, элементов {len(documents)}, всего {total}")
+    extra = {}
+    if facets:
+        rows = await session.execute(select_activity_facets(select_organization_ids(building_id, activity_id, name)))
+        extra["facets"] = dump_facets(rows)
+    return dump_raw_page(total, page, size, documents, **extra)
+
+
+async def load_organization_document(session: AsyncSession, org_id: int) -> bytes:
+    if settings.READ_MODEL_ENABLED:
+        result = await session.execute(select_document(org_id))
+        document = result.scalar_one_or_none()
+        if document is None:
+            logger.warning(f"Организация ID={org_id} не найдена")
+            raise HTTPException(status_code=404, detail="Организация не найдена")
+        return document.encode("utf-8")
+
+    result = await session.execute(select_organization(org_id))
+    org = result.scalar_one_or_none()
+
+    if not org:
+        logger.warning(f"Организация ID={org_id} не найдена")
+        raise HTTPException(status_code=404, detail="Организация не найдена")
+
+    logger.debug(f"Организация найдена: {org.name}")
+    return dumps(dump_organization(org))
+
+
+@router.get(
+    "/", response_model=PaginatedResponse[Organization], response_class=RawJSONResponse,
+    responses=COMPACT_PAGE_RESPONSES
+)
 async def list_organizations(
+        request: Request,
         building_id: int | None = Query(None, description="Фильтр по ID здания"),
         activity_id: int | None = Query(None, description="Фильтр по ID вида деятельности"),
         name: str | None = Query(None, description="Поиск по названию организации"),
         page: int = Query(1, ge=1, description="Номер страницы"),
         size: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
-        session: AsyncSession = get_session()
+        facets: bool = Query(False, description="Добавить количество организаций по видам деятельности")
 ):
     """
     Получить список организаций с фильтрацией и пагинацией.
+
+    С facets=true ответ содержит число найденных организаций по каждому виду
+    деятельности с учётом дочерних видов — одним запросом вместо запроса
+    на каждый вид. Одновременные запросы с одинаковыми параметрами разделяют
+    одно выполнение в БД. Заголовком Accept можно запросить компактный формат
+    страницы (см. COMPACT_PAGE_RESPONSES).
     """
     try:
         logger.info("Запрошен список организаций с фильтрацией и пагинацией")
 
-        query = select(OrganizationModel).options(
-            selectinload(OrganizationModel.building),
-            selectinload(OrganizationModel.activities),
-            selectinload(OrganizationModel.phones)
-        )
-
-        conditions = []
-        if building_id:
-            conditions.append(OrganizationModel.building_id == building_id)
-        if name:
-            conditions.append(OrganizationModel.name.ilike(f"%{name}%"))
-        if activity_id:
-            query = query.join(OrganizationModel.activities).where(ActivityModel.id == activity_id)
-
-        if conditions:
-            query = query.where(and_(*conditions))
-
-        query = query.offset((page - 1) * size).limit(size)
-        result = await session.execute(query)
-        items = result.scalars().all()
-
-        count_query = select(func.count()).select_from(OrganizationModel)
-        if conditions:
-            count_query = count_query.where(and_(*conditions))
-        if activity_id:
-            count_query = count_query.join(OrganizationModel.activities).where(ActivityModel.id == activity_id)
-
-        total_result = await session.execute(count_query)
-        total = total_result.scalar()
-
-        logger.debug(f"Пагинация: страница {page}, элементов {len(items)}, всего {total}")
-
-        return PaginatedResponse(
-            total=total,
-            page=page,
-            size=size,
-            items=items
+        if settings.READ_ONLY_MODE:
+            snapshot = serving_snapshot()
+            org_ids = snapshot.find_organizations(building_id, activity_id, name)
+            response = snapshot.organizations_page(org_ids, page, size)
+            if facets:
+                response["facets"] = snapshot.activity_facets(org_ids)
+            return page_response(response, request.headers.get("accept"))
+
+        # Поиск по названию регистронезависимый (ILIKE), поэтому ключ нормализуется
+        name = name.lower() if name else None
+        key = ("organizations", building_id, activity_id, name, page, size, facets)
+        content = await coalesced_read(
+            request, key,
+            lambda session: load_organizations_page(session, building_id, activity_id, name, page, size, facets)
         )
+        return page_response(content, request.headers.get("accept"))
 
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при получении списка организаций: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.get("/{org_id}", response_model=Organization)
-async def get_organization(org_id: int, session: AsyncSession = get_session()):
+@router.get("/{org_id}", response_model=Organization, response_class=RawJSONResponse)
+async def get_organization(org_id: int, request: Request):
     """
     Получить организацию по ID, включая здание, телефоны и виды деятельности.
+
+    Одновременные запросы одной организации разделяют одно выполнение в БД.
     """
     try:
         logger.info(f"Запрошена организация ID={org_id}")
 
-        org = await session.get(
-            OrganizationModel,
-            org_id,
-            options=[
-                selectinload(OrganizationModel.building),
-                selectinload(OrganizationModel.activities),
-                selectinload(OrganizationModel.phones)
-            ]
-        )
+        if settings.READ_ONLY_MODE:
+            org = serving_snapshot().organization(org_id)
+            if org is None:
+                logger.warning(f"Организация ID={org_id} не найдена")
+                raise HTTPException(status_code=404, detail="Организация не найдена")
+            return RawJSONResponse(dumps(org))
 
-        if not org:
-            logger.warning(f"Организация ID={org_id} не найдена")
-            raise HTTPException(status_code=404, detail="Организация не найдена")
-
-        logger.debug(f"Организация найдена: {org.name}")
-        return org
+        return RawJSONResponse(await coalesced_read(
+            request, ("organization", org_id), lambda session: load_organization_document(session, org_id)
+        ))
 
     except HTTPException:
         raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при получении организации {org_id}: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.post("/", response_model=Organization)
-async def create_organization(data: OrganizationCreate, session: AsyncSession = get_session()):
+async def write_new_organization(session: AsyncSession, data: OrganizationCreate, return_existing: bool) -> dict:
     """
-    Создать новую организацию с телефонами и видами деятельности.
+    Вставить организацию с телефонами и связями и вернуть схему Organization.
+
+    Записанное состояние собирается из RETURNING и найденных видов деятельности,
+    без повторного чтения организации после коммита.
     """
+    row = await insert_organization(session, data.name, data.building_id)
+    if row is None:
+        existing_id = await find_organization_id(session, data.name)
+        if existing_id is None or not return_existing:
+            logger.warning(f"Организация с названием {data.name!r} уже существует")
+            raise HTTPException(status_code=409, detail="Организация с таким названием уже существует")
+        logger.info(f"Возвращена существующая организация ID={existing_id}")
+        return dump_organization(await load_organization(session, existing_id))
+
+    phones = await add_phones(session, row.id, list(dict.fromkeys(phone.number for phone in data.phones)))
+    activities = await existing_activities(session, data.activity_ids)
+    await add_activity_links(session, row.id, [activity.id for activity in activities])
+    return dump_written_organization(row, row.Building, activities, phones)
+
+
+async def write_organization_update(session: AsyncSession, org_id: int, data: OrganizationUpdate) -> dict:
+    """Обновить организацию и вернуть схему Organization из RETURNING и итоговых связей."""
     try:
-        logger.info(f"Создание организации: {data.name}")
-
-        building = await session.get(BuildingModel, data.building_id)
-        if not building:
-            logger.warning(f"Здание ID={data.building_id} не найдено")
-            raise HTTPException(status_code=404, detail="Здание не найдено")
-
-        new_org = OrganizationModel(
-            name=data.name,
-            building_id=data.building_id
+        row = await update_organization_row(session, org_id, data.name, data.building_id)
+    except IntegrityError as e:
+        if sqlstate(e) != FOREIGN_KEY_VIOLATION:
+            raise
+        logger.warning(f"Здание ID={data.building_id} не найдено")
+        raise HTTPException(status_code=404, detail="Здание не найдено")
+
+    if row is None:
+        logger.warning(f"Организация ID={org_id} не найдена")
+        raise HTTPException(status_code=404, detail="Организация не найдена")
+
+    if data.activity_ids is not None:
+        activities = await sync_activity_links(session, org_id, data.activity_ids)
+    else:
+        activities = await organization_activities(session, org_id)
+
+    if data.phones is not None:
+        phones = await sync_phones(session, org_id, [phone.number for phone in data.phones])
+    else:
+        phones = await organization_phones(session, org_id)
+
+    return dump_written_organization(row, row.Building, activities, phones)
+
+
+@router.post("/", response_model=Organization, response_class=FastJSONResponse)
+async def create_organization(
+        request: Request,
+        data: OrganizationCreate,
+        return_existing: bool = Query(
+            False, description="Вернуть существующую организацию вместо ошибки 409, если название занято"
         )
-        session.add(new_org)
-        await session.flush()
-
-        for phone in data.phones:
-            new_phone = PhoneModel(number=phone.number, organization_id=new_org.id)
-            session.add(new_phone)
-
-        if data.activity_ids:
-            activities = await session.execute(
-                select(ActivityModel).where(ActivityModel.id.in_(data.activity_ids))
-            )
-            new_org.activities = activities.scalars().all()
+):
+    """
+    Создать новую организацию с телефонами и видами деятельности.
 
-        await session.commit()
-        await session.refresh(new_org)
+    Вставка выполняется одним запросом INSERT ... ON CONFLICT; при конфликте
+    названия возвращается 409 либо существующая организация в режиме
+    return_existing. Несуществующее здание — 400. При WRITE_BATCHING_ENABLED
+    запись фиксируется групповым коммитом вместе с одновременными.
+    """
+    try:
+        logger.info(f"Создание организации: {data.name}")
 
-        logger.info(f"Организация создана с ID={new_org.id}")
-        return new_org
+        org = await run_write(request, lambda session: write_new_organization(session, data, return_existing))
+        logger.info(f"Организация создана с ID={org['id']}")
+        return remember_write(FastJSONResponse(org))
 
     except HTTPException:
-        await session.rollback()
         raise
+    except IntegrityError as e:
+        raise integrity_error_to_http(e)
     except Exception as e:
-        await session.rollback()
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при создании организации: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.put("/{org_id}", response_model=Organization)
-async def update_organization(org_id: int, data: OrganizationUpdate, session: AsyncSession = get_session()):
+@router.put("/{org_id}", response_model=Organization, response_class=FastJSONResponse)
+async def update_organization(request: Request, org_id: int, data: OrganizationUpdate):
     """
     Обновить организацию по ID.
     """
     try:
         logger.info(f"Обновление организации ID={org_id}")
 
-        org = await session.get(
-            OrganizationModel,
-            org_id,
-            options=[
-                selectinload(OrganizationModel.phones),
-                selectinload(OrganizationModel.activities)
-            ]
-        )
-
-        if not org:
-            logger.warning(f"Организация ID={org_id} не найдена")
-            raise HTTPException(status_code=404, detail="Организация не найдена")
-
-        if data.name is not None:
-            org.name = data.name
-
-        if data.building_id is not None:
-            building = await session.get(BuildingModel, data.building_id)
-            if not building:
-                logger.warning(f"Здание ID={data.building_id} не найдено")
-                raise HTTPException(status_code=404, detail="Здание не найдено")
-            org.building_id = data.building_id
-
-        if data.activity_ids is not None:
-            activities = await session.execute(
-                select(ActivityModel).where(ActivityModel.id.in_(data.activity_ids))
-            )
-            org.activities = activities.scalars().all()
-
-        if data.phones is not None:
-            for phone in org.phones:
-                await session.delete(phone)
-            for phone in data.phones:
-                new_phone = PhoneModel(number=phone.number, organization_id=org.id)
-                session.add(new_phone)
-
-        await session.commit()
-        await session.refresh(org)
-
-        logger.info(f"Организация обновлена ID={org.id}")
-        return org
+        org = await run_write(request, lambda session: write_organization_update(session, org_id, data))
+        logger.info(f"Организация обновлена ID={org_id}")
+        return remember_write(FastJSONResponse(org))
 
     except HTTPException:
-        await session.rollback()
         raise
+    except IntegrityError as e:
+        raise integrity_error_to_http(e)
     except Exception as e:
-        await session.rollback()
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при обновлении организации {org_id}: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
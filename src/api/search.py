@@ -1,103 +1,313 @@
+import base64
+import binascii
 import logging
+from bisect import bisect_right
+from typing import Literal
 
-from fastapi import Body, Query, APIRouter, HTTPException
-from sqlalchemy import and_, select, func
+from fastapi import Body, Depends, Query, APIRouter, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import get_session
+from src.core.config import settings
+from src.core.errors import is_statement_timeout, statement_timeout_to_http
+from src.core.serialization import (
+    COMPACT_PAGE_RESPONSES, FastJSONResponse, dump_facets, dump_organization, dump_page, dump_raw_page, page_response
+)
+from src.core.session import get_read_session
+from src.crud.documents import (
+    document_page,
+    select_documents_in_radius,
+    select_documents_in_rectangle,
+    select_nearest_documents
+)
+from src.crud.facets import select_activity_facets
+from src.crud.search import (
+    select_ids_in_radius,
+    select_ids_in_rectangle,
+    select_in_radius,
+    select_in_rectangle,
+    select_nearest,
+    select_organizations_by_ids
+)
 from src.schemas.search import CoordinateRange, RadiusSearch
+from src.schemas.organization import Organization, OrganizationWithDistance
 from src.schemas.response import PaginatedResponse
-from src.models.building import Building as BuildingModel
-from src.models import Organization as OrganizationModel
+from src.snapshot import DirectorySnapshot, current_snapshot, serving_snapshot
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/search", tags=["Поиск"])
 
 
-@router.post("/rectangle", response_model=PaginatedResponse)
+async def snapshot_page(session: AsyncSession, org_ids: list[int], page: int, size: int) -> dict | None:
+    """
+    Страница результатов геопоиска по снимку: общее число известно без COUNT,
+    из БД загружаются только организации текущей страницы. В режиме только
+    для чтения организации берутся из снимка.
+
+    None, если части организаций страницы уже нет в БД (снимок отстал от
+    удаления): total снимка с такой страницей не сходится, и вызывающий
+    отвечает запросом к БД.
+    """
+    if settings.READ_ONLY_MODE:
+        return serving_snapshot().organizations_page(org_ids, page, size)
+
+    page_ids = org_ids[(page - 1) * size:page * size]
+    items = []
+    if page_ids:
+        result = await session.execute(select_organizations_by_ids(page_ids))
+        items = result.scalars().all()
+    if len(items) < len(page_ids):
+        logger.debug(f"Снимок отстал от БД: найдено {len(items)} из {len(page_ids)} организаций страницы")
+        return None
+    return dump_page(len(org_ids), page, size, items, dump_organization)
+
+
+def encode_cursor(distance: float, org_id: int) -> str:
+    """Непрозрачный курсор keyset-пагинации по (distance_km, id)."""
+    return base64.urlsafe_b64encode(f"{distance!r}:{org_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        distance, org_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(distance), int(org_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+async def nearest_page(
+        session: AsyncSession,
+        snapshot: DirectorySnapshot | None,
+        params: RadiusSearch,
+        page: int,
+        size: int,
+        after: tuple[float, int] | None,
+        facets: bool = False
+) -> dict:
+    """
+    Страница организаций в радиусе по возрастанию расстояния с distance_km.
+
+    С курсором страница начинается после строки after (keyset), без него —
+    по номеру страницы. next_cursor указывает на последнюю строку страницы,
+    если за ней есть ещё результаты.
+    """
+    if snapshot is not None:
+        ordered = snapshot.organizations_by_distance(params.latitude, params.longitude, params.radius_km)
+        total = len(ordered)
+        start = bisect_right(ordered, after) if after is not None else (page - 1) * size
+        rows = ordered[start:start + size]
+        has_more = start + size < total
+
+        if settings.READ_ONLY_MODE:
+            items = [{**snapshot.organization(org_id), "distance_km": distance} for distance, org_id in rows]
+        else:
+            found = {}
+            if rows:
+                result = await session.execute(select_organizations_by_ids([org_id for _, org_id in rows]))
+                found = {org.id: org for org in result.scalars()}
+            if len(found) < len(rows):
+                # Снимок отстал от удаления: total и курсор по нему разошлись бы со страницей
+                logger.debug(f"Снимок отстал от БД: найдено {len(found)} из {len(rows)} организаций страницы")
+                return await nearest_page(session, None, params, page, size, after, facets)
+            items = [{**dump_organization(found[org_id]), "distance_km": distance} for distance, org_id in rows]
+        activity_facets = snapshot.activity_facets([org_id for _, org_id in ordered]) if facets else None
+    else:
+        query, count_query = select_nearest(params, after)
+        if after is None:
+            query = query.offset((page - 1) * size)
+        result = await session.execute(query.limit(size + 1))
+        found = result.all()
+        has_more = len(found) > size
+        rows = [(distance, org.id) for org, distance in found[:size]]
+        items = [{**dump_organization(org), "distance_km": distance} for org, distance in found[:size]]
+
+        total_result = await session.execute(count_query)
+        total = total_result.scalar()
+        activity_facets = None
+        if facets:
+            activity_facets = dump_facets(await session.execute(select_activity_facets(select_ids_in_radius(params))))
+
+    response = {
+        "total": total,
+        "page": page,
+        "size": size,
+        "items": items,
+        "next_cursor": encode_cursor(*rows[-1]) if has_more and rows else None,
+    }
+    if activity_facets is not None:
+        response["facets"] = activity_facets
+    return response
+
+
+async def nearest_document_page(
+        session: AsyncSession,
+        params: RadiusSearch,
+        page: int,
+        size: int,
+        after: tuple[float, int] | None,
+        facets: bool = False
+) -> bytes:
+    """nearest_page по модели чтения: документы уже содержат distance_km."""
+    query = select_nearest_documents(params, after)
+    if after is None:
+        query = query.offset((page - 1) * size)
+    result = await session.execute(query.limit(size + 1))
+    found = result.all()
+    has_more = len(found) > size
+    found = found[:size]
+
+    total_result = await session.execute(select_nearest(params)[1])
+    extra = {"next_cursor": encode_cursor(found[-1].distance_km, found[-1].id) if has_more and found else None}
+    if facets:
+        extra["facets"] = dump_facets(await session.execute(select_activity_facets(select_ids_in_radius(params))))
+    return dump_raw_page(total_result.scalar(), page, size, [row.document for row in found], **extra)
+
+
+@router.post(
+    "/rectangle", response_model=PaginatedResponse[Organization], response_class=FastJSONResponse,
+    responses=COMPACT_PAGE_RESPONSES
+)
 async def search_organizations_rectangle(
+        request: Request,
         coords: CoordinateRange = Body(..., description="Координаты прямоугольной области"),
         page: int = Query(1, ge=1),
         size: int = Query(10, ge=1, le=100),
-        session: AsyncSession = get_session()
+        facets: bool = Query(False, description="Добавить количество организаций по видам деятельности"),
+        session: AsyncSession = Depends(get_read_session)
 ):
     """
     Найти организации в заданной прямоугольной области.
+
+    С facets=true ответ содержит число найденных организаций по видам деятельности.
+    Заголовком Accept можно запросить компактный формат страницы.
     """
     try:
         logger.info(f"Поиск организаций в прямоугольной области: {coords}")
 
-        query = select(OrganizationModel).join(BuildingModel).where(
-            and_(
-                BuildingModel.latitude >= coords.min_lat,
-                BuildingModel.latitude <= coords.max_lat,
-                BuildingModel.longitude >= coords.min_lng,
-                BuildingModel.longitude <= coords.max_lng
-            )
-        ).offset((page - 1) * size).limit(size)
+        snapshot = serving_snapshot() if settings.READ_ONLY_MODE else current_snapshot(request)
+        if snapshot is not None:
+            positions = snapshot.buildings_in_rectangle(coords.min_lat, coords.max_lat, coords.min_lng, coords.max_lng)
+            org_ids = snapshot.organizations_in_buildings(positions)
+            response = await snapshot_page(session, org_ids, page, size)
+            if response is not None:
+                if facets:
+                    response["facets"] = snapshot.activity_facets(org_ids)
+                return page_response(response, request.headers.get("accept"))
 
-        result = await session.execute(query)
+        if settings.READ_MODEL_ENABLED:
+            query, count_query = select_documents_in_rectangle(coords)
+            total, documents = await document_page(session, query, count_query, page, size)
+            extra = {}
+            if facets:
+                extra["facets"] = dump_facets(await session.execute(
+                    select_activity_facets(select_ids_in_rectangle(coords))
+                ))
+            content = dump_raw_page(total, page, size, documents, **extra)
+            return page_response(content, request.headers.get("accept"))
+
+        query, count_query = select_in_rectangle(coords)
+
+        result = await session.execute(query.offset((page - 1) * size).limit(size))
         items = result.scalars().all()
 
-        count_query = select(func.count()).join(BuildingModel).where(
-            and_(
-                BuildingModel.latitude >= coords.min_lat,
-                BuildingModel.latitude <= coords.max_lat,
-                BuildingModel.longitude >= coords.min_lng,
-                BuildingModel.longitude <= coords.max_lng
-            )
-        )
         total_result = await session.execute(count_query)
         total = total_result.scalar()
 
         logger.debug(f"Найдено организаций в прямоугольной области: {total}")
-        return PaginatedResponse(total=total, page=page, size=size, items=items)
+        response = dump_page(total, page, size, items, dump_organization)
+        if facets:
+            response["facets"] = dump_facets(await session.execute(
+                select_activity_facets(select_ids_in_rectangle(coords))
+            ))
+        return page_response(response, request.headers.get("accept"))
 
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при поиске в прямоугольной области: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.post("/radius", response_model=PaginatedResponse)
+@router.post(
+    "/radius", response_model=PaginatedResponse[OrganizationWithDistance], response_class=FastJSONResponse,
+    responses=COMPACT_PAGE_RESPONSES
+)
 async def search_organizations_radius(
+        request: Request,
         params: RadiusSearch = Body(..., description="Центр и радиус поиска"),
         page: int = Query(1, ge=1),
         size: int = Query(10, ge=1, le=100),
-        session: AsyncSession = get_session()
+        facets: bool = Query(False, description="Добавить количество организаций по видам деятельности"),
+        order_by: Literal["id", "distance"] = Query("id", description="Порядок результатов: по ID или по расстоянию"),
+        cursor: str | None = Query(None, description="Курсор next_cursor предыдущей страницы (order_by=distance)"),
+        session: AsyncSession = Depends(get_read_session)
 ):
     """
     Найти организации в заданном радиусе от указанной точки.
+
+    С order_by=distance результаты отсортированы по расстоянию, каждая
+    организация содержит distance_km, а ответ — next_cursor для перехода
+    к следующей странице. С facets=true ответ содержит число найденных
+    организаций по видам деятельности. Заголовком Accept можно запросить
+    компактный формат страницы.
     """
     try:
         logger.info(
             f"Поиск организаций в радиусе {params.radius_km} км от точки ({params.latitude}, {params.longitude})")
 
-        distance_expr = (
-                6371 * func.acos(
-            func.cos(func.radians(params.latitude)) *
-            func.cos(func.radians(BuildingModel.latitude)) *
-            func.cos(func.radians(BuildingModel.longitude) - func.radians(params.longitude)) +
-            func.sin(func.radians(params.latitude)) *
-            func.sin(func.radians(BuildingModel.latitude))
-        )
-        )
-
-        query = select(OrganizationModel).join(BuildingModel).where(
-            distance_expr <= params.radius_km
-        ).offset((page - 1) * size).limit(size)
-
-        result = await session.execute(query)
+        if cursor is not None and order_by != "distance":
+            raise HTTPException(status_code=400, detail="Курсор поддерживается только для order_by=distance")
+
+        snapshot = serving_snapshot() if settings.READ_ONLY_MODE else current_snapshot(request)
+        if order_by == "distance":
+            after = decode_cursor(cursor) if cursor is not None else None
+            if snapshot is None and settings.READ_MODEL_ENABLED:
+                content = await nearest_document_page(session, params, page, size, after, facets)
+            else:
+                content = await nearest_page(session, snapshot, params, page, size, after, facets)
+            return page_response(content, request.headers.get("accept"))
+
+        if snapshot is not None:
+            found = snapshot.buildings_in_radius(params.latitude, params.longitude, params.radius_km)
+            org_ids = snapshot.organizations_in_buildings([i for i, _ in found])
+            response = await snapshot_page(session, org_ids, page, size)
+            if response is not None:
+                if facets:
+                    response["facets"] = snapshot.activity_facets(org_ids)
+                return page_response(response, request.headers.get("accept"))
+
+        if settings.READ_MODEL_ENABLED:
+            query, count_query = select_documents_in_radius(params)
+            total, documents = await document_page(session, query, count_query, page, size)
+            extra = {}
+            if facets:
+                extra["facets"] = dump_facets(await session.execute(
+                    select_activity_facets(select_ids_in_radius(params))
+                ))
+            content = dump_raw_page(total, page, size, documents, **extra)
+            return page_response(content, request.headers.get("accept"))
+
+        query, count_query = select_in_radius(params)
+
+        result = await session.execute(query.offset((page - 1) * size).limit(size))
         items = result.scalars().all()
 
-        count_query = select(func.count()).join(BuildingModel).where(
-            distance_expr <= params.radius_km
-        )
         total_result = await session.execute(count_query)
         total = total_result.scalar()
 
         logger.debug(f"Найдено организаций в радиусе: {total}")
-        return PaginatedResponse(total=total, page=page, size=size, items=items)
+        response = dump_page(total, page, size, items, dump_organization)
+        if facets:
+            response["facets"] = dump_facets(await session.execute(
+                select_activity_facets(select_ids_in_radius(params))
+            ))
+        return page_response(response, request.headers.get("accept"))
 
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_statement_timeout(e):
+            raise statement_timeout_to_http(e)
         logger.error(f"Ошибка при поиске по радиусу: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
@@ -0,0 +1,81 @@
+# admission.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolAdmission:
+    """
+    Контроль допуска запросов к пулу соединений БД.
+
+    Ограничивает число одновременных сессий ёмкостью пула (pool_size + max_overflow)
+    и держит собственную очередь ожидания. Если очередь длиннее порога или слот
+    не освободился за отведённое время, запрос сразу получает 503, а не висит
+    в ожидании соединения до DB_POOL_TIMEOUT.
+    """
+
+    def __init__(self, capacity: int, max_waiters: int, wait_timeout: float):
+        self.capacity = capacity
+        self.max_waiters = max_waiters
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(capacity)
+        self.in_use = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @property
+    def saturated(self) -> bool:
+        return self.waiting >= self.max_waiters
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_waiters": self.max_waiters,
+            "rejected": self.rejected,
+            "saturated": self.saturated,
+        }
+
+    def _reject(self, reason: str) -> HTTPException:
+        self.rejected += 1
+        logger.warning(f"Запрос отклонён контролем допуска: {reason} ({self.stats()})")
+        return HTTPException(
+            status_code=503,
+            detail="Сервис перегружен, повторите запрос позже",
+            headers={"Retry-After": "1"},
+        )
+
+    @asynccontextmanager
+    async def slot(self):
+        """Занять слот пула на время жизни сессии."""
+        if self._semaphore.locked() and self.saturated:
+            raise self._reject("очередь ожидания переполнена")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("истёк таймаут ожидания соединения")
+        finally:
+            self.waiting -= 1
+
+        self.in_use += 1
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            self._semaphore.release()
+
+
+pool_admission = PoolAdmission(
+    capacity=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    max_waiters=settings.DB_POOL_MAX_WAITERS,
+    wait_timeout=settings.DB_POOL_ADMISSION_TIMEOUT,
+)
@@ -0,0 +1,147 @@
+# cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Collection, Hashable, Iterable
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру кэш с временем жизни записей.
+
+    При переполнении вытесняется давно не использовавшаяся запись (LRU),
+    просроченные записи удаляются при обращении. Если задана функция groups,
+    ключи индексируются по группам, и discard_group удаляет группу без
+    просмотра всего кэша.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, groups: Callable[[Hashable], Iterable[Hashable]] | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._groups_of = groups
+        self._groups: dict[Hashable, set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _index(self, key: Hashable) -> None:
+        if self._groups_of is not None:
+            for group in self._groups_of(key):
+                self._groups.setdefault(group, set()).add(key)
+
+    def _unindex(self, key: Hashable) -> None:
+        if self._groups_of is not None:
+            for group in self._groups_of(key):
+                members = self._groups.get(group)
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del self._groups[group]
+
+    def _delete(self, key: Hashable) -> None:
+        del self._data[key]
+        self._unindex(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._delete(key)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if key not in self._data:
+            self._index(key)
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            evicted, _ = self._data.popitem(last=False)
+            self._unindex(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self._unindex(key)
+        return entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._groups.clear()
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Удалить записи, ключи которых удовлетворяют predicate; возвращает их число."""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            self._delete(key)
+        return len(keys)
+
+    def discard_group(self, group: Hashable) -> int:
+        """Удалить записи группы (см. groups); стоит O(размер группы)."""
+        keys = list(self._groups.get(group, ()))
+        for key in keys:
+            self._delete(key)
+        return len(keys)
+
+
+def _read_cache_groups(key: tuple) -> tuple[tuple, ...]:
+    # (вид,) — все записи вида; (вид, ident) — записи одной сущности
+    return ((key[0],), (key[0], key[1])) if len(key) > 1 else ((key[0],),)
+
+
+class ReadCache:
+    """
+    Кэш сериализованных ответов на чтение с инвалидацией по уведомлениям об изменениях.
+
+    Ключ — кортеж, первый элемент которого задаёт вид записи ("organization",
+    "organizations", ...). Кэш работает только при включённой доставке
+    уведомлений (enabled), поэтому TTL может быть длинным. Результат чтения,
+    начатого до последней инвалидации или в течение settle секунд после неё,
+    не сохраняется: он мог прочитать ещё не изменённые данные (в том числе
+    с отстающей реплики).
+    """
+
+    def __init__(self, max_entries: int, ttl: float, settle: float):
+        self._entries = TTLCache(max_entries=max_entries, ttl=ttl, groups=_read_cache_groups)
+        self.settle = settle
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self._quiet_until = 0.0
+
+    def get(self, key: tuple) -> Any:
+        if not self.enabled:
+            return None
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: tuple, value: Any, started_at: float) -> None:
+        if self.enabled and started_at >= self._quiet_until:
+            self._entries.set(key, value)
+
+    def invalidate(self, kinds: Collection[str], ident: int | None = None) -> int:
+        """
+        Удалить записи заданных видов; с ident — только записи вида (kind, ident).
+
+        Записи проиндексированы по виду и сущности, поэтому инвалидация не
+        просматривает весь кэш, а повторная — по уже пустой группе — почти бесплатна.
+        """
+        self._quiet_until = time.monotonic() + self.settle
+        if ident is None:
+            return sum(self._entries.discard_group((kind,)) for kind in kinds)
+        return sum(self._entries.discard_group((kind, ident)) for kind in kinds)
+
+    def clear(self) -> None:
+        self._quiet_until = time.monotonic() + self.settle
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
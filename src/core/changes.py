@@ -0,0 +1,232 @@
+# changes.py
+import asyncio
+import json
+import logging
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Канал pg_notify, в который триггеры публикуют изменения справочника
+CHANGES_CHANNEL = "directory_changes"
+WATCHED_TABLES = ("organizations", "buildings", "activities", "phones", "organization_activity")
+
+# Строк в одном уведомлении: полезная нагрузка pg_notify ограничена 8000 байт
+NOTIFY_CHUNK_ROWS = 40
+
+# Строка изменения: [id, organization_id, activity_id, building_id, old_building_id, updated_at]
+CHANGE_ROW_FUNCTION = """
+CREATE OR REPLACE FUNCTION directory_change_row(row_data jsonb, old_building_id jsonb) RETURNS jsonb AS $$
+    SELECT jsonb_build_array(
+        row_data->'id', row_data->'organization_id', row_data->'activity_id',
+        row_data->'building_id', old_building_id, row_data->'updated_at'
+    )
+$$ LANGUAGE sql IMMUTABLE
+"""
+
+# Триггер уровня оператора: один вызов на INSERT/UPDATE/DELETE, строки — из
+# переходных таблиц, по NOTIFY_CHUNK_ROWS строк на уведомление. Ветки с
+# new_rows/old_rows планируются только при выполнении (как в read_model).
+NOTIFY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION notify_directory_changes() RETURNS trigger AS $$
+DECLARE
+    changed jsonb;
+    chunk text;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT jsonb_agg(directory_change_row(to_jsonb(n), NULL)) INTO changed FROM new_rows n;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT jsonb_agg(directory_change_row(to_jsonb(o), NULL)) INTO changed FROM old_rows o;
+    ELSE
+        SELECT jsonb_agg(directory_change_row(to_jsonb(n), to_jsonb(o)->'building_id')) INTO changed
+        FROM new_rows n LEFT JOIN old_rows o ON to_jsonb(o)->'id' = to_jsonb(n)->'id';
+    END IF;
+    IF changed IS NULL THEN
+        RETURN NULL;
+    END IF;
+    FOR chunk IN
+        SELECT json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'rows', jsonb_agg(item ORDER BY ord))::text
+        FROM jsonb_array_elements(changed) WITH ORDINALITY AS t(item, ord)
+        GROUP BY (ord - 1) / {NOTIFY_CHUNK_ROWS}
+    LOOP
+        PERFORM pg_notify('{CHANGES_CHANNEL}', chunk);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+NOTIFY_TRIGGERS = (
+    ("INSERT", "NEW TABLE AS new_rows"),
+    ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("DELETE", "OLD TABLE AS old_rows"),
+)
+
+
+class Change:
+    """Изменение строки справочника из уведомления триггера."""
+
+    __slots__ = ("table", "op", "id", "organization_id", "activity_id", "building_id", "old_building_id",
+                 "updated_at")
+
+    def __init__(self, table: str, op: str, id: int | None = None, organization_id: int | None = None,
+                 activity_id: int | None = None, building_id: int | None = None,
+                 old_building_id: int | None = None, updated_at: str | None = None):
+        self.table = table
+        self.op = op
+        self.id = id
+        self.organization_id = organization_id
+        self.activity_id = activity_id
+        self.building_id = building_id
+        self.old_building_id = old_building_id
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_payload(cls, payload: str) -> list["Change"]:
+        """
+        Изменения из уведомления: {"table", "op", "rows": [[id, organization_id, ...], ...]}.
+
+        Уведомление старого построчного триггера (поля строки на верхнем уровне)
+        тоже принимается: при раскатке миграция могла ещё не выполниться.
+        """
+        data = json.loads(payload)
+        if "rows" not in data:
+            return [cls(**{name: data.get(name) for name in cls.__slots__})]
+        return [cls(data["table"], data["op"], *row) for row in data["rows"]]
+
+    def __repr__(self) -> str:
+        return f"Change({self.op} {self.table} id={self.id} organization_id={self.organization_id})"
+
+
+async def install_change_triggers(conn: AsyncConnection) -> None:
+    """
+    Создать функции уведомлений и триггеры на таблицах справочника (идемпотентно).
+
+    Триггеры уровня оператора: запись многих строк одним запросом (например,
+    замена телефонов организации) даёт одно уведомление на NOTIFY_CHUNK_ROWS
+    строк, а не на каждую строку. Воркеры стартуют одновременно, поэтому DDL
+    выполняется под транзакционной advisory-блокировкой.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('notify_directory_change'))"))
+    await conn.execute(text(CHANGE_ROW_FUNCTION))
+    await conn.execute(text(NOTIFY_FUNCTION))
+    for table in WATCHED_TABLES:
+        # Построчный триггер прежней версии
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table}"))
+        for event, referencing in NOTIFY_TRIGGERS:
+            trigger = f"{table}_notify_{event.lower()}"
+            await conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger} ON {table}"))
+            await conn.execute(text(
+                f"CREATE TRIGGER {trigger} AFTER {event} ON {table} REFERENCING {referencing} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION notify_directory_changes()"
+            ))
+    await conn.execute(text("DROP FUNCTION IF EXISTS notify_directory_change()"))
+
+
+class ChangeBus:
+    """
+    Рассылка изменений справочника подписчикам внутри воркера.
+
+    Подписчик получает Change на каждое уведомление или None, если уведомления
+    могли быть потеряны (разрыв соединения слушателя) и состояние нужно сбросить целиком.
+    """
+
+    def __init__(self):
+        self._subscribers: list[Callable[[Change | None], None]] = []
+        self.received = 0
+
+    def subscribe(self, callback: Callable[[Change | None], None]) -> None:
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Change | None], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, change: Change | None) -> None:
+        if change is not None:
+            self.received += 1
+        for callback in list(self._subscribers):
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика изменения {change!r}: {e}")
+
+
+class ChangeListener:
+    """
+    Фоновая задача воркера: LISTEN на канале изменений через отдельное соединение asyncpg.
+
+    Соединение не берётся из пула, чтобы не занимать слот на всё время жизни
+    воркера. После разрыва слушатель переподключается и публикует None:
+    уведомления за время разрыва потеряны.
+    """
+
+    def __init__(self, url: str, bus: ChangeBus, reconnect_delay: float):
+        self.url = url
+        self.bus = bus
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._task: asyncio.Task | None = None
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            changes = Change.from_payload(payload)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Некорректное уведомление об изменении {payload!r}: {e}")
+            return
+        logger.debug(f"Получены изменения справочника: {changes!r}")
+        for change in changes:
+            self.bus.publish(change)
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self.url)
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        try:
+            await connection.add_listener(CHANGES_CHANNEL, self._on_notification)
+            self.connected = True
+            logger.info(f"Подписка на канал {CHANGES_CHANNEL} установлена")
+            # Всё, что закэшировано до подписки, могло пропустить изменения
+            self.bus.publish(None)
+            await closed.wait()
+        finally:
+            self.connected = False
+            if not connection.is_closed():
+                await connection.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+                logger.warning(f"Соединение слушателя {CHANGES_CHANNEL} закрыто")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Ошибка слушателя {CHANGES_CHANNEL}: {e!r}")
+            self.bus.publish(None)
+            await asyncio.sleep(self.reconnect_delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"connected": self.connected, "received": self.bus.received}
+
+
+change_bus = ChangeBus()
+change_listener = ChangeListener(settings.DATABASE_URL, change_bus, settings.CHANGE_LISTENER_RECONNECT_DELAY)
@@ -20,6 +20,107 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = Field(10, description="Максимальное переполнение пула")
     DB_POOL_RECYCLE: int = Field(3600, description="Время пересоздания соединения (сек)")
     DB_POOL_TIMEOUT: int = Field(30, description="Таймаут пула (сек)")
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(
+        500, description="Размер кэша подготовленных выражений asyncpg на соединение (0 — выкл.)"
+    )
+    DB_MIGRATE_ON_STARTUP: bool = Field(
+        False,
+        description="Выполнять миграции при старте воркера; иначе только проверка версии (python -m src.core.migrations)"
+    )
+    DB_WARMUP_ENABLED: bool = Field(
+        True, description="Прогрев пула при старте: открыть DB_POOL_SIZE соединений и подготовить горячие запросы"
+    )
+
+    # Statement timeouts
+    DB_STATEMENT_TIMEOUT: int = Field(
+        30000, description="statement_timeout соединений по умолчанию (мс, 0 — без ограничения)"
+    )
+    DB_ROUTE_STATEMENT_TIMEOUTS: str = Field(
+        "/search/=5000",
+        description="statement_timeout по префиксу пути через запятую: /prefix=мс (побеждает самый длинный префикс)"
+    )
+    DB_CANCEL_ON_DISCONNECT: bool = Field(
+        True, description="Отменять обработку запроса и запрос к БД, если клиент отключился до ответа"
+    )
+
+    # Read replica settings
+    DB_REPLICA_HOSTS: str = Field(
+        "", description="Хосты реплик для чтения через запятую (host или host:port), пусто — без реплик"
+    )
+    DB_REPLICA_HEALTH_INTERVAL: float = Field(5.0, description="Интервал проверки здоровья реплик (сек)")
+    DB_READ_YOUR_WRITES_WINDOW: float = Field(
+        2.0, description="Окно после записи, в течение которого чтения клиента идут в primary (сек, 0 — выкл.)"
+    )
+
+    # Health & admission control settings
+    DB_HEALTH_TIMEOUT: float = Field(2.0, description="Таймаут проверки БД в readiness-пробе (сек)")
+    DB_POOL_MAX_WAITERS: int = Field(50, description="Максимальная очередь ожидания соединения до отказа 503")
+    DB_POOL_ADMISSION_TIMEOUT: float = Field(
+        5.0, description="Максимальное ожидание свободного соединения перед отказом 503 (сек)"
+    )
+
+    # Read model
+    READ_MODEL_ENABLED: bool = Field(
+        False,
+        description="Читать организации из модели чтения organization_documents (один запрос на страницу)"
+    )
+
+    # Write batching (group commit)
+    WRITE_BATCHING_ENABLED: bool = Field(
+        False, description="Объединять одновременные записи организаций в одну транзакцию (group commit)"
+    )
+    WRITE_BATCH_WINDOW: float = Field(0.005, description="Окно накопления записей в группу (сек)")
+    WRITE_BATCH_MAX_SIZE: int = Field(100, description="Максимум записей в одной транзакции группы")
+
+    # Directory snapshot settings
+    SNAPSHOT_ENABLED: bool = Field(False, description="Обслуживать поиск и деревья из mmap-снимка справочника")
+    SNAPSHOT_PATH: str = Field("data/directory.snapshot", description="Путь к файлу снимка, общему для воркеров хоста")
+    SNAPSHOT_CHECK_INTERVAL: float = Field(1.0, description="Как часто воркер проверяет замену файла снимка (сек)")
+    SNAPSHOT_REBUILD_DELAY: float = Field(0.5, description="Задержка перестроения снимка после записи (сек)")
+
+    READ_ONLY_MODE: bool = Field(
+        False, description="Режим без БД: GET и поиск обслуживаются из локального снимка, запись отключена"
+    )
+
+    # Change notifications & read cache settings
+    CHANGE_NOTIFICATIONS_ENABLED: bool = Field(
+        True, description="Триггеры NOTIFY на таблицах справочника и слушатель изменений в каждом воркере"
+    )
+    CHANGE_LISTENER_RECONNECT_DELAY: float = Field(1.0, description="Пауза перед переподключением слушателя (сек)")
+    READ_CACHE_TTL: int = Field(60 * 60, description="Время жизни закэшированного ответа на чтение (сек)")
+    READ_CACHE_MAX_ENTRIES: int = Field(10000, description="Максимальное число закэшированных ответов на чтение")
+
+    # Server-sent events settings
+    EVENTS_QUEUE_SIZE: int = Field(100, description="Очередь событий подписчика; при переполнении отправляется resync")
+    EVENTS_MAX_SUBSCRIBERS: int = Field(1000, description="Максимальное число подписчиков потока изменений на воркер")
+    EVENTS_KEEPALIVE_INTERVAL: float = Field(15.0, description="Интервал keepalive-комментариев в потоке (сек)")
+    EVENTS_BATCH_DELAY: float = Field(0.05, description="Окно объединения изменений перед рассылкой (сек)")
+
+    # Idempotency settings
+    IDEMPOTENCY_TTL: int = Field(24 * 60 * 60, description="Время хранения ответа по Idempotency-Key (сек)")
+    IDEMPOTENCY_MAX_ENTRIES: int = Field(10000, description="Максимальное число хранимых ответов по Idempotency-Key")
+
+    # SQL instrumentation
+    SQL_STATEMENTS_HEADER: bool = Field(
+        False,
+        description="Отдавать число SQL-запросов HTTP-запроса в заголовке X-SQL-Statements"
+    )
+    SQL_STATEMENTS_WARN_THRESHOLD: int = Field(
+        50, description="Предупреждение в лог, если запрос выполнил больше SQL-запросов (0 — выключено)"
+    )
+
+    # Profiling
+    PROFILING_ADMIN_KEY: str = Field(
+        "", description="Ключ администратора для профилирования запроса по заголовку X-Profile (пусто — выключено)"
+    )
+    PROFILING_SAMPLE_RATE: float = Field(0.0, description="Доля случайно профилируемых запросов (0 — выключено)")
+    PROFILING_INTERVAL: float = Field(0.005, description="Интервал сэмплирования стека (сек процессорного времени)")
+    PROFILING_DIR: str = Field("data/profiles", description="Каталог для профилей в folded-формате")
+    PROFILING_MAX_FILES: int = Field(200, description="Сколько последних профилей хранить в каталоге")
+
+    @property
+    def PROFILING_ENABLED(self) -> bool:
+        return bool(self.PROFILING_ADMIN_KEY) or self.PROFILING_SAMPLE_RATE > 0
 
     # Logging settings
     DEBUG: bool = Field(False, description="Режим отладки (DEBUG=True → уровень DEBUG, иначе INFO)")
@@ -34,6 +135,23 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def ROUTE_STATEMENT_TIMEOUTS(self) -> list[tuple[str, int]]:
+        routes = []
+        for item in filter(None, (i.strip() for i in self.DB_ROUTE_STATEMENT_TIMEOUTS.split(","))):
+            prefix, _, timeout = item.partition("=")
+            routes.append((prefix.strip(), int(timeout)))
+        return sorted(routes, key=lambda route: len(route[0]), reverse=True)
+
+    @property
+    def REPLICA_URLS(self) -> list[str]:
+        urls = []
+        for host in filter(None, (h.strip() for h in self.DB_REPLICA_HOSTS.split(","))):
+            if ":" not in host:
+                host = f"{host}:{self.DB_PORT}"
+            urls.append(f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{host}/{self.DB_NAME}")
+        return urls
+
     class Config:
         env_file = ".env"
 
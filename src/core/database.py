@@ -1,51 +1,86 @@
 # database.py
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import QueuePool
-from sqlalchemy.ext.asyncio import async_scoped_session
-from asyncio import current_task
+import asyncio
+
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.core.admission import pool_admission
 from src.core.config import settings
+from src.core.instrumentation import instrument_engine
 
-ASYNC_DATABASE_URL = str(settings.DATABASE_URL).replace(
-    "postgresql://", "postgresql+asyncpg://"
-)
-
-async_engine = create_async_engine(
-    ASYNC_DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_recycle=settings.DB_POOL_RECYCLE,
-    pool_timeout=settings.DB_POOL_TIMEOUT,
-    echo=settings.DEBUG,
-    connect_args={
-        "ssl": "require" if getattr(settings, 'PRODUCTION', False) else None
-    }
-)
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False
-)
+def to_async_url(url: str) -> str:
+    """Перевести URL PostgreSQL на драйвер asyncpg."""
+    return str(url).replace("postgresql://", "postgresql+asyncpg://")
+
+
+def _engine_url(url: str):
+    return make_url(to_async_url(url)).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_PREPARED_STATEMENT_CACHE_SIZE)}
+    )
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """
+    Создать асинхронный движок с общими настройками пула.
+
+    Время жизни соединения задаёт DB_POOL_RECYCLE: вместе с ним сбрасывается
+    и кэш подготовленных выражений соединения. statement_timeout по умолчанию
+    задаётся при подключении и не стоит отдельного запроса. Запросы движка
+    учитываются счётчиком count_statements.
+    """
+    engine = create_async_engine(
+        _engine_url(url),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        echo=settings.DEBUG,
+        connect_args={
+            "ssl": "require" if getattr(settings, 'PRODUCTION', False) else None,
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT)}
+        }
+    )
+    instrument_engine(engine)
+    return engine
+
+
+def build_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False
+    )
+
+
+ASYNC_DATABASE_URL = to_async_url(settings.DATABASE_URL)
+
+async_engine = build_engine(settings.DATABASE_URL)
 
-AsyncScopedSession = async_scoped_session(
-    AsyncSessionLocal,
-    scopefunc=current_task
-)
+AsyncSessionLocal = build_sessionmaker(async_engine)
 
 
-async def get_session() -> AsyncSession:
+def pool_status() -> dict:
+    """Текущее состояние пула соединений и очереди допуска."""
+    pool = async_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "admission": pool_admission.stats(),
+    }
+
+
+async def check_database(timeout: float = settings.DB_HEALTH_TIMEOUT, engine: AsyncEngine = async_engine) -> bool:
     """
-    Асинхронная сессия БД для FastAPI через Depends.
-    Использует scoped session для автоматического управления жизненным циклом.
+    Проверить доступность БД запросом SELECT 1 с ограничением по времени.
     """
-    session = AsyncScopedSession()
-    try:
-        yield session
-        await session.commit()
-    except Exception:
-        await session.rollback()
-        raise
-    finally:
-        await session.close()
\ No newline at end of file
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.wait_for(ping(), timeout=timeout)
+    return True
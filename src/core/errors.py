@@ -0,0 +1,46 @@
+# errors.py
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+NOT_NULL_VIOLATION = "23502"
+CHECK_VIOLATION = "23514"
+QUERY_CANCELED = "57014"
+
+
+def sqlstate(error: Exception) -> str | None:
+    """SQLSTATE исходной ошибки драйвера, если она есть."""
+    orig = getattr(error, "orig", None)
+    return getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+
+
+def integrity_error_to_http(error: IntegrityError) -> HTTPException:
+    """
+    Перевести нарушение ограничения БД в ответ клиенту.
+
+    Конфликт уникальности — 409, ссылка на несуществующую запись и прочие
+    нарушения ограничений — 400.
+    """
+    code = sqlstate(error)
+    logger.warning(f"Нарушение ограничения БД (SQLSTATE {code}): {error.orig}")
+    if code == UNIQUE_VIOLATION:
+        return HTTPException(status_code=409, detail="Запись с такими данными уже существует")
+    if code == FOREIGN_KEY_VIOLATION:
+        return HTTPException(status_code=400, detail="Ссылка на несуществующую запись")
+    return HTTPException(status_code=400, detail="Данные нарушают ограничения целостности")
+
+
+def is_statement_timeout(error: Exception) -> bool:
+    """Запрос прерван сервером по statement_timeout."""
+    return isinstance(error, DBAPIError) and sqlstate(error) == QUERY_CANCELED
+
+
+def statement_timeout_to_http(error: DBAPIError) -> HTTPException:
+    """Запрос к БД не уложился в statement_timeout маршрута — 504, а не 500."""
+    logger.warning(f"Запрос к БД прерван по statement_timeout: {error.orig}")
+    return HTTPException(status_code=504, detail="Превышено время выполнения запроса")
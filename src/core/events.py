@@ -0,0 +1,234 @@
+# events.py
+import asyncio
+import logging
+
+from src.core.changes import Change
+from src.core.config import settings
+from src.core.serialization import dumps
+from src.core.session import session_scope
+from src.crud.buildings import building_coordinates
+from src.crud.organizations import organization_locations
+
+logger = logging.getLogger(__name__)
+
+# Маркер в очереди подписчика: часть событий потеряна, клиенту нужно перечитать данные
+RESYNC = object()
+
+ORGANIZATION_TABLES = {"organizations", "phones", "organization_activity"}
+ENTITY_TYPES = {"buildings": "building", "activities": "activity"}
+
+
+class DirectoryEvent:
+    """
+    Событие для клиентов: сущность, ID, операция и updated_at.
+
+    building_ids, activity_ids и points используются только для фильтрации
+    подписок и клиенту не отправляются.
+    """
+
+    def __init__(self, type: str, id: int, op: str, updated_at: str | None = None):
+        self.type = type
+        self.id = id
+        self.op = op
+        self.updated_at = updated_at
+        self.building_ids: set[int] = set()
+        self.activity_ids: set[int] = set()
+        self.points: list[tuple[float, float]] = []
+
+    @classmethod
+    def from_change(cls, change: Change) -> "DirectoryEvent":
+        op = change.op.lower()
+        if change.table in ORGANIZATION_TABLES:
+            if change.table != "organizations":
+                # Телефоны и связи — часть документа организации
+                event = cls("organization", change.organization_id, "update", change.updated_at)
+            else:
+                event = cls("organization", change.id, op, change.updated_at)
+            event.building_ids.update(filter(None, (change.building_id, change.old_building_id)))
+            if change.activity_id is not None:
+                event.activity_ids.add(change.activity_id)
+            return event
+        event = cls(ENTITY_TYPES[change.table], change.id, op, change.updated_at)
+        if change.table == "buildings":
+            event.building_ids.add(change.id)
+        elif change.table == "activities":
+            event.activity_ids.add(change.id)
+        return event
+
+    def merge(self, other: "DirectoryEvent") -> None:
+        """Объединить с более поздним изменением той же сущности."""
+        if other.op == "delete" or self.op != "insert":
+            self.op = other.op
+        self.updated_at = max(filter(None, (self.updated_at, other.updated_at)), default=None)
+        self.building_ids |= other.building_ids
+        self.activity_ids |= other.activity_ids
+
+    def encode(self) -> bytes:
+        data = dumps({"type": self.type, "id": self.id, "op": self.op, "updated_at": self.updated_at})
+        return b"event: change\ndata: " + data + b"\n\n"
+
+
+class EventFilter:
+    """Фильтр подписки: здание, вид деятельности и/или прямоугольная область."""
+
+    def __init__(
+            self,
+            building_id: int | None = None,
+            activity_id: int | None = None,
+            bbox: tuple[float, float, float, float] | None = None
+    ):
+        self.building_id = building_id
+        self.activity_id = activity_id
+        self.bbox = bbox
+
+    @property
+    def active(self) -> bool:
+        return self.building_id is not None or self.activity_id is not None or self.bbox is not None
+
+    def matches(self, event: DirectoryEvent) -> bool:
+        if self.building_id is not None and self.building_id not in event.building_ids:
+            return False
+        if self.activity_id is not None and self.activity_id not in event.activity_ids:
+            return False
+        if self.bbox is not None:
+            min_lat, max_lat, min_lng, max_lng = self.bbox
+            return any(min_lat <= lat <= max_lat and min_lng <= lon <= max_lng for lat, lon in event.points)
+        return True
+
+
+class Subscription:
+    """
+    Ограниченная очередь событий одного клиента.
+
+    Медленный клиент не задерживает остальных и не копит память: при
+    переполнении очередь очищается и в неё кладётся RESYNC.
+    """
+
+    def __init__(self, event_filter: EventFilter, queue_size: int):
+        self.filter = event_filter
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def push(self, item) -> None:
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(RESYNC)
+            return
+        self.queue.put_nowait(item)
+
+
+class EventHub:
+    """
+    Раздача изменений справочника подписчикам SSE.
+
+    Изменения с шины копятся batch_delay секунд: изменения одной сущности
+    объединяются, а здания, координаты и виды деятельности для фильтров
+    загружаются одним запросом на пачку. Без подписчиков изменения не обрабатываются.
+    """
+
+    def __init__(self, queue_size: int, max_subscribers: int, batch_delay: float):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.batch_delay = batch_delay
+        self._subscriptions: set[Subscription] = set()
+        self._pending: dict[tuple[str, int], DirectoryEvent] = {}
+        self._flush_task: asyncio.Task | None = None
+        self.published = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscriptions) >= self.max_subscribers
+
+    def subscribe(self, event_filter: EventFilter) -> Subscription:
+        subscription = Subscription(event_filter, self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        if subscription.dropped:
+            logger.info(f"Подписчик SSE отключён, пропущено событий из-за переполнения: {subscription.dropped}")
+
+    def on_change(self, change: Change | None) -> None:
+        """Подписчик шины изменений."""
+        if not self._subscriptions:
+            return
+        if change is None:
+            # Уведомления могли быть потеряны — клиенты перечитывают данные
+            for subscription in self._subscriptions:
+                subscription.push(RESYNC)
+            return
+        if change.id is None and change.organization_id is None:
+            return
+
+        event = DirectoryEvent.from_change(change)
+        key = (event.type, event.id)
+        if key in self._pending:
+            self._pending[key].merge(event)
+        else:
+            self._pending[key] = event
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        # Изменения, пришедшие во время загрузки, уходят следующей пачкой
+        while self._pending:
+            await asyncio.sleep(self.batch_delay)
+            events, self._pending = list(self._pending.values()), {}
+            try:
+                await self._locate(events)
+            except Exception as e:
+                # Без данных для фильтров событие всё равно доставляется подписчикам без фильтров
+                logger.error(f"Не удалось загрузить данные для фильтрации событий: {e}")
+            self.publish(events)
+
+    async def _locate(self, events: list[DirectoryEvent]) -> None:
+        """Дополнить события зданиями, координатами и видами деятельности для фильтров."""
+        if not any(subscription.filter.active for subscription in self._subscriptions):
+            return
+        org_ids = [event.id for event in events if event.type == "organization" and event.op != "delete"]
+        async with session_scope(read_only=True, use_primary=True) as session:
+            organizations = await organization_locations(session, org_ids)
+            for event in events:
+                if event.type == "organization" and event.id in organizations:
+                    building_id, activity_ids = organizations[event.id]
+                    event.building_ids.add(building_id)
+                    event.activity_ids.update(activity_ids)
+            building_ids = {building_id for event in events for building_id in event.building_ids}
+            coordinates = await building_coordinates(session, list(building_ids))
+        for event in events:
+            event.points.extend(
+                coordinates[building_id] for building_id in event.building_ids if building_id in coordinates
+            )
+
+    def publish(self, events: list[DirectoryEvent]) -> None:
+        for event in events:
+            data = event.encode()
+            self.published += 1
+            for subscription in self._subscriptions:
+                if subscription.filter.matches(event):
+                    subscription.push(data)
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "dropped": sum(subscription.dropped for subscription in self._subscriptions),
+        }
+
+
+event_hub = EventHub(
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    max_subscribers=settings.EVENTS_MAX_SUBSCRIBERS,
+    batch_delay=settings.EVENTS_BATCH_DELAY
+)
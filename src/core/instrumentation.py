@@ -0,0 +1,55 @@
+# instrumentation.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class StatementStats:
+    """Число SQL-запросов, выполненных в контексте (и их текст, если capture=True)."""
+
+    def __init__(self, capture: bool = False):
+        self.count = 0
+        self.capture = capture
+        self.statements: list[str] = []
+
+
+_current: ContextVar[StatementStats | None] = ContextVar("statement_stats", default=None)
+
+
+@contextmanager
+def count_statements(capture: bool = False) -> Iterator[StatementStats]:
+    """
+    Считать SQL-запросы, выполненные в текущем контексте.
+
+    Задачи asyncio, созданные внутри блока (в том числе общие выполнения
+    coalesced_read), наследуют контекст и попадают в тот же счётчик.
+    Вложенный счётчик при выходе добавляет свои запросы во внешний.
+    """
+    parent = _current.get()
+    stats = StatementStats(capture or (parent is not None and parent.capture))
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.count += stats.count
+            if parent.capture:
+                parent.statements.extend(stats.statements)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        if stats.capture:
+            stats.statements.append(statement)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключить подсчёт запросов к движку; вне count_statements стоит одного ContextVar.get."""
+    if not event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
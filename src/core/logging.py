@@ -7,7 +7,6 @@ from src.core.config import settings
 
 
 LOG_DIR = Path.cwd() / "logs"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 
 class LevelFileHandler(logging.Handler):
@@ -39,7 +38,8 @@ class LevelFileHandler(logging.Handler):
 
 
 def setup_logging():
-    """Настройка логирования из settings (.env)."""
+    """Настройка логирования из settings (.env); каталог логов создаётся здесь, а не при импорте."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
     numeric_level = getattr(logging, settings.LOG_LEVEL, logging.INFO)
 
     root_logger = logging.getLogger()
@@ -0,0 +1,137 @@
+# migrations.py
+"""
+Версионированные миграции схемы БД.
+
+Миграции выполняются один раз на выкладку командой
+
+    python -m src.core.migrations
+
+(или при старте воркера, если DB_MIGRATE_ON_STARTUP=True). Воркеры при
+старте только сверяют версию схемы одним запросом, без интроспекции
+каталога и без DDL.
+
+Применённые миграции записываются в таблицу schema_version. Новую миграцию
+добавляют в конец MIGRATIONS со следующим номером; её нужно писать
+совместимой со старым кодом, так как при раскатке воркеры обеих версий
+работают одновременно.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.core.changes import install_change_triggers
+from src.core.database import async_engine
+from src.core.read_model import install_read_model, install_refresh_function
+from src.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+class Migration:
+    def __init__(self, version: int, description: str, apply: Callable[[AsyncConnection], Awaitable[None]]):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+class SchemaVersionError(RuntimeError):
+    """Схема БД старее, чем требует код: миграции не выполнены."""
+
+
+async def _create_tables(conn: AsyncConnection) -> None:
+    # checkfirst: в существующих БД таблицы уже созданы прежним create_all при старте
+    await conn.run_sync(Base.metadata.create_all)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "Таблицы справочника", _create_tables),
+    Migration(2, "Триггеры уведомлений об изменениях", install_change_triggers),
+    Migration(3, "Модель чтения organization_documents", install_read_model),
+    Migration(4, "Уведомления об изменениях триггерами уровня оператора", install_change_triggers),
+    Migration(5, "Блокировка организаций при пересборке документов", install_refresh_function),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version integer PRIMARY KEY,
+    description text NOT NULL,
+    applied_at timestamptz NOT NULL DEFAULT now()
+)
+"""
+
+
+async def current_version(conn: AsyncConnection) -> int:
+    result = await conn.execute(text("SELECT coalesce(max(version), 0) FROM schema_version"))
+    return result.scalar_one()
+
+
+async def migrate(engine: AsyncEngine) -> list[int]:
+    """
+    Применить недостающие миграции в одной транзакции.
+
+    Одновременные вызовы (несколько воркеров с DB_MIGRATE_ON_STARTUP)
+    выстраиваются на advisory-блокировке: второй увидит уже обновлённую версию.
+    Возвращает номера применённых миграций.
+    """
+    applied = []
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_version'))"))
+        # Заполнение новых таблиц может идти дольше statement_timeout запросов API
+        await conn.execute(text("SET LOCAL statement_timeout = 0"))
+        await conn.execute(text(SCHEMA_VERSION_TABLE))
+        version = await current_version(conn)
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            logger.info(f"Миграция {migration.version}: {migration.description}")
+            await migration.apply(conn)
+            await conn.execute(
+                text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                {"version": migration.version, "description": migration.description}
+            )
+            applied.append(migration.version)
+    return applied
+
+
+async def check_schema(engine: AsyncEngine) -> int:
+    """
+    Быстрая проверка при старте воркера: один запрос версии схемы.
+
+    Более новая схема допустима (раскатка: старый воркер после миграции новой
+    версии), более старая — SchemaVersionError.
+    """
+    async with engine.connect() as conn:
+        try:
+            version = await current_version(conn)
+        except ProgrammingError:
+            # Таблицы schema_version ещё нет: миграции ни разу не выполнялись
+            version = 0
+    if version < SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Схема БД версии {version}, требуется {SCHEMA_VERSION}: выполните python -m src.core.migrations"
+        )
+    if version > SCHEMA_VERSION:
+        logger.warning(f"Схема БД версии {version} новее кода ({SCHEMA_VERSION})")
+    return version
+
+
+async def main() -> None:
+    try:
+        applied = await migrate(async_engine)
+    finally:
+        await async_engine.dispose()
+    if applied:
+        print(f"Применены миграции: {', '.join(map(str, applied))}; версия схемы {SCHEMA_VERSION}")
+    else:
+        print(f"Схема актуальна, версия {SCHEMA_VERSION}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+# profiling.py
+import logging
+import os
+import signal
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterator
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _label(code) -> str:
+    # ';' разделяет кадры в folded-формате, поэтому в имени его быть не должно
+    filename = os.path.relpath(code.co_filename) if code.co_filename.startswith(os.getcwd()) else code.co_filename
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class Profile:
+    """Сэмплы стеков одного HTTP-запроса в folded-формате (стек -> число сэмплов)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def record(self, frame) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(_label(frame.f_code))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Формат flamegraph.pl / speedscope / inferno: `кадр;кадр;кадр число` на строку."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_active: ContextVar[Profile | None] = ContextVar("profile", default=None)
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик запросов по таймеру ITIMER_PROF.
+
+    Пока профилируется хотя бы один запрос, ядро каждые interval секунд
+    процессорного времени присылает SIGPROF. Обработчик выполняется в главном
+    потоке между инструкциями байткода — в контексте задачи, которая сейчас
+    работает, — поэтому сэмпл достаётся тому запросу, чья задача (или
+    порождённая ей задача) занимает процессор, даже при конкурентных запросах.
+    Учитывается только время Python (маршрутизация, валидация, гидратация ORM,
+    сериализация); ожидание БД в сэмплы не попадает.
+
+    Требует цикла событий в главном потоке (uvicorn) и POSIX-таймеров.
+    """
+
+    def __init__(self, interval: float, directory: str, max_files: int):
+        self.interval = interval
+        self.directory = directory
+        self.max_files = max_files
+        self.installed = False
+        self._running = 0
+        self.saved = 0
+
+    def install(self) -> bool:
+        """Установить обработчик SIGPROF; вызывается из главного потока при старте."""
+        if not hasattr(signal, "setitimer"):
+            logger.warning("Профилирование недоступно: нет POSIX-таймеров")
+            return False
+        if threading.current_thread() is not threading.main_thread():
+            logger.warning("Профилирование недоступно: цикл событий работает не в главном потоке")
+            return False
+        signal.signal(signal.SIGPROF, self._on_signal)
+        self.installed = True
+        return True
+
+    def _on_signal(self, signum, frame) -> None:
+        profile = _active.get()
+        if profile is not None:
+            profile.record(frame)
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[Profile]:
+        profile = Profile(name)
+        token = _active.set(profile)
+        self._running += 1
+        if self._running == 1:
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        try:
+            yield profile
+        finally:
+            self._running -= 1
+            if self._running == 0:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+            _active.reset(token)
+
+    def save(self, profile: Profile) -> str:
+        """Записать профиль в directory и удалить самые старые сверх max_files."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{profile.name}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profile.folded())
+        self.saved += 1
+
+        files = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".folded")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        return path
+
+    def stats(self) -> dict:
+        return {"installed": self.installed, "running": self._running, "saved": self.saved}
+
+
+profiler = SamplingProfiler(
+    interval=settings.PROFILING_INTERVAL,
+    directory=settings.PROFILING_DIR,
+    max_files=settings.PROFILING_MAX_FILES
+)
+
+
+def profile_name(method: str, path: str) -> str:
+    slug = "".join(ch if ch.isalnum() else "_" for ch in path.strip("/")) or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{method.lower()}-{slug[:60]}-{os.urandom(4).hex()}"
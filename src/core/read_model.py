@@ -0,0 +1,127 @@
+# read_model.py
+"""
+Модель чтения organization_documents.
+
+Для каждой организации хранится готовый JSON-документ в форме схемы
+Organization: чтение организации или страницы — один запрос по индексу
+без загрузки связей. Документы пересобирает функция
+refresh_organization_documents; её вызывают триггеры уровня оператора на
+таблицах справочника в той же транзакции, что и запись, поэтому модель
+чтения не отстаёт от данных.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.models.document import OrganizationDocument
+
+# Сначала блокируются строки организаций (в порядке ID, без взаимоблокировок):
+# иначе две транзакции, меняющие только телефоны или связи одной организации,
+# собирают документ каждая из своего снимка READ COMMITTED, и вторая затирает
+# изменение первой. После ожидания блокировки INSERT берёт новый снимок
+# (функция VOLATILE) и видит зафиксированные изменения соседней транзакции.
+REFRESH_FUNCTION = """
+CREATE OR REPLACE FUNCTION refresh_organization_documents(org_ids integer[]) RETURNS void AS $$
+    SELECT 1 FROM organizations WHERE id = ANY(org_ids) ORDER BY id FOR UPDATE;
+    INSERT INTO organization_documents (organization_id, document)
+    SELECT o.id, jsonb_build_object(
+        'id', o.id,
+        'name', o.name,
+        'building_id', o.building_id,
+        'building', jsonb_build_object(
+            'id', b.id, 'address', b.address, 'latitude', b.latitude, 'longitude', b.longitude
+        ),
+        'activities', coalesce((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', a.id, 'name', a.name, 'parent_id', a.parent_id, 'level', a.level
+            ) ORDER BY a.id)
+            FROM organization_activity oa JOIN activities a ON a.id = oa.activity_id
+            WHERE oa.organization_id = o.id
+        ), '[]'::jsonb),
+        'phones', coalesce((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', p.id, 'number', p.number, 'organization_id', p.organization_id
+            ) ORDER BY p.id)
+            FROM phones p
+            WHERE p.organization_id = o.id
+        ), '[]'::jsonb)
+    )
+    FROM organizations o JOIN buildings b ON b.id = o.building_id
+    WHERE o.id = ANY(org_ids)
+    ON CONFLICT (organization_id) DO UPDATE SET document = EXCLUDED.document
+$$ LANGUAGE sql
+"""
+
+# Ветки с new_rows/old_rows планируются только при выполнении, поэтому одна
+# функция обслуживает триггеры с разными переходными таблицами
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION organization_documents_on_change() RETURNS trigger AS $$
+DECLARE
+    org_ids integer[];
+BEGIN
+    IF TG_TABLE_NAME = 'organizations' THEN
+        SELECT array_agg(id) INTO org_ids FROM new_rows;
+    ELSIF TG_TABLE_NAME IN ('phones', 'organization_activity') THEN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(DISTINCT organization_id) INTO org_ids FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg(DISTINCT organization_id) INTO org_ids FROM old_rows;
+        ELSE
+            SELECT array_agg(organization_id) INTO org_ids FROM (
+                SELECT organization_id FROM new_rows UNION SELECT organization_id FROM old_rows
+            ) changed;
+        END IF;
+    ELSIF TG_TABLE_NAME = 'buildings' THEN
+        SELECT array_agg(o.id) INTO org_ids FROM organizations o JOIN new_rows n ON n.id = o.building_id;
+    ELSIF TG_TABLE_NAME = 'activities' THEN
+        SELECT array_agg(DISTINCT oa.organization_id) INTO org_ids
+        FROM organization_activity oa JOIN new_rows n ON n.id = oa.activity_id;
+    END IF;
+    IF org_ids IS NOT NULL THEN
+        PERFORM refresh_organization_documents(org_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# (таблица, событие, переходные таблицы). Удаление организации удаляет документ
+# каскадом; здания и виды деятельности со ссылками удалить нельзя.
+DOCUMENT_TRIGGERS = (
+    ("organizations", "INSERT", "NEW TABLE AS new_rows"),
+    ("organizations", "UPDATE", "NEW TABLE AS new_rows"),
+    ("phones", "INSERT", "NEW TABLE AS new_rows"),
+    ("phones", "UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("phones", "DELETE", "OLD TABLE AS old_rows"),
+    ("organization_activity", "INSERT", "NEW TABLE AS new_rows"),
+    ("organization_activity", "UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("organization_activity", "DELETE", "OLD TABLE AS old_rows"),
+    ("buildings", "UPDATE", "NEW TABLE AS new_rows"),
+    ("activities", "UPDATE", "NEW TABLE AS new_rows"),
+)
+
+REFRESH_ALL = "SELECT refresh_organization_documents(array_agg(id)) FROM organizations"
+
+
+async def install_read_model(conn: AsyncConnection) -> None:
+    """
+    Создать таблицу документов, функции и триггеры и заполнить документы.
+
+    Триггеры уровня оператора: пакетная запись (например, все телефоны
+    организации одним INSERT) пересобирает документ один раз, а не на каждую строку.
+    """
+    await conn.run_sync(lambda sync_conn: OrganizationDocument.__table__.create(sync_conn, checkfirst=True))
+    await conn.execute(text(REFRESH_FUNCTION))
+    await conn.execute(text(TRIGGER_FUNCTION))
+    for table, event, referencing in DOCUMENT_TRIGGERS:
+        trigger = f"{table}_document_{event.lower()}"
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger} ON {table}"))
+        await conn.execute(text(
+            f"CREATE TRIGGER {trigger} AFTER {event} ON {table} REFERENCING {referencing} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION organization_documents_on_change()"
+        ))
+    await conn.execute(text(REFRESH_ALL))
+
+
+async def install_refresh_function(conn: AsyncConnection) -> None:
+    """Обновить функцию пересборки документов в уже созданной модели чтения."""
+    await conn.execute(text(REFRESH_FUNCTION))
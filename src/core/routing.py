@@ -0,0 +1,124 @@
+# routing.py
+import asyncio
+import itertools
+import logging
+import time
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.core.config import settings
+from src.core.database import build_engine, build_sessionmaker, check_database
+
+logger = logging.getLogger(__name__)
+
+# Cookie, по которому чтения клиента сразу после записи направляются в primary
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+
+class ReplicaNode:
+    """Реплика для чтения: собственный движок, фабрика сессий и состояние здоровья."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine: AsyncEngine = build_engine(url)
+        self.sessionmaker: async_sessionmaker[AsyncSession] = build_sessionmaker(self.engine)
+        self.healthy = True
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaRouter:
+    """
+    Маршрутизация читающих сессий по репликам.
+
+    Реплики выбираются по кругу среди здоровых; упавшая реплика исключается
+    до следующей успешной проверки здоровья. Если здоровых реплик нет,
+    чтение уходит в primary.
+    """
+
+    def __init__(self, urls: list[str], health_interval: float):
+        self.nodes = [ReplicaNode(url) for url in urls]
+        self.health_interval = health_interval
+        self._cycle = itertools.cycle(self.nodes) if self.nodes else None
+        self._task: asyncio.Task | None = None
+
+    def choose(self) -> ReplicaNode | None:
+        """Следующая здоровая реплика по кругу или None."""
+        if self._cycle is None:
+            return None
+        for _ in range(len(self.nodes)):
+            node = next(self._cycle)
+            if node.healthy:
+                return node
+        return None
+
+    def mark_failed(self, node: ReplicaNode, error: Exception) -> None:
+        if node.healthy:
+            logger.warning(f"Реплика {node.name} исключена из ротации: {error!r}")
+        node.healthy = False
+        node.failures += 1
+
+    @staticmethod
+    def is_connection_error(error: Exception) -> bool:
+        if isinstance(error, (OSError, asyncio.TimeoutError)):
+            return True
+        return isinstance(error, DBAPIError) and error.connection_invalidated
+
+    async def check_health(self) -> None:
+        for node in self.nodes:
+            try:
+                await check_database(engine=node.engine)
+            except Exception as e:
+                self.mark_failed(node, e)
+            else:
+                if not node.healthy:
+                    logger.info(f"Реплика {node.name} возвращена в ротацию")
+                node.healthy = True
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def start(self) -> None:
+        if self.nodes and self._task is None:
+            self._task = asyncio.create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for node in self.nodes:
+            await node.engine.dispose()
+
+    def stats(self) -> list[dict]:
+        return [
+            {"replica": node.name, "healthy": node.healthy, "failures": node.failures}
+            for node in self.nodes
+        ]
+
+
+def primary_until() -> str:
+    """Значение cookie read-your-writes: момент, до которого чтения идут в primary."""
+    return f"{time.time() + settings.DB_READ_YOUR_WRITES_WINDOW:.3f}"
+
+
+def requires_primary(cookie: str | None) -> bool:
+    """Находится ли клиент в окне read-your-writes после своей записи."""
+    if not cookie:
+        return False
+    try:
+        return float(cookie) > time.time()
+    except ValueError:
+        return False
+
+
+replica_router = ReplicaRouter(settings.REPLICA_URLS, settings.DB_REPLICA_HEALTH_INTERVAL)
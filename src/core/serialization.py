@@ -0,0 +1,221 @@
+# serialization.py
+"""
+Быстрая сериализация ответов из доверенных строк БД.
+
+Данные, прочитанные из БД, уже соответствуют схемам, поэтому повторная
+валидация Pydantic через response_model не нужна: словари собираются
+напрямую из ORM-объектов и кодируются orjson (или json, если orjson не
+установлен). Схемы по-прежнему указываются в response_model для OpenAPI.
+
+Страницы организаций клиент может запросить заголовком Accept в компактной
+форме (COMPACT_JSON_TYPE, COMPACT_MSGPACK_TYPE при установленном msgpack):
+здания и виды деятельности выдаются один раз на ответ, организации ссылаются
+на них по ID.
+"""
+import json
+from typing import Any, Callable, Iterable
+
+from fastapi.responses import JSONResponse, Response
+
+from src.models.activity import Activity as ActivityModel
+from src.models.building import Building as BuildingModel
+from src.models.organization import Organization as OrganizationModel, OrganizationPhone as PhoneModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack необязателен
+    msgpack = None
+
+COMPACT_JSON_TYPE = "application/vnd.directory.compact+json"
+COMPACT_MSGPACK_TYPE = "application/vnd.directory.compact+msgpack"
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ без валидации содержимого, кодируемый orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """JSON-ответ из заранее сериализованных байтов."""
+    media_type = "application/json"
+
+
+def dump_building(building: BuildingModel) -> dict:
+    return {
+        "id": building.id,
+        "address": building.address,
+        "latitude": building.latitude,
+        "longitude": building.longitude,
+    }
+
+
+def dump_activity(activity: ActivityModel) -> dict:
+    return {
+        "id": activity.id,
+        "name": activity.name,
+        "parent_id": activity.parent_id,
+        "level": activity.level,
+    }
+
+
+def dump_phone(phone: PhoneModel) -> dict:
+    return {
+        "id": phone.id,
+        "number": phone.number,
+        "organization_id": phone.organization_id,
+    }
+
+
+def dump_organization(org: OrganizationModel) -> dict:
+    """Схема Organization; связи building, activities и phones должны быть загружены."""
+    return dump_written_organization(org, org.building, org.activities, org.phones)
+
+
+def dump_written_organization(org: Any, building: Any, activities: Iterable, phones: Iterable) -> dict:
+    """Схема Organization из отдельных частей: строк RETURNING после записи или загруженных связей."""
+    return {
+        "id": org.id,
+        "name": org.name,
+        "building_id": org.building_id,
+        "building": dump_building(building),
+        "activities": [dump_activity(activity) for activity in activities],
+        "phones": [dump_phone(phone) for phone in phones],
+    }
+
+
+def dump_page(total: int, page: int, size: int, items: Iterable, dump: Callable[[Any], dict]) -> dict:
+    """Схема PaginatedResponse."""
+    return {
+        "total": total,
+        "page": page,
+        "size": size,
+        "items": [dump(item) for item in items],
+    }
+
+
+def dump_raw_page(total: int, page: int, size: int, documents: list[str], **extra: Any) -> bytes:
+    """
+    Схема PaginatedResponse из готовых JSON-документов элементов (модель чтения):
+    документы встраиваются в ответ как есть, без разбора и повторной сериализации.
+    """
+    head = dumps({"total": total, "page": page, "size": size, **extra})
+    return head[:-1] + b',"items":[' + ",".join(documents).encode("utf-8") + b"]}"
+
+
+def dump_facets(rows: Iterable) -> list[dict]:
+    """Схема ActivityFacet для строк (id, name, parent_id, level, count)."""
+    return [
+        {"id": activity_id, "name": name, "parent_id": parent_id, "level": level, "count": count}
+        for activity_id, name, parent_id, level, count in rows
+    ]
+
+
+def compact_page(page: dict) -> dict:
+    """
+    Компактная страница организаций: здания и виды деятельности — по одному
+    разу в buildings и activities (по возрастанию ID), элементы items ссылаются
+    на них через building_id и activity_ids. У телефонов нет organization_id —
+    он совпадает с ID элемента. Остальные поля страницы сохраняются.
+    """
+    buildings = {}
+    activities = {}
+    items = []
+    for org in page["items"]:
+        buildings[org["building_id"]] = org["building"]
+        for activity in org["activities"]:
+            activities[activity["id"]] = activity
+        item = {
+            "id": org["id"],
+            "name": org["name"],
+            "building_id": org["building_id"],
+            "activity_ids": [activity["id"] for activity in org["activities"]],
+            "phones": [{"id": phone["id"], "number": phone["number"]} for phone in org["phones"]],
+        }
+        if "distance_km" in org:
+            item["distance_km"] = org["distance_km"]
+        items.append(item)
+
+    compact = {key: value for key, value in page.items() if key != "items"}
+    compact["buildings"] = [buildings[building_id] for building_id in sorted(buildings)]
+    compact["activities"] = [activities[activity_id] for activity_id in sorted(activities)]
+    compact["items"] = items
+    return compact
+
+
+def page_media_type(accept: str | None) -> str:
+    """
+    Формат страницы по заголовку Accept: компактный, только если клиент назвал
+    его явно с качеством не ниже JSON. Без заголовка, с */* и при недоступном
+    формате (msgpack не установлен) — JSON.
+    """
+    offers = [COMPACT_JSON_TYPE, "application/json"]
+    if msgpack is not None:
+        offers.insert(0, COMPACT_MSGPACK_TYPE)
+    quality = dict.fromkeys(offers, 0.0)
+    for part in (accept or "*/*").split(","):
+        media_type, *params = [token.strip() for token in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in ("*/*", "application/*"):
+            media_type = "application/json"
+        if media_type in quality:
+            quality[media_type] = max(quality[media_type], q)
+    best = max(offers, key=lambda offer: quality[offer])
+    return best if quality[best] > 0 else "application/json"
+
+
+def page_response(content: dict | bytes, accept: str | None) -> Response:
+    """
+    Ответ со страницей организаций в формате по заголовку Accept.
+
+    content — страница в схеме PaginatedResponse: словарь или уже готовый JSON
+    (модель чтения, кэш чтений). Для компактных форматов готовый JSON разбирается
+    и перекодируется; ответ по умолчанию отдаётся без преобразований.
+    """
+    media_type = page_media_type(accept)
+    if media_type == "application/json":
+        response = RawJSONResponse(content) if isinstance(content, bytes) else FastJSONResponse(content)
+    else:
+        compact = compact_page(loads(content) if isinstance(content, bytes) else content)
+        body = msgpack.packb(compact) if media_type == COMPACT_MSGPACK_TYPE else dumps(compact)
+        response = Response(body, media_type=media_type)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+# Описание компактных форматов страниц для OpenAPI (responses= маршрута)
+COMPACT_PAGE_RESPONSES = {
+    200: {
+        "description": (
+            "Страница в схеме PaginatedResponse (application/json, по умолчанию) или в компактной форме "
+            f"({COMPACT_JSON_TYPE}, {COMPACT_MSGPACK_TYPE}): здания и виды деятельности один раз "
+            "в buildings и activities, организации ссылаются на них по building_id и activity_ids"
+        ),
+        "content": {COMPACT_JSON_TYPE: {}, COMPACT_MSGPACK_TYPE: {}},
+    }
+}
@@ -0,0 +1,182 @@
+# session.py
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.admission import pool_admission
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.core.routing import READ_YOUR_WRITES_COOKIE, primary_until, replica_router, requires_primary
+
+logger = logging.getLogger(__name__)
+
+
+class SessionTracker:
+    """
+    Счётчики жизненного цикла сессий для обнаружения утечек.
+
+    Каждая открытая сессия регистрируется с моментом открытия; если opened
+    растёт быстрее closed или старейшая сессия живёт слишком долго — сессии текут.
+    """
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self._open_since: dict[int, float] = {}
+
+    @property
+    def active(self) -> int:
+        return self.opened - self.closed
+
+    def on_open(self, session: AsyncSession) -> None:
+        self.opened += 1
+        self._open_since[id(session)] = time.monotonic()
+
+    def on_close(self, session: AsyncSession) -> None:
+        self.closed += 1
+        self._open_since.pop(id(session), None)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        oldest = min(self._open_since.values(), default=now)
+        return {
+            "opened": self.opened,
+            "closed": self.closed,
+            "active": self.active,
+            "oldest_active_age_sec": round(now - oldest, 3),
+        }
+
+
+session_tracker = SessionTracker()
+
+# Вызываются после каждого успешного коммита пишущей сессии
+commit_hooks: list[Callable[[], None]] = []
+
+ROUTE_STATEMENT_TIMEOUTS = settings.ROUTE_STATEMENT_TIMEOUTS
+
+
+def route_statement_timeout(path: str) -> int | None:
+    """
+    statement_timeout маршрута (мс) по самому длинному совпавшему префиксу.
+
+    None, если маршрут не настроен или его значение совпадает со значением
+    соединения по умолчанию: тогда лишний SET LOCAL не выполняется.
+    """
+    for prefix, timeout in ROUTE_STATEMENT_TIMEOUTS:
+        if path.startswith(prefix):
+            return timeout if timeout != settings.DB_STATEMENT_TIMEOUT else None
+    return None
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, transaction, connection) -> None:
+    timeout = session.info.get("statement_timeout")
+    if timeout is not None:
+        # SET LOCAL действует до конца транзакции и не переживает возврат соединения в пул
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+@asynccontextmanager
+async def session_scope(
+        read_only: bool = False,
+        use_primary: bool = False,
+        statement_timeout: int | None = None
+) -> AsyncIterator[AsyncSession]:
+    """
+    Отдельная сессия на единицу работы (запрос, фоновую задачу).
+
+    Пишущая сессия фиксирует транзакцию при успешном выходе, читающая —
+    только закрывается, без лишнего COMMIT. Читающие сессии уходят на реплику,
+    если она настроена и здорова, и use_primary не требует обратного.
+    statement_timeout (мс) переопределяет значение соединения на транзакцию.
+    """
+    replica = replica_router.choose() if read_only and not use_primary else None
+    if replica is not None:
+        async with _tracked_session(replica.sessionmaker(), read_only, statement_timeout) as session:
+            try:
+                yield session
+            except Exception as e:
+                if replica_router.is_connection_error(e):
+                    replica_router.mark_failed(replica, e)
+                raise
+        return
+
+    async with pool_admission.slot():
+        async with _tracked_session(AsyncSessionLocal(), read_only, statement_timeout) as session:
+            yield session
+
+
+@asynccontextmanager
+async def _tracked_session(
+        session: AsyncSession,
+        read_only: bool,
+        statement_timeout: int | None
+) -> AsyncIterator[AsyncSession]:
+    if statement_timeout is not None:
+        session.info["statement_timeout"] = statement_timeout
+    session_tracker.on_open(session)
+    try:
+        yield session
+        if not read_only:
+            await session.commit()
+            for hook in commit_hooks:
+                hook()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+        session_tracker.on_close(session)
+
+
+def remember_write(response: Response) -> Response:
+    """
+    Выставить клиенту cookie read-your-writes, чтобы следующие чтения шли в primary.
+
+    Нужна, если чтения могут отставать от записи: при репликах и при снимке
+    справочника, который перестраивается с задержкой.
+    """
+    if settings.DB_READ_YOUR_WRITES_WINDOW > 0 and (replica_router.nodes or settings.SNAPSHOT_ENABLED):
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            primary_until(),
+            max_age=max(1, round(settings.DB_READ_YOUR_WRITES_WINDOW)),
+            httponly=True,
+        )
+    return response
+
+
+async def get_session(request: Request, response: Response) -> AsyncIterator[AsyncSession]:
+    """
+    Асинхронная сессия БД для пишущих обработчиков FastAPI через Depends.
+    Новая сессия на каждый запрос в primary, коммит после успешной обработки.
+    Клиент получает cookie read-your-writes, чтобы следующие чтения шли в primary.
+    """
+    remember_write(response)
+    async with session_scope(statement_timeout=route_statement_timeout(request.url.path)) as session:
+        yield session
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Должны ли чтения клиента идти в primary (окно read-your-writes)."""
+    return requires_primary(request.cookies.get(READ_YOUR_WRITES_COOKIE))
+
+
+async def get_read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Асинхронная сессия БД для читающих обработчиков FastAPI через Depends.
+    Коммит не выполняется: соединение возвращается в пул после закрытия сессии.
+    Чтение идёт на реплику, кроме окна read-your-writes после записи клиента.
+    """
+    async with session_scope(
+            read_only=True,
+            use_primary=reads_from_primary(request),
+            statement_timeout=route_statement_timeout(request.url.path)
+    ) as session:
+        yield session
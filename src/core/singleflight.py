@@ -0,0 +1,114 @@
+# singleflight.py
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import ReadCache
+from src.core.changes import Change, change_listener
+from src.core.config import settings
+from src.core.session import reads_from_primary, route_statement_timeout, session_scope
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных вызовов (single-flight).
+
+    Первый вызов с данным ключом запускает работу в отдельной задаче, остальные
+    дожидаются её результата или исключения. Задача не привязана к запросу,
+    который её запустил: отключение этого клиента не отменяет работу для остальных.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+            logger.debug(f"Запрос {key} присоединён к выполняющемуся")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Исключение забирается здесь, даже если все ожидающие уже отключились
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "executed": self.executed, "shared": self.shared}
+
+
+read_flights = SingleFlight()
+
+
+# Ответы на чтение; актуальность поддерживается уведомлениями об изменениях (invalidate_reads)
+read_cache = ReadCache(
+    max_entries=settings.READ_CACHE_MAX_ENTRIES,
+    ttl=settings.READ_CACHE_TTL,
+    settle=settings.DB_READ_YOUR_WRITES_WINDOW
+)
+
+# Какие записи кэша зависят от таблицы: организация встраивает здание и виды деятельности
+ORGANIZATION_TABLES = {"organizations", "phones", "organization_activity"}
+
+
+async def coalesced_read(request: Request, key: tuple, load: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """
+    Выполнить чтение load один раз на все одновременные запросы с тем же ключом.
+
+    load получает собственную читающую сессию и должен вернуть уже
+    сериализованный результат, который разделят все ожидающие. Результат
+    кэшируется до уведомления об изменении; клиенты в окне read-your-writes
+    читают мимо кэша. Отключение клиента общее выполнение не отменяет: его
+    ограничивает statement_timeout маршрута.
+    """
+    use_primary = reads_from_primary(request)
+    statement_timeout = route_statement_timeout(request.url.path)
+    if not use_primary:
+        cached = read_cache.get(key)
+        if cached is not None:
+            return cached
+
+    async def run() -> T:
+        started_at = time.monotonic()
+        async with session_scope(
+                read_only=True, use_primary=use_primary, statement_timeout=statement_timeout
+        ) as session:
+            result = await load(session)
+        if not use_primary:
+            read_cache.set(key, result, started_at)
+        return result
+
+    return await read_flights.do((*key, use_primary), run)
+
+
+def invalidate_reads(change: Change | None) -> None:
+    """Подписчик шины изменений: сбросить записи кэша, затронутые изменением."""
+    if change is None:
+        # Слушатель подключился или потерял соединение: кэш верен, только пока доходят уведомления
+        read_cache.enabled = change_listener.connected
+        read_cache.clear()
+    elif change.table in ORGANIZATION_TABLES:
+        org_id = change.id if change.table == "organizations" else change.organization_id
+        read_cache.invalidate({"organization"}, org_id)
+        read_cache.invalidate({"organizations"})
+    elif change.table == "buildings":
+        read_cache.invalidate({"organization", "organizations"})
+    elif change.table == "activities":
+        read_cache.invalidate({"activity", "activities", "organization", "organizations"})
@@ -0,0 +1,71 @@
+# warmup.py
+import asyncio
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.core.config import settings
+from src.crud.documents import select_document, select_document_list
+from src.crud.organizations import select_organization, select_organizations
+from src.crud.search import select_in_radius, select_in_rectangle
+from src.schemas.search import CoordinateRange, RadiusSearch
+
+logger = logging.getLogger(__name__)
+
+
+def hot_statements() -> list:
+    """
+    Горячие запросы обработчиков в том же виде, в каком их строят роутеры.
+
+    Кэш подготовленных выражений asyncpg ключуется текстом SQL, поэтому
+    значения параметров не важны — важна только форма запроса.
+    """
+    statements = [select_organization(0)]
+    for filters in ({}, {"building_id": 1}, {"activity_id": 1}, {"name": "_"}):
+        query, count_query = select_organizations(**filters)
+        statements += [query.offset(0).limit(1), count_query]
+    for query, count_query in (
+            select_in_rectangle(CoordinateRange(min_lat=0, max_lat=0, min_lng=0, max_lng=0)),
+            select_in_radius(RadiusSearch(latitude=0, longitude=0, radius_km=1)),
+    ):
+        statements += [query.offset(0).limit(1), count_query]
+    if settings.READ_MODEL_ENABLED:
+        statements.append(select_document(0))
+        for filters in ({}, {"building_id": 1}, {"activity_id": 1}, {"name": "_"}):
+            statements.append(select_document_list(**filters)[0].offset(0).limit(1))
+    return statements
+
+
+async def _prepare(conn: AsyncConnection, statements: list) -> None:
+    for statement in statements:
+        await conn.execute(statement)
+    await conn.rollback()
+
+
+async def warm_up_pool(engine: AsyncEngine, size: int) -> int:
+    """
+    Открыть size соединений пула одновременно и подготовить на каждом горячие запросы.
+
+    Соединения возвращаются в пул открытыми, поэтому первые запросы после
+    старта не платят за установку соединения и планирование. Ошибки прогрева
+    не фатальны: возвращается число успешно прогретых соединений.
+    """
+    started = time.monotonic()
+    statements = hot_statements()
+    connections = await asyncio.gather(*(engine.connect() for _ in range(size)), return_exceptions=True)
+    opened = [conn for conn in connections if isinstance(conn, AsyncConnection)]
+    try:
+        results = await asyncio.gather(*(_prepare(conn, statements) for conn in opened), return_exceptions=True)
+    finally:
+        await asyncio.gather(*(conn.close() for conn in opened), return_exceptions=True)
+
+    failed = [r for r in list(connections) + list(results) if isinstance(r, BaseException)]
+    if failed:
+        logger.warning(f"Прогрев {engine.url.host}: ошибок {len(failed)}, первая: {failed[0]!r}")
+    warmed = len(opened) - sum(isinstance(r, BaseException) for r in results)
+    logger.info(
+        f"Прогрев {engine.url.host}: соединений {warmed}/{size}, "
+        f"запросов на соединение {len(statements)}, {time.monotonic() - started:.2f} сек"
+    )
+    return warmed
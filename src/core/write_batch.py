@@ -0,0 +1,141 @@
+# write_batch.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, TypeVar
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.session import route_statement_timeout, session_scope
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Work = Callable[[AsyncSession], Awaitable[T]]
+
+
+class WriteBatcher:
+    """
+    Групповой коммит: одновременные записи в одной транзакции.
+
+    Первая запись открывает окно window секунд; всё, что пришло за окно (но не
+    больше max_size), выполняется в одной сессии и фиксируется одним COMMIT —
+    одна синхронизация WAL на группу вместо одной на запись. Каждая запись идёт
+    в своей точке сохранения: ошибка откатывает только её, и вызывающий получает
+    своё исключение. Результаты отдаются только после успешного коммита группы;
+    если не удался сам коммит, ошибку получают все записи группы.
+
+    statement_timeout маршрута действует на каждый запрос каждой записи группы,
+    как и без группировки: записи с разными значениями попадают в разные группы.
+    Медленная запись ограничена этим временем на запрос; отменённый по таймауту
+    запрос откатывает только точку сохранения своей записи, остальные
+    продолжаются и фиксируются.
+    """
+
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[int | None, list[tuple[Work, asyncio.Future]]] = {}
+        self._timers: dict[int | None, asyncio.TimerHandle] = {}
+        self._flushes: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.failed = 0
+
+    async def submit(self, work: Work[T], statement_timeout: int | None = None) -> T:
+        """
+        Выполнить work(session) в ближайшей группе и вернуть её результат.
+
+        statement_timeout (мс) — как у session_scope: None оставляет значение соединения.
+        """
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(statement_timeout, [])
+        pending.append((work, future))
+        if len(pending) >= self.max_size:
+            self._flush(statement_timeout)
+        elif statement_timeout not in self._timers:
+            self._timers[statement_timeout] = asyncio.get_running_loop().call_later(
+                self.window, self._flush, statement_timeout
+            )
+        return await future
+
+    def _flush(self, statement_timeout: int | None) -> None:
+        timer = self._timers.pop(statement_timeout, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(statement_timeout, [])
+        # Группы не ждут друг друга: следующее окно открывается, пока фиксируется предыдущее
+        task = asyncio.create_task(self._commit(batch, statement_timeout))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _commit(self, batch: list[tuple[Work, asyncio.Future]], statement_timeout: int | None) -> None:
+        # Вызывающий отключился до начала группы — его запись не выполняется
+        batch = [(work, future) for work, future in batch if not future.done()]
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+
+        outcomes: list[tuple[asyncio.Future, object, BaseException | None]] = []
+        try:
+            async with session_scope(statement_timeout=statement_timeout) as session:
+                for work, future in batch:
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append((future, await work(session), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            logger.error(f"Групповой коммит из {len(batch)} записей не удался: {e}")
+            self.failed += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is not None:
+                self.failed += 1
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def stop(self) -> None:
+        """Зафиксировать накопленные записи и дождаться групп в работе."""
+        for statement_timeout in list(self._pending):
+            self._flush(statement_timeout)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": sum(len(pending) for pending in self._pending.values()),
+            "in_flight": len(self._flushes),
+            "batches": self.batches,
+            "items": self.items,
+            "failed": self.failed,
+        }
+
+
+write_batcher = WriteBatcher(window=settings.WRITE_BATCH_WINDOW, max_size=settings.WRITE_BATCH_MAX_SIZE)
+
+
+async def run_write(request: Request, work: Work[T]) -> T:
+    """
+    Выполнить запись work(session) и зафиксировать её.
+
+    При WRITE_BATCHING_ENABLED запись уходит в групповой коммит, иначе —
+    в собственной транзакции; statement_timeout маршрута действует в обоих
+    случаях. work должна вернуть готовый результат: после коммита сессия закрыта.
+    """
+    statement_timeout = route_statement_timeout(request.url.path)
+    if settings.WRITE_BATCHING_ENABLED:
+        return await write_batcher.submit(work, statement_timeout)
+    async with session_scope(statement_timeout=statement_timeout) as session:
+        return await work(session)
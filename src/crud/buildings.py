@@ -0,0 +1,46 @@
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.building import Building as BuildingModel
+from src.schemas.building import BuildingCreate
+
+
+async def insert_building(session: AsyncSession, data: BuildingCreate) -> BuildingModel | None:
+    """
+    Вставить здание одним INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Возвращает None, если здание с такими координатами или адресом уже есть:
+    проверку выполняют уникальные индексы, а не предварительный SELECT.
+    """
+    stmt = (
+        pg_insert(BuildingModel)
+        .values(address=data.address, latitude=data.latitude, longitude=data.longitude)
+        .on_conflict_do_nothing()
+        .returning(BuildingModel)
+    )
+    return await session.scalar(stmt)
+
+
+async def find_conflicting_building(session: AsyncSession, data: BuildingCreate) -> BuildingModel | None:
+    """Здание, с которым конфликтует новое: по координатам или по адресу."""
+    result = await session.execute(
+        select(BuildingModel).where(
+            or_(
+                (BuildingModel.latitude == data.latitude) & (BuildingModel.longitude == data.longitude),
+                BuildingModel.address == data.address
+            )
+        ).limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def building_coordinates(session: AsyncSession, building_ids: list[int]) -> dict[int, tuple[float, float]]:
+    """Координаты зданий одним запросом: {id: (latitude, longitude)}."""
+    if not building_ids:
+        return {}
+    result = await session.execute(
+        select(BuildingModel.id, BuildingModel.latitude, BuildingModel.longitude)
+        .where(BuildingModel.id.in_(building_ids))
+    )
+    return {building_id: (lat, lon) for building_id, lat, lon in result}
@@ -0,0 +1,97 @@
+from sqlalchemy import Select, Text, cast, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.organizations import filter_organizations, select_organizations
+from src.crud.search import distance_km, in_rectangle, nearby_buildings, select_in_radius, select_in_rectangle
+from src.models.building import Building as BuildingModel
+from src.models.document import OrganizationDocument
+from src.models.organization import Organization as OrganizationModel
+from src.schemas.search import CoordinateRange, RadiusSearch
+
+# Документ выбирается текстом: он встраивается в ответ без разбора и повторной сериализации
+DOCUMENT = cast(OrganizationDocument.document, Text).label("document")
+# Общее число строк выборки тем же запросом, что и страница
+TOTAL = func.count().over().label("total")
+
+
+def _documents(*conditions) -> Select:
+    return (
+        select(DOCUMENT, TOTAL)
+        .select_from(OrganizationModel)
+        .join(OrganizationDocument, OrganizationDocument.organization_id == OrganizationModel.id)
+        .where(*conditions)
+    )
+
+
+def select_document(org_id: int) -> Select:
+    """Документ организации по первичному ключу."""
+    return select(DOCUMENT).where(OrganizationDocument.organization_id == org_id)
+
+
+def select_document_list(
+        building_id: int | None = None,
+        activity_id: int | None = None,
+        name: str | None = None
+) -> tuple[Select, Select]:
+    """Документы организаций с фильтрами select_organizations и запрос их количества."""
+    query = filter_organizations(_documents(), building_id, activity_id, name)
+    return query.order_by(OrganizationModel.id), select_organizations(building_id, activity_id, name)[1]
+
+
+def select_documents_in_rectangle(coords: CoordinateRange) -> tuple[Select, Select]:
+    query = _documents(in_rectangle(coords)).join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
+    return query.order_by(OrganizationModel.id), select_in_rectangle(coords)[1]
+
+
+def select_documents_in_radius(params: RadiusSearch) -> tuple[Select, Select]:
+    query = (
+        _documents(distance_km(params.latitude, params.longitude) <= params.radius_km)
+        .join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
+    )
+    return query.order_by(OrganizationModel.id), select_in_radius(params)[1]
+
+
+def select_nearest_documents(params: RadiusSearch, after: tuple[float, int] | None = None) -> Select:
+    """
+    Документы в радиусе по возрастанию расстояния, как select_nearest: строки
+    (document с distance_km, distance_km, id). Количество — запросом select_nearest.
+    """
+    nearby = nearby_buildings(params)
+    document = OrganizationDocument.document.op("||")(
+        func.jsonb_build_object("distance_km", nearby.c.distance_km, type_=JSONB)
+    )
+    query = (
+        select(cast(document, Text).label("document"), nearby.c.distance_km, OrganizationModel.id)
+        .select_from(OrganizationModel)
+        .join(nearby, nearby.c.id == OrganizationModel.building_id)
+        .join(OrganizationDocument, OrganizationDocument.organization_id == OrganizationModel.id)
+        .where(nearby.c.distance_km <= params.radius_km)
+    )
+    if after is not None:
+        query = query.where(
+            tuple_(nearby.c.distance_km, OrganizationModel.id) > tuple_(literal(after[0]), literal(after[1]))
+        )
+    return query.order_by(nearby.c.distance_km, OrganizationModel.id)
+
+
+async def document_page(
+        session: AsyncSession,
+        query: Select,
+        count_query: Select,
+        page: int,
+        size: int
+) -> tuple[int, list[str]]:
+    """
+    Страница документов и общее число, обычно одним запросом (count(*) OVER ()).
+
+    За последней страницей строк нет, и число берётся отдельным count_query.
+    """
+    result = await session.execute(query.offset((page - 1) * size).limit(size))
+    rows = result.all()
+    if rows:
+        return rows[0].total, [row.document for row in rows]
+    if page == 1:
+        return 0, []
+    total_result = await session.execute(count_query)
+    return total_result.scalar(), []
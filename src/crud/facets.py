@@ -0,0 +1,42 @@
+from sqlalchemy import Select, distinct, func, select, union_all
+from sqlalchemy.orm import aliased
+
+from src.models.activity import Activity as ActivityModel
+from src.models.organization import organization_activity
+
+
+def select_activity_facets(org_ids: Select) -> Select:
+    """
+    Запрос числа организаций по видам деятельности с накоплением по дереву.
+
+    Связь организации с видом деятельности засчитывается ему самому, родителю
+    и прародителю (дерево не глубже трёх уровней); организация считается
+    в каждом виде деятельности один раз. org_ids — подзапрос ID
+    отфильтрованных организаций. Все уровни — один сгруппированный запрос.
+    """
+    parent = aliased(ActivityModel)
+    links = (
+        select(
+            organization_activity.c.organization_id.label("organization_id"),
+            ActivityModel.id.label("level_0"),
+            ActivityModel.parent_id.label("level_1"),
+            parent.parent_id.label("level_2")
+        )
+        .join(ActivityModel, ActivityModel.id == organization_activity.c.activity_id)
+        .outerjoin(parent, parent.id == ActivityModel.parent_id)
+        .where(organization_activity.c.organization_id.in_(org_ids.scalar_subquery()))
+        .cte("facet_links")
+    )
+    rolled_up = union_all(
+        select(links.c.organization_id, links.c.level_0.label("activity_id")),
+        select(links.c.organization_id, links.c.level_1).where(links.c.level_1.is_not(None)),
+        select(links.c.organization_id, links.c.level_2).where(links.c.level_2.is_not(None))
+    ).subquery("rolled_up")
+
+    count = func.count(distinct(rolled_up.c.organization_id)).label("count")
+    return (
+        select(ActivityModel.id, ActivityModel.name, ActivityModel.parent_id, ActivityModel.level, count)
+        .join(rolled_up, rolled_up.c.activity_id == ActivityModel.id)
+        .group_by(ActivityModel.id)
+        .order_by(count.desc(), ActivityModel.id)
+    )
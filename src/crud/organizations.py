@@ -0,0 +1,274 @@
+from sqlalchemy import Row, Select, and_, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.models.activity import Activity as ActivityModel
+from src.models.building import Building as BuildingModel
+from src.models.organization import (
+    Organization as OrganizationModel,
+    OrganizationPhone as PhoneModel,
+    organization_activity
+)
+
+
+def escape_like(value: str) -> str:
+    """Экранировать спецсимволы LIKE, чтобы поиск по названию был поиском подстроки."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def organization_options() -> list:
+    """Опции загрузки связей, необходимых для схемы Organization."""
+    return [
+        selectinload(OrganizationModel.building),
+        selectinload(OrganizationModel.activities),
+        selectinload(OrganizationModel.phones)
+    ]
+
+
+def select_organization(org_id: int) -> Select:
+    """Запрос организации по ID со связями."""
+    return select(OrganizationModel).options(*organization_options()).where(OrganizationModel.id == org_id)
+
+
+async def load_organization(session: AsyncSession, org_id: int) -> OrganizationModel | None:
+    """
+    Перечитать организацию со связями после записи.
+
+    populate_existing обновляет объекты, уже лежащие в сессии: телефоны и связи
+    меняются Core-запросами в обход ORM-коллекций.
+    """
+    result = await session.execute(select_organization(org_id).execution_options(populate_existing=True))
+    return result.scalar_one_or_none()
+
+
+def filter_organizations(
+        query: Select,
+        building_id: int | None = None,
+        activity_id: int | None = None,
+        name: str | None = None
+) -> Select:
+    conditions = []
+    if building_id:
+        conditions.append(OrganizationModel.building_id == building_id)
+    if name:
+        conditions.append(OrganizationModel.name.ilike(f"%{escape_like(name)}%", escape="\\"))
+    if conditions:
+        query = query.where(and_(*conditions))
+    if activity_id:
+        query = query.join(OrganizationModel.activities).where(ActivityModel.id == activity_id)
+    return query
+
+
+def select_organizations(
+        building_id: int | None = None,
+        activity_id: int | None = None,
+        name: str | None = None
+) -> tuple[Select, Select]:
+    """
+    Запросы списка организаций с фильтрами и подсчёта их общего количества.
+
+    Пагинация (offset/limit) добавляется вызывающей стороной.
+    """
+    query = filter_organizations(
+        select(OrganizationModel).options(*organization_options()), building_id, activity_id, name
+    )
+    count_query = filter_organizations(
+        select(func.count()).select_from(OrganizationModel), building_id, activity_id, name
+    )
+    return query.order_by(OrganizationModel.id), count_query
+
+
+def select_organization_ids(
+        building_id: int | None = None,
+        activity_id: int | None = None,
+        name: str | None = None
+) -> Select:
+    """Запрос ID организаций с теми же фильтрами, что и select_organizations."""
+    return filter_organizations(select(OrganizationModel.id), building_id, activity_id, name)
+
+
+def _with_building(written) -> Select:
+    """
+    Строка организации из RETURNING вместе с её зданием одним запросом.
+
+    Запись выполняется в CTE (WITH written AS (INSERT/UPDATE ... RETURNING ...)),
+    здание присоединяется в том же запросе, без повторного чтения организации.
+    """
+    written = written.returning(
+        OrganizationModel.id, OrganizationModel.name, OrganizationModel.building_id
+    ).cte("written")
+    return (
+        select(written.c.id, written.c.name, written.c.building_id, BuildingModel)
+        .join(BuildingModel, BuildingModel.id == written.c.building_id)
+    )
+
+
+async def insert_organization(session: AsyncSession, name: str, building_id: int) -> Row | None:
+    """
+    Вставить организацию одним INSERT ... ON CONFLICT (name) DO NOTHING RETURNING.
+
+    Возвращает строку (id, name, building_id, Building) или None, если организация
+    с таким названием уже есть. Несуществующее здание отклоняет внешний ключ —
+    без предварительного SELECT.
+    """
+    stmt = _with_building(
+        pg_insert(OrganizationModel)
+        .values(name=name, building_id=building_id)
+        .on_conflict_do_nothing(index_elements=[OrganizationModel.name])
+    )
+    result = await session.execute(stmt)
+    return result.one_or_none()
+
+
+async def update_organization_row(
+        session: AsyncSession,
+        org_id: int,
+        name: str | None = None,
+        building_id: int | None = None
+) -> Row | None:
+    """
+    Обновить поля организации одним UPDATE ... RETURNING.
+
+    Возвращает строку (id, name, building_id, Building) или None, если организации
+    нет. Без изменяемых полей строка только читается, и updated_at не меняется.
+    """
+    values = {}
+    if name is not None:
+        values["name"] = name
+    if building_id is not None:
+        values["building_id"] = building_id
+    if values:
+        stmt = _with_building(update(OrganizationModel).where(OrganizationModel.id == org_id).values(**values))
+    else:
+        stmt = (
+            select(OrganizationModel.id, OrganizationModel.name, OrganizationModel.building_id, BuildingModel)
+            .join(OrganizationModel.building)
+            .where(OrganizationModel.id == org_id)
+        )
+    result = await session.execute(stmt)
+    return result.one_or_none()
+
+
+async def find_organization_id(session: AsyncSession, name: str) -> int | None:
+    """ID организации по точному названию."""
+    return await session.scalar(select(OrganizationModel.id).where(OrganizationModel.name == name))
+
+
+ACTIVITY_COLUMNS = (ActivityModel.id, ActivityModel.name, ActivityModel.parent_id, ActivityModel.level)
+PHONE_COLUMNS = (PhoneModel.id, PhoneModel.number, PhoneModel.organization_id)
+
+
+async def existing_activities(session: AsyncSession, activity_ids: list[int]) -> list[Row]:
+    """Виды деятельности из activity_ids, которые есть в БД, в порядке ID."""
+    requested = list(dict.fromkeys(activity_ids))
+    if not requested:
+        return []
+    result = await session.execute(
+        select(*ACTIVITY_COLUMNS).where(ActivityModel.id.in_(requested)).order_by(ActivityModel.id)
+    )
+    return result.all()
+
+
+async def organization_activities(session: AsyncSession, org_id: int) -> list[Row]:
+    """Текущие виды деятельности организации в порядке ID."""
+    result = await session.execute(
+        select(*ACTIVITY_COLUMNS)
+        .join(organization_activity, organization_activity.c.activity_id == ActivityModel.id)
+        .where(organization_activity.c.organization_id == org_id)
+        .order_by(ActivityModel.id)
+    )
+    return result.all()
+
+
+async def organization_phones(session: AsyncSession, org_id: int) -> list[Row]:
+    """Текущие телефоны организации в порядке ID."""
+    result = await session.execute(
+        select(*PHONE_COLUMNS).where(PhoneModel.organization_id == org_id).order_by(PhoneModel.id)
+    )
+    return result.all()
+
+
+async def add_phones(session: AsyncSession, org_id: int, numbers: list[str]) -> list[Row]:
+    """Добавить телефоны одним многострочным INSERT ... RETURNING; возвращает вставленные строки."""
+    if not numbers:
+        return []
+    result = await session.execute(
+        insert(PhoneModel)
+        .values([{"organization_id": org_id, "number": number} for number in numbers])
+        .returning(*PHONE_COLUMNS)
+    )
+    return result.all()
+
+
+async def add_activity_links(session: AsyncSession, org_id: int, activity_ids: list[int]) -> None:
+    """Добавить связи с видами деятельности одним многострочным INSERT."""
+    if activity_ids:
+        await session.execute(
+            insert(organization_activity).values(
+                [{"organization_id": org_id, "activity_id": activity_id} for activity_id in activity_ids]
+            )
+        )
+
+
+async def sync_phones(session: AsyncSession, org_id: int, numbers: list[str]) -> list[Row]:
+    """
+    Привести телефоны организации к списку numbers по разнице множеств.
+
+    Удаляются только исчезнувшие номера (один DELETE ... WHERE id IN), добавляются
+    только новые (один INSERT); неизменные строки не трогаются и сохраняют updated_at.
+    Возвращает итоговые телефоны в порядке ID — без повторного чтения.
+    """
+    current = {phone.number: phone for phone in await organization_phones(session, org_id)}
+    wanted = list(dict.fromkeys(numbers))
+
+    removed = [phone.id for number, phone in current.items() if number not in wanted]
+    if removed:
+        await session.execute(delete(PhoneModel).where(PhoneModel.id.in_(removed)))
+    added = await add_phones(session, org_id, [number for number in wanted if number not in current])
+
+    kept = [phone for number, phone in current.items() if number in wanted]
+    return sorted(kept + added, key=lambda phone: phone.id)
+
+
+async def sync_activity_links(session: AsyncSession, org_id: int, activity_ids: list[int]) -> list[Row]:
+    """
+    Привести связи организации с видами деятельности к activity_ids по разнице множеств.
+
+    Возвращает итоговые виды деятельности в порядке ID.
+    """
+    result = await session.execute(
+        select(organization_activity.c.activity_id).where(organization_activity.c.organization_id == org_id)
+    )
+    current = set(result.scalars())
+    wanted = await existing_activities(session, activity_ids)
+    wanted_ids = {activity.id for activity in wanted}
+
+    removed = current.difference(wanted_ids)
+    if removed:
+        await session.execute(
+            delete(organization_activity).where(
+                organization_activity.c.organization_id == org_id,
+                organization_activity.c.activity_id.in_(removed)
+            )
+        )
+    await add_activity_links(session, org_id, [activity.id for activity in wanted if activity.id not in current])
+    return wanted
+
+
+async def organization_locations(session: AsyncSession, org_ids: list[int]) -> dict[int, tuple[int, list[int]]]:
+    """
+    Здание и виды деятельности организаций одним запросом: {id: (building_id, [activity_id, ...])}.
+
+    Удалённых организаций в результате нет.
+    """
+    if not org_ids:
+        return {}
+    activity_ids = func.array_remove(func.array_agg(organization_activity.c.activity_id), None)
+    result = await session.execute(
+        select(OrganizationModel.id, OrganizationModel.building_id, activity_ids)
+        .outerjoin(organization_activity, organization_activity.c.organization_id == OrganizationModel.id)
+        .where(OrganizationModel.id.in_(org_ids))
+        .group_by(OrganizationModel.id)
+    )
+    return {org_id: (building_id, list(activities)) for org_id, building_id, activities in result}
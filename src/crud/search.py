@@ -0,0 +1,133 @@
+import math
+
+from sqlalchemy import ARRAY, Integer, Select, and_, any_, bindparam, func, literal, select, tuple_
+
+from src.crud.organizations import organization_options
+from src.models.building import Building as BuildingModel
+from src.models.organization import Organization as OrganizationModel
+from src.schemas.search import CoordinateRange, RadiusSearch
+
+
+def _search(condition) -> tuple[Select, Select]:
+    query = (
+        select(OrganizationModel)
+        .options(*organization_options())
+        .join(BuildingModel)
+        .where(condition)
+        .order_by(OrganizationModel.id)
+    )
+    count_query = select(func.count()).select_from(OrganizationModel).join(BuildingModel).where(condition)
+    return query, count_query
+
+
+def _ids(condition) -> Select:
+    return select(OrganizationModel.id).join(BuildingModel).where(condition)
+
+
+def in_rectangle(coords: CoordinateRange):
+    return and_(
+        BuildingModel.latitude >= coords.min_lat,
+        BuildingModel.latitude <= coords.max_lat,
+        BuildingModel.longitude >= coords.min_lng,
+        BuildingModel.longitude <= coords.max_lng
+    )
+
+
+def select_in_rectangle(coords: CoordinateRange) -> tuple[Select, Select]:
+    """Запросы организаций в прямоугольной области и их количества."""
+    return _search(in_rectangle(coords))
+
+
+def select_ids_in_rectangle(coords: CoordinateRange) -> Select:
+    """Запрос ID организаций в прямоугольной области (для фасетов)."""
+    return _ids(in_rectangle(coords))
+
+
+EARTH_RADIUS_KM = 6371
+
+
+def distance_km(latitude: float, longitude: float):
+    """
+    Выражение расстояния по большому кругу (км) от точки до здания.
+
+    Аргумент acos ограничен [-1, 1]: из-за погрешности округления для здания
+    в самой точке он может чуть превысить 1, и acos выдаст ошибку.
+    """
+    cos_angle = (
+        func.cos(func.radians(latitude)) *
+        func.cos(func.radians(BuildingModel.latitude)) *
+        func.cos(func.radians(BuildingModel.longitude) - func.radians(longitude)) +
+        func.sin(func.radians(latitude)) *
+        func.sin(func.radians(BuildingModel.latitude))
+    )
+    return EARTH_RADIUS_KM * func.acos(func.least(1.0, func.greatest(-1.0, cos_angle)))
+
+
+def select_in_radius(params: RadiusSearch) -> tuple[Select, Select]:
+    """Запросы организаций в радиусе от точки и их количества."""
+    return _search(distance_km(params.latitude, params.longitude) <= params.radius_km)
+
+
+def select_ids_in_radius(params: RadiusSearch) -> Select:
+    """Запрос ID организаций в радиусе от точки (для фасетов)."""
+    return _ids(distance_km(params.latitude, params.longitude) <= params.radius_km)
+
+
+def nearby_buildings(params: RadiusSearch):
+    """
+    Материализованный CTE "nearby" (id здания, distance_km): расстояние
+    считается один раз на здание в полосе широт радиуса (индекс по координатам).
+    """
+    delta = math.degrees(params.radius_km / EARTH_RADIUS_KM)
+    return (
+        select(BuildingModel.id, distance_km(params.latitude, params.longitude).label("distance_km"))
+        .where(BuildingModel.latitude.between(params.latitude - delta, params.latitude + delta))
+        .cte("nearby")
+        .prefix_with("MATERIALIZED")
+    )
+
+
+def select_nearest(params: RadiusSearch, after: tuple[float, int] | None = None) -> tuple[Select, Select]:
+    """
+    Запросы организаций в радиусе по возрастанию расстояния и их количества.
+
+    Расстояние считается один раз на здание в материализованном CTE; кандидаты
+    заранее ограничены полосой широт (индекс по координатам). Запрос
+    возвращает пары (организация, distance_km) в порядке (distance_km, id);
+    after — ключ последней строки предыдущей страницы (keyset-пагинация).
+    """
+    nearby = nearby_buildings(params)
+    in_radius = nearby.c.distance_km <= params.radius_km
+
+    query = (
+        select(OrganizationModel, nearby.c.distance_km)
+        .options(*organization_options())
+        .join(nearby, nearby.c.id == OrganizationModel.building_id)
+        .where(in_radius)
+    )
+    if after is not None:
+        query = query.where(
+            tuple_(nearby.c.distance_km, OrganizationModel.id) > tuple_(literal(after[0]), literal(after[1]))
+        )
+    count_query = (
+        select(func.count())
+        .select_from(OrganizationModel)
+        .join(nearby, nearby.c.id == OrganizationModel.building_id)
+        .where(in_radius)
+    )
+    return query.order_by(nearby.c.distance_km, OrganizationModel.id), count_query
+
+
+def select_organizations_by_ids(org_ids: list[int]) -> Select:
+    """
+    Запрос организаций со связями по списку ID (страница, найденная по снимку).
+
+    Список передаётся одним параметром-массивом (= ANY), поэтому текст запроса
+    не зависит от размера страницы и переиспользует подготовленное выражение.
+    """
+    return (
+        select(OrganizationModel)
+        .options(*organization_options())
+        .where(OrganizationModel.id == any_(bindparam("org_ids", org_ids, type_=ARRAY(Integer))))
+        .order_by(OrganizationModel.id)
+    )
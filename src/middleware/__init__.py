@@ -1 +1,6 @@
 from .api_key import APIKeyMiddleware
+from .idempotency import IdempotencyMiddleware
+from .read_only import ReadOnlyMiddleware
+from .statements import StatementCountMiddleware
+from .profiling import ProfilingMiddleware
+from .disconnect import DisconnectCancelMiddleware
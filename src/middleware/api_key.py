@@ -5,6 +5,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Пробы оркестратора приходят без API ключа
+PUBLIC_PATHS = {"/health", "/health/ready"}
+
 
 class APIKeyMiddleware(BaseHTTPMiddleware):
     """
@@ -12,9 +15,12 @@ class APIKeyMiddleware(BaseHTTPMiddleware):
 
     Проверяет заголовок 'x-api-key' во всех входящих запросах.
     Если ключ неверный, возвращает HTTP 401 Unauthorized и логирует попытку доступа.
+    Health-пробы из PUBLIC_PATHS пропускаются без проверки.
     """
 
     async def dispatch(self, request: Request, call_next):
+        if request.url.path in PUBLIC_PATHS:
+            return await call_next(request)
         api_key = request.headers.get("x-api-key")
         if api_key != settings.API_KEY:
             logger.warning(f"Попытка доступа с неверным API ключом: {api_key}")
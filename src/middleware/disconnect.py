@@ -0,0 +1,75 @@
+import asyncio
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class DisconnectCancelMiddleware:
+    """
+    ASGI middleware отмены обработки запроса при отключении клиента.
+
+    Сервер не прерывает приложение, если клиент ушёл, не дождавшись ответа:
+    долгий запрос к БД продолжал бы занимать соединение пула. Middleware
+    читает входящие сообщения в отдельной задаче и, получив http.disconnect
+    до завершения ответа, отменяет обработку. Отмена прерывает ожидание
+    asyncpg — драйвер отправляет серверу запрос отмены, — а сессия в
+    session_scope закрывается и возвращает соединение в пул.
+
+    Реализовано на уровне ASGI, а не BaseHTTPMiddleware: тело запроса должно
+    доходить до обработчика без изменений.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        disconnected = asyncio.Event()
+        response_started = False
+        response_complete = False
+
+        async def read() -> None:
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+
+        async def app_receive() -> Message:
+            if disconnected.is_set() and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def app_send(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        reader = asyncio.create_task(read())
+        handler = asyncio.create_task(self.app(scope, app_receive, app_send))
+        waiter = asyncio.create_task(disconnected.wait())
+        try:
+            await asyncio.wait({handler, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if not handler.done() and not response_complete:
+                if not response_started:
+                    # Потоковые ответы (SSE) заканчиваются отключением штатно
+                    logger.info(f"Клиент отключился до ответа, обработка {scope['method']} {scope['path']} отменена")
+                handler.cancel()
+            try:
+                await handler
+            except asyncio.CancelledError:
+                if not disconnected.is_set():
+                    raise
+        finally:
+            for task in (reader, waiter, handler):
+                task.cancel()
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import logging
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+IDEMPOTENT_PATHS = {"/organizations/", "/buildings/", "/activities/"}
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse:
+    """Ответ первого выполнения запроса с данным ключом."""
+
+    def __init__(self, fingerprint: str, status_code: int, headers: dict, body: bytes):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            headers={**self.headers, REPLAYED_HEADER: "true"},
+        )
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware для заголовка Idempotency-Key на POST эндпоинтах создания.
+
+    Ответ первого выполнения сохраняется в ограниченном кэше с TTL; повторы с тем
+    же ключом получают сохранённый ответ без обращения к обработчику и БД.
+    Одновременный повтор ждёт завершения первого запроса. Повтор с тем же ключом,
+    но другим телом запроса отклоняется с 422. Ответы 5xx не сохраняются, чтобы
+    клиент мог повторить запрос после сбоя.
+
+    Кэш живёт в памяти процесса: повтор, попавший на другой воркер, выполняется заново.
+    """
+
+    def __init__(self, app, ttl: int = settings.IDEMPOTENCY_TTL,
+                 max_entries: int = settings.IDEMPOTENCY_MAX_ENTRIES):
+        super().__init__(app)
+        self.responses = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.in_flight: dict[tuple, asyncio.Future] = {}
+
+    async def dispatch(self, request: Request, call_next):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if (
+                idempotency_key is None
+                or request.method != "POST"
+                or request.url.path not in IDEMPOTENT_PATHS
+        ):
+            return await call_next(request)
+
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return JSONResponse(status_code=400, content={"detail": "Некорректный Idempotency-Key"})
+
+        body = await request.body()
+        fingerprint = hashlib.sha256(request.url.query.encode() + b"\0" + body).hexdigest()
+        key = (request.headers.get("x-api-key"), request.url.path, idempotency_key)
+
+        while True:
+            stored = self.responses.get(key)
+            if stored is not None:
+                return self._replay(stored, fingerprint, idempotency_key)
+            pending = self.in_flight.get(key)
+            if pending is None:
+                break
+            # Первый запрос с этим ключом ещё выполняется — дождаться его результата
+            await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            response = await call_next(request)
+            content = b"".join([chunk async for chunk in response.body_iterator])
+            headers = {
+                name: value for name, value in response.headers.items()
+                if name.lower() != "set-cookie"
+            }
+            if response.status_code < 500:
+                self.responses.set(key, StoredResponse(fingerprint, response.status_code, headers, content))
+            buffered = Response(content=content, status_code=response.status_code)
+            buffered.raw_headers = response.raw_headers
+            return buffered
+        finally:
+            del self.in_flight[key]
+            future.set_result(None)
+
+    @staticmethod
+    def _replay(stored: StoredResponse, fingerprint: str, idempotency_key: str) -> Response:
+        if stored.fingerprint != fingerprint:
+            logger.warning(f"Idempotency-Key {idempotency_key!r} повторно использован с другим телом запроса")
+            return JSONResponse(
+                status_code=422,
+                content={"detail": "Idempotency-Key уже использован с другим запросом"}
+            )
+        logger.info(f"Повтор запроса по Idempotency-Key {idempotency_key!r}: возвращён сохранённый ответ")
+        return stored.to_response()
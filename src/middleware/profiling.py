@@ -0,0 +1,55 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+import asyncio
+import hmac
+import logging
+import random
+
+from src.core.config import settings
+from src.core.profiling import profile_name, profiler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+ADMIN_KEY_HEADER = "x-admin-key"
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware профилирования отдельных запросов.
+
+    Запрос профилируется, если пришёл с заголовками 'X-Profile: 1' и
+    'x-admin-key' равным PROFILING_ADMIN_KEY, либо попал в случайную выборку
+    PROFILING_SAMPLE_RATE. Профиль сохраняется в PROFILING_DIR в folded-формате
+    (flamegraph.pl, speedscope), имя файла возвращается в заголовке X-Profile.
+
+    Добавляется последним (выполняется первым), чтобы профиль покрывал
+    остальные middleware, маршрутизацию, валидацию и сериализацию ответа.
+    """
+
+    def _requested(self, request: Request) -> bool:
+        if not settings.PROFILING_ADMIN_KEY or request.headers.get(PROFILE_HEADER) != "1":
+            return False
+        admin_key = request.headers.get(ADMIN_KEY_HEADER, "")
+        if hmac.compare_digest(admin_key.encode(), settings.PROFILING_ADMIN_KEY.encode()):
+            return True
+        logger.warning(f"Запрос профиля с неверным ключом администратора: {request.url.path}")
+        return False
+
+    async def dispatch(self, request: Request, call_next):
+        if not profiler.installed or not (
+                self._requested(request) or random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            return await call_next(request)
+
+        with profiler.profile(profile_name(request.method, request.url.path)) as profile:
+            response = await call_next(request)
+
+        try:
+            path = await asyncio.to_thread(profiler.save, profile)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить профиль {profile.name}: {e}")
+            return response
+        logger.info(f"Профиль {request.method} {request.url.path} сохранён: {path}, сэмплов: {profile.samples}")
+        response.headers[PROFILE_HEADER] = profile.name
+        return response
@@ -0,0 +1,30 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+import logging
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Поиск принимает параметры в теле POST, но ничего не пишет
+READ_ONLY_POST_PREFIXES = ("/search/",)
+
+
+class ReadOnlyMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware режима только для чтения (READ_ONLY_MODE).
+
+    Отклоняет все пишущие запросы с HTTP 405: в этом режиме сервис работает
+    без БД и обслуживает чтения из локального снимка справочника.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method in READ_METHODS or (
+                request.method == "POST" and request.url.path.startswith(READ_ONLY_POST_PREFIXES)
+        ):
+            return await call_next(request)
+        logger.warning(f"Запись отклонена в режиме только для чтения: {request.method} {request.url.path}")
+        return JSONResponse(
+            status_code=405,
+            content={"detail": "Сервис работает в режиме только для чтения"}
+        )
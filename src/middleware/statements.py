@@ -0,0 +1,34 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+import logging
+
+from src.core.config import settings
+from src.core.instrumentation import count_statements
+
+logger = logging.getLogger(__name__)
+
+STATEMENTS_HEADER = "X-SQL-Statements"
+
+
+class StatementCountMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware подсчёта SQL-запросов на HTTP-запрос.
+
+    При SQL_STATEMENTS_HEADER число запросов отдаётся в заголовке
+    X-SQL-Statements (по нему тесты проверяют бюджеты эндпоинтов). Запросы,
+    превысившие SQL_STATEMENTS_WARN_THRESHOLD, логируются с предупреждением:
+    так N+1 виден в проде до того, как станет проблемой.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        with count_statements() as stats:
+            response = await call_next(request)
+
+        if settings.SQL_STATEMENTS_HEADER:
+            response.headers[STATEMENTS_HEADER] = str(stats.count)
+        if 0 < settings.SQL_STATEMENTS_WARN_THRESHOLD < stats.count:
+            logger.warning(
+                f"Запрос {request.method} {request.url.path} выполнил {stats.count} SQL-запросов "
+                f"(порог {settings.SQL_STATEMENTS_WARN_THRESHOLD})"
+            )
+        return response
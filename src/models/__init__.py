@@ -1,12 +1,14 @@
 from .activity import Activity
 from .base import Base
 from .building import Building
+from .document import OrganizationDocument
 from .organization import Organization, OrganizationPhone, organization_activity
 
 
 __all__ = [
     'Activity',
     'Building',
+    'OrganizationDocument',
     'Organization',
     'OrganizationPhone',
 ]
\ No newline at end of file
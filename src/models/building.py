@@ -18,7 +18,7 @@ class Building(BaseModel):
 
     __table_args__ = (
         Index('idx_building_coords_unique', 'latitude', 'longitude', unique=True,
-              doc="Уникальный индекс для координат здания"),
+              info={"doc": "Уникальный индекс для координат здания"}),
         Index('idx_building_coords', 'latitude', 'longitude',
-              doc="Индекс для географического поиска"),
+              info={"doc": "Индекс для географического поиска"}),
     )
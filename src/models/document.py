@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from src.models.base import Base
+
+
+class OrganizationDocument(Base):
+    """
+    Модель чтения: готовый JSON-документ организации в форме схемы Organization.
+
+    Поддерживается триггерами на таблицах справочника (src.core.read_model)
+    в той же транзакции, что и запись.
+    """
+
+    __tablename__ = "organization_documents"
+
+    organization_id = Column(
+        Integer,
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True,
+        doc="ID организации"
+    )
+    document = Column(JSONB, nullable=False, doc="Организация со зданием, видами деятельности и телефонами")
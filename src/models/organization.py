@@ -10,7 +10,7 @@ organization_activity = Table(
     Column("activity_id", Integer, ForeignKey("activities.id"), index=True,
            doc="ID вида деятельности"),
     Index('idx_org_activity', 'organization_id', 'activity_id',
-          doc="Составной индекс для связи организация-деятельность")
+          info={"doc": "Составной индекс для связи организация-деятельность"})
 )
 
 
@@ -34,7 +34,7 @@ class OrganizationPhone(BaseModel):
 
     __table_args__ = (
         Index('idx_org_phone_unique', 'organization_id', 'number', unique=True,
-              doc="Уникальный индекс для телефонов в рамках организации"),
+              info={"doc": "Уникальный индекс для телефонов в рамках организации"}),
     )
 
 
@@ -51,13 +51,13 @@ class Organization(BaseModel):
     building = relationship("Building", back_populates="organizations",
                             doc="Здание, где расположена организация")
     activities = relationship("Activity", secondary=organization_activity, back_populates="organizations",
-                              doc="Виды деятельности организации")
+                              order_by="Activity.id", doc="Виды деятельности организации")
     phones = relationship("OrganizationPhone", back_populates="organization", cascade="all, delete-orphan",
-                          doc="Телефоны организации")
+                          order_by="OrganizationPhone.id", doc="Телефоны организации")
 
     __table_args__ = (
         Index('idx_org_building', 'building_id',
-              doc="Индекс для поиска организаций по зданию"),
+              info={"doc": "Индекс для поиска организаций по зданию"}),
         Index('idx_org_name', 'name',
-              doc="Индекс для поиска организаций по названию"),
+              info={"doc": "Индекс для поиска организаций по названию"}),
     )
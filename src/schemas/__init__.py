@@ -10,7 +10,7 @@
 - Ответы API: Пагинация, ошибки, успешные операции
 """
 
-from .activity import ActivityBase, ActivityCreate, Activity, ActivityWithChildren
+from .activity import ActivityBase, ActivityCreate, Activity, ActivityWithChildren, ActivityFacet
 from .building import BuildingBase, BuildingCreate, Building
 from .organization import (
     OrganizationPhoneBase,
@@ -21,7 +21,8 @@ from .organization import (
     OrganizationUpdate,
     Organization,
     OrganizationWithBuilding,
-    OrganizationWithActivities
+    OrganizationWithActivities,
+    OrganizationWithDistance
 )
 from .search import CoordinateRange, RadiusSearch
 from .response import PaginatedResponse, ErrorResponse, SuccessResponse
@@ -32,6 +33,7 @@ __all__ = [
     'ActivityCreate',
     'Activity',
     'ActivityWithChildren',
+    'ActivityFacet',
     'BuildingBase',
     'BuildingCreate',
     'Building',
@@ -44,6 +46,7 @@ __all__ = [
     'Organization',
     'OrganizationWithBuilding',
     'OrganizationWithActivities',
+    'OrganizationWithDistance',
     'CoordinateRange',
     'RadiusSearch',
     'PaginatedResponse',
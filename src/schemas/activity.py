@@ -26,3 +26,8 @@ class ActivityWithChildren(Activity):
 
 
 ActivityWithChildren.model_rebuild()
+
+
+class ActivityFacet(Activity):
+    """Вид деятельности с числом найденных организаций (с учётом дочерних видов)."""
+    count: int = Field(..., description="Количество организаций в этом виде деятельности и его потомках")
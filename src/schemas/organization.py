@@ -75,3 +75,8 @@ class OrganizationWithBuilding(Organization):
 class OrganizationWithActivities(Organization):
     """Схема для возврата организации с полными данными о видах деятельности."""
     pass
+
+
+class OrganizationWithDistance(Organization):
+    """Схема для возврата организации с расстоянием до точки поиска."""
+    distance_km: float | None = Field(None, description="Расстояние от точки поиска до здания (км)")
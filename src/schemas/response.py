@@ -1,14 +1,26 @@
+from typing import Generic, TypeVar
+
 from pydantic import BaseModel, Field
 
+from .activity import ActivityFacet
+
+T = TypeVar("T")
+
 
-class PaginatedResponse(BaseModel):
+class PaginatedResponse(BaseModel, Generic[T]):
     """
     Схема для пагинированного ответа.
     """
     total: int = Field(..., description="Общее количество элементов")
     page: int = Field(..., description="Текущая страница")
     size: int = Field(..., description="Количество элементов на странице")
-    items: list = Field(..., description="Список элементов текущей страницы")
+    items: list[T] = Field(..., description="Список элементов текущей страницы")
+    next_cursor: str | None = Field(
+        None, description="Курсор следующей страницы (при сортировке по расстоянию); null — страниц больше нет"
+    )
+    facets: list[ActivityFacet] | None = Field(
+        None, description="Количество найденных организаций по видам деятельности (при facets=true)"
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,13 @@
+from .builder import build_snapshot
+from .manager import SnapshotManager, current_snapshot, serving_snapshot, snapshot_manager
+from .store import DirectorySnapshot
+
+
+__all__ = [
+    'DirectorySnapshot',
+    'SnapshotManager',
+    'build_snapshot',
+    'current_snapshot',
+    'serving_snapshot',
+    'snapshot_manager',
+]
@@ -0,0 +1,28 @@
+"""
+Выгрузка снимка справочника из БД для узлов в режиме только для чтения.
+
+    python -m src.snapshot [путь]
+
+По умолчанию снимок пишется в SNAPSHOT_PATH. Полученный файл копируется на
+узлы с READ_ONLY_MODE=True; замена файла подхватывается без перезапуска.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+from src.core.config import settings
+from src.core.database import async_engine
+from src.snapshot.builder import build_snapshot
+
+
+async def export(path: Path) -> int:
+    try:
+        return await build_snapshot(path)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(settings.SNAPSHOT_PATH)
+    version = asyncio.run(export(target))
+    print(f"Снимок справочника v{version} записан в {target}")
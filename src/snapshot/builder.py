@@ -0,0 +1,190 @@
+"""
+Построение снимка справочника из БД.
+
+Строки раскладываются по плоским массивам (секциям), отсортированным по ID;
+связи один-ко-многим хранятся в CSR-виде: массив смещений `<name>.off`
+длиной n + 1 и массив значений `<name>`.
+"""
+import asyncio
+import logging
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.session import session_scope
+from src.models.activity import Activity as ActivityModel
+from src.models.building import Building as BuildingModel
+from src.models.organization import (
+    Organization as OrganizationModel,
+    OrganizationPhone as PhoneModel,
+    organization_activity
+)
+from src.snapshot.format import read_version, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def _strings(values: Iterable[str]) -> tuple[array, array]:
+    blob, offsets = bytearray(), array("q", [0])
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return array("B", blob), offsets
+
+
+def _csr(groups: list[Iterable[int]], typecode: str = "q") -> tuple[array, array]:
+    values, offsets = array(typecode), array("q", [0])
+    for group in groups:
+        values.extend(group)
+        offsets.append(len(values))
+    return values, offsets
+
+
+def build_sections(
+        buildings: list[tuple[int, str, float, float]],
+        activities: list[tuple[int, str, int | None, int]],
+        organizations: list[tuple[int, str, int]],
+        links: list[tuple[int, int]],
+        phones: list[tuple[int, int, str]]
+) -> dict[str, array]:
+    """
+    Разложить строки справочника по секциям снимка.
+
+    buildings: (id, address, latitude, longitude); activities: (id, name, parent_id, level);
+    organizations: (id, name, building_id); links: (organization_id, activity_id);
+    phones: (id, organization_id, number).
+    """
+    buildings = sorted(buildings)
+    activities = sorted(activities)
+    organizations = sorted(organizations)
+    phones = sorted(phones)
+
+    sections: dict[str, array] = {}
+
+    building_ids = [row[0] for row in buildings]
+    building_pos = {building_id: i for i, building_id in enumerate(building_ids)}
+    by_lat = sorted(range(len(buildings)), key=lambda i: buildings[i][2])
+    building_orgs = [[] for _ in buildings]
+    for org_id, _, building_id in organizations:
+        if building_id in building_pos:
+            building_orgs[building_pos[building_id]].append(org_id)
+
+    sections["building.id"] = array("q", building_ids)
+    sections["building.lat"] = array("d", [row[2] for row in buildings])
+    sections["building.lon"] = array("d", [row[3] for row in buildings])
+    sections["building.addr"], sections["building.addr.off"] = _strings(row[1] for row in buildings)
+    sections["building.by_lat"] = array("i", by_lat)
+    sections["building.lat_sorted"] = array("d", [buildings[i][2] for i in by_lat])
+    sections["building.org"], sections["building.org.off"] = _csr(building_orgs)
+
+    activity_ids = [row[0] for row in activities]
+    activity_pos = {activity_id: i for i, activity_id in enumerate(activity_ids)}
+    children = [[] for _ in activities]
+    roots = []
+    for i, (_, _, parent_id, _) in enumerate(activities):
+        if parent_id is None:
+            roots.append(i)
+        elif parent_id in activity_pos:
+            children[activity_pos[parent_id]].append(i)
+
+    org_activities = defaultdict(set)
+    activity_orgs = defaultdict(set)
+    for org_id, activity_id in links:
+        org_activities[org_id].add(activity_id)
+        activity_orgs[activity_id].add(org_id)
+
+    sections["activity.id"] = array("q", activity_ids)
+    sections["activity.parent"] = array("q", [-1 if row[2] is None else row[2] for row in activities])
+    sections["activity.level"] = array("q", [row[3] for row in activities])
+    sections["activity.name"], sections["activity.name.off"] = _strings(row[1] for row in activities)
+    sections["activity.child"], sections["activity.child.off"] = _csr(children, "i")
+    sections["activity.roots"] = array("i", roots)
+    sections["activity.org"], sections["activity.org.off"] = _csr(
+        sorted(activity_orgs[activity_id]) for activity_id in activity_ids
+    )
+
+    org_phones = defaultdict(list)
+    for phone_id, org_id, number in phones:
+        org_phones[org_id].append((phone_id, number))
+
+    sections["org.id"] = array("q", [row[0] for row in organizations])
+    sections["org.name"], sections["org.name.off"] = _strings(row[1] for row in organizations)
+    sections["org.building"] = array("q", [row[2] for row in organizations])
+    sections["org.activity"], sections["org.activity.off"] = _csr(
+        sorted(org_activities[row[0]]) for row in organizations
+    )
+
+    # Телефоны сгруппированы по организациям: org.phone.off — диапазоны в phone.*
+    grouped = [org_phones[row[0]] for row in organizations]
+    sections["phone.id"], sections["org.phone.off"] = _csr([phone_id for phone_id, _ in group] for group in grouped)
+    sections["phone.number"], sections["phone.number.off"] = _strings(
+        number for group in grouped for _, number in group
+    )
+    return sections
+
+
+# Пять выгрузок должны видеть одно состояние БД: при READ COMMITTED связь
+# могла бы ссылаться на организацию, которой нет в выгрузке организаций
+SNAPSHOT_READ_OPTIONS = {"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+
+SnapshotRows = tuple[list[tuple], list[tuple], list[tuple], list[tuple], list[tuple]]
+
+
+async def collect_rows(session: AsyncSession) -> SnapshotRows:
+    """
+    Прочитать справочник из БД одним согласованным снимком транзакции.
+
+    Должна выполняться первой в сессии: уровень изоляции задаётся при начале транзакции.
+    """
+    await session.connection(execution_options=SNAPSHOT_READ_OPTIONS)
+    buildings = await session.execute(
+        select(BuildingModel.id, BuildingModel.address, BuildingModel.latitude, BuildingModel.longitude)
+    )
+    activities = await session.execute(
+        select(ActivityModel.id, ActivityModel.name, ActivityModel.parent_id, ActivityModel.level)
+    )
+    organizations = await session.execute(
+        select(OrganizationModel.id, OrganizationModel.name, OrganizationModel.building_id)
+    )
+    links = await session.execute(
+        select(organization_activity.c.organization_id, organization_activity.c.activity_id)
+    )
+    phones = await session.execute(select(PhoneModel.id, PhoneModel.organization_id, PhoneModel.number))
+    return (
+        [tuple(row) for row in buildings],
+        [tuple(row) for row in activities],
+        [tuple(row) for row in organizations],
+        [tuple(row) for row in links],
+        [tuple(row) for row in phones]
+    )
+
+
+def write_rows(path: Path, rows: SnapshotRows) -> tuple[int, dict[str, array]]:
+    """Разложить строки по секциям и атомарно заменить файл снимка (синхронно, для отдельного потока)."""
+    sections = build_sections(*rows)
+    version = read_version(path) + 1
+    write_snapshot(path, sections, version)
+    return version, sections
+
+
+async def build_snapshot(path: Path) -> int:
+    """
+    Построить снимок из primary и атомарно заменить файл; возвращает новую версию.
+
+    В цикле событий выполняются только чтения из БД. Сборка секций (сортировки,
+    CSR-массивы) и запись файла с fsync идут в отдельном потоке уже после
+    возврата соединения в пул, чтобы не останавливать обработку запросов воркера.
+    """
+    # Полная выгрузка справочника дольше любого запроса API — без statement_timeout
+    async with session_scope(read_only=True, use_primary=True, statement_timeout=0) as session:
+        rows = await collect_rows(session)
+    version, sections = await asyncio.to_thread(write_rows, path, rows)
+    logger.info(
+        f"Снимок справочника v{version} записан в {path}: зданий {len(sections['building.id'])}, "
+        f"видов деятельности {len(sections['activity.id'])}, организаций {len(sections['org.id'])}"
+    )
+    return version
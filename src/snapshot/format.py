@@ -0,0 +1,102 @@
+"""
+Бинарный формат снимка справочника.
+
+Файл состоит из заголовка, каталога секций и самих секций. Каждая секция —
+плоский массив одного типа (typecode модуля array), выровненный по 8 байтам,
+поэтому после mmap секция читается через memoryview.cast без копирования.
+
+    header:   MAGIC (8) | byteorder (1) | pad (3) | section count (u32) | version (u64)
+    entry:    name (24, ASCII) | typecode (1) | pad (7) | offset (u64) | item count (u64)
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+MAGIC = b"ORGSNAP1"
+HEADER = struct.Struct("<8sc3xIQ")
+ENTRY = struct.Struct("<24sc7xQQ")
+ALIGN = 8
+BYTEORDER = b"L" if sys.byteorder == "little" else b"B"
+
+
+class SnapshotFormatError(Exception):
+    """Файл снимка повреждён или записан в несовместимом формате."""
+
+
+def _aligned(position: int) -> int:
+    return (position + ALIGN - 1) // ALIGN * ALIGN
+
+
+def read_version(path: Path) -> int:
+    """Версия снимка из заголовка или 0, если файла нет или он не читается."""
+    try:
+        with open(path, "rb") as f:
+            magic, _, _, version = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return 0
+    return version if magic == MAGIC else 0
+
+
+def write_snapshot(path: Path, sections: dict[str, array], version: int) -> None:
+    """
+    Атомарно записать снимок: во временный файл рядом с целевым, fsync, os.replace.
+
+    Читатели, уже отобразившие старый файл, продолжают работать с ним до перечитывания.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    position = _aligned(HEADER.size + ENTRY.size * len(sections))
+    entries = []
+    for name, data in sections.items():
+        entries.append(ENTRY.pack(name.encode("ascii"), data.typecode.encode("ascii"), position, len(data)))
+        position = _aligned(position + len(data) * data.itemsize)
+
+    fd, tmp_name = tempfile.mkstemp(prefix=path.name, suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, BYTEORDER, len(sections), version))
+            for entry in entries:
+                f.write(entry)
+            for data in sections.values():
+                f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+                data.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+class SnapshotFile:
+    """Снимок, отображённый в память только для чтения; секции — memoryview без копирования."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        magic, byteorder, count, self.version = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError(f"{self.path}: неизвестный формат")
+        if byteorder != BYTEORDER:
+            raise SnapshotFormatError(f"{self.path}: снимок записан с другим порядком байт")
+
+        buffer = memoryview(self._mmap)
+        self.sections: dict[str, memoryview] = {}
+        for i in range(count):
+            raw_name, typecode, offset, length = ENTRY.unpack_from(self._mmap, HEADER.size + i * ENTRY.size)
+            typecode = typecode.decode("ascii")
+            itemsize = array(typecode).itemsize
+            view = buffer[offset:offset + length * itemsize]
+            self.sections[raw_name.rstrip(b"\0").decode("ascii")] = view if typecode == "B" else view.cast(typecode)
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self.sections[name]
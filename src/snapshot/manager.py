@@ -0,0 +1,161 @@
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from pathlib import Path
+
+from fastapi import HTTPException, Request
+
+from src.core.changes import Change
+from src.core.config import settings
+from src.core.session import reads_from_primary
+from src.snapshot.builder import build_snapshot
+from src.snapshot.format import SnapshotFile, SnapshotFormatError
+from src.snapshot.store import DirectorySnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotManager:
+    """
+    Жизненный цикл снимка в воркере: отображение файла, перечитывание и перестроение.
+
+    Все воркеры хоста отображают один и тот же файл, поэтому страницы снимка
+    лежат в page cache в одном экземпляре. Изменение файла (новый inode после
+    os.replace) замечается не чаще раза в check_interval секунд. Перестроение
+    после записей откладывается на rebuild_delay, чтобы серия записей дала
+    одну сборку; сборки разных воркеров сериализуются файловой блокировкой,
+    и воркер пропускает сборку, если другой уже собрал снимок после изменения.
+    """
+
+    def __init__(self, path: Path, check_interval: float, rebuild_delay: float):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.rebuild_delay = rebuild_delay
+        self._snapshot: DirectorySnapshot | None = None
+        self._checked_at = 0.0
+        self._dirty = False
+        self._requested_at = 0.0
+        self._rebuild_task: asyncio.Task | None = None
+
+    @property
+    def version(self) -> int | None:
+        return None if self._snapshot is None else self._snapshot.version
+
+    def current(self) -> DirectorySnapshot | None:
+        """Актуальный снимок или None, если он ещё не построен."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._reload_if_changed()
+        return self._snapshot
+
+    def _reload_if_changed(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._snapshot is not None and self._snapshot.file.identity == identity:
+            return
+        try:
+            self._snapshot = DirectorySnapshot(SnapshotFile(self.path))
+        except (OSError, SnapshotFormatError) as e:
+            logger.error(f"Не удалось открыть снимок {self.path}: {e}")
+            return
+        logger.info(f"Открыт снимок справочника v{self._snapshot.version}")
+
+    async def rebuild(self, newer_than: float | None = None) -> None:
+        """
+        Перестроить снимок из primary под межпроцессной блокировкой и сразу перечитать.
+
+        В файле блокировки хранится время начала последней сборки: если она
+        началась не раньше newer_than, снимок уже содержит нужные изменения
+        и повторная сборка пропускается.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a+") as lock:
+            await asyncio.to_thread(fcntl.flock, lock.fileno(), fcntl.LOCK_EX)
+            try:
+                lock.seek(0)
+                last_started = float(lock.read() or 0)
+                if newer_than is None or last_started < newer_than:
+                    started = time.time()
+                    await build_snapshot(self.path)
+                    lock.seek(0)
+                    lock.truncate()
+                    lock.write(repr(started))
+                    lock.flush()
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        self._checked_at = time.monotonic()
+        self._reload_if_changed()
+
+    def schedule_rebuild(self) -> None:
+        """Запланировать перестроение после записи (с объединением серии записей)."""
+        if not self._dirty:
+            self._requested_at = time.time()
+        self._dirty = True
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild_when_idle())
+
+    def on_change(self, change: Change | None) -> None:
+        """
+        Подписчик шины изменений: перестроить снимок после записи любого процесса.
+
+        None (подключение слушателя или разрыв) тоже ведёт к перестроению: файл
+        мог устареть, пока уведомления не доходили.
+        """
+        self.schedule_rebuild()
+
+    async def _rebuild_when_idle(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.rebuild_delay)
+            self._dirty = False
+            try:
+                await self.rebuild(newer_than=self._requested_at)
+            except Exception as e:
+                logger.error(f"Ошибка перестроения снимка справочника: {e}")
+
+    async def start(self, build_missing: bool = True) -> None:
+        """Открыть снимок при старте воркера, построив его, если файла ещё нет."""
+        self._reload_if_changed()
+        if self._snapshot is None and build_missing:
+            await self.rebuild()
+
+    async def stop(self) -> None:
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+            try:
+                await self._rebuild_task
+            except asyncio.CancelledError:
+                pass
+
+
+snapshot_manager = SnapshotManager(
+    settings.SNAPSHOT_PATH, settings.SNAPSHOT_CHECK_INTERVAL, settings.SNAPSHOT_REBUILD_DELAY
+)
+
+
+def current_snapshot(request: Request | None = None) -> DirectorySnapshot | None:
+    """
+    Снимок для обслуживания чтений или None, если снимки выключены или не готовы.
+
+    Снимок перестраивается с задержкой после записи, поэтому клиент в окне
+    read-your-writes (см. reads_from_primary) читает из БД, как и мимо реплик.
+    """
+    if settings.READ_ONLY_MODE:
+        return snapshot_manager.current()
+    if settings.SNAPSHOT_ENABLED and not (request is not None and reads_from_primary(request)):
+        return snapshot_manager.current()
+    return None
+
+
+def serving_snapshot() -> DirectorySnapshot:
+    """Снимок в режиме только для чтения; без него обслуживать запросы нечем."""
+    snapshot = snapshot_manager.current()
+    if snapshot is None:
+        logger.error(f"Снимок справочника {snapshot_manager.path} не загружен")
+        raise HTTPException(status_code=503, detail="Снимок справочника не загружен")
+    return snapshot
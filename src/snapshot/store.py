@@ -0,0 +1,236 @@
+"""
+Запросы к снимку справочника: поиск по ID, дерево видов деятельности, геопоиск.
+
+Индексы лежат в секциях снимка (см. builder.build_sections), поэтому открытие
+снимка не требует ни разбора, ни построения структур в памяти процесса;
+исключение — индекс названий для поиска, он строится при первом обращении.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from functools import cached_property
+
+from src.snapshot.format import SnapshotFile
+
+EARTH_RADIUS_KM = 6371
+
+
+class DirectorySnapshot:
+    """Справочник поверх отображённого в память файла снимка."""
+
+    def __init__(self, snapshot: SnapshotFile):
+        self.file = snapshot
+        self.version = snapshot.version
+
+        self.building_ids = snapshot["building.id"]
+        self.building_lat = snapshot["building.lat"]
+        self.building_lon = snapshot["building.lon"]
+        self.building_by_lat = snapshot["building.by_lat"]
+        self.building_lat_sorted = snapshot["building.lat_sorted"]
+
+        self.activity_ids = snapshot["activity.id"]
+        self.activity_parent = snapshot["activity.parent"]
+        self.activity_level = snapshot["activity.level"]
+        self.activity_roots = snapshot["activity.roots"]
+
+        self.org_ids = snapshot["org.id"]
+        self.org_building = snapshot["org.building"]
+
+    # Общие помощники
+
+    @staticmethod
+    def _position(ids: memoryview, value: int) -> int | None:
+        i = bisect_left(ids, value)
+        return i if i < len(ids) and ids[i] == value else None
+
+    def _string(self, name: str, i: int) -> str:
+        offsets = self.file[f"{name}.off"]
+        return bytes(self.file[name][offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def _slice(self, name: str, i: int) -> memoryview:
+        offsets = self.file[f"{name}.off"]
+        return self.file[name][offsets[i]:offsets[i + 1]]
+
+    # Здания
+
+    @property
+    def building_count(self) -> int:
+        return len(self.building_ids)
+
+    def _building(self, i: int) -> dict:
+        return {
+            "id": self.building_ids[i],
+            "address": self._string("building.addr", i),
+            "latitude": self.building_lat[i],
+            "longitude": self.building_lon[i],
+        }
+
+    def building(self, building_id: int) -> dict | None:
+        i = self._position(self.building_ids, building_id)
+        return None if i is None else self._building(i)
+
+    def buildings_page(self, offset: int, limit: int) -> list[dict]:
+        return [self._building(i) for i in range(offset, min(offset + limit, self.building_count))]
+
+    def buildings_in_rectangle(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> list[int]:
+        """Позиции зданий в прямоугольнике: диапазон по широте бинпоиском, затем фильтр по долготе."""
+        lo = bisect_left(self.building_lat_sorted, min_lat)
+        hi = bisect_right(self.building_lat_sorted, max_lat)
+        lon = self.building_lon
+        return [i for i in self.building_by_lat[lo:hi] if min_lng <= lon[i] <= max_lng]
+
+    def buildings_in_radius(self, latitude: float, longitude: float, radius_km: float) -> list[tuple[int, float]]:
+        """
+        Позиции зданий в радиусе и расстояния до них (км).
+
+        Кандидаты отбираются по полосе широт, расстояние считается той же формулой
+        сферического закона косинусов, что и в SQL-запросе поиска.
+        """
+        delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        lo = bisect_left(self.building_lat_sorted, latitude - delta)
+        hi = bisect_right(self.building_lat_sorted, latitude + delta)
+
+        lat0, lon0 = math.radians(latitude), math.radians(longitude)
+        sin0, cos0 = math.sin(lat0), math.cos(lat0)
+        found = []
+        for i in self.building_by_lat[lo:hi]:
+            lat = math.radians(self.building_lat[i])
+            cos_angle = cos0 * math.cos(lat) * math.cos(math.radians(self.building_lon[i]) - lon0) + sin0 * math.sin(lat)
+            distance = EARTH_RADIUS_KM * math.acos(max(-1.0, min(1.0, cos_angle)))
+            if distance <= radius_km:
+                found.append((i, distance))
+        return found
+
+    def organizations_by_distance(self, latitude: float, longitude: float, radius_km: float) -> list[tuple[float, int]]:
+        """Пары (расстояние, ID организации) в радиусе, по возрастанию — порядок select_nearest."""
+        return sorted(
+            (distance, org_id)
+            for i, distance in self.buildings_in_radius(latitude, longitude, radius_km)
+            for org_id in self.building_organizations(i)
+        )
+
+    def building_id(self, i: int) -> int:
+        return self.building_ids[i]
+
+    def building_organizations(self, i: int) -> memoryview:
+        """ID организаций здания в позиции i (по возрастанию)."""
+        return self._slice("building.org", i)
+
+    def organizations_in_buildings(self, positions: list[int]) -> list[int]:
+        return sorted(org_id for i in positions for org_id in self.building_organizations(i))
+
+    # Виды деятельности
+
+    def _activity(self, i: int) -> dict:
+        parent = self.activity_parent[i]
+        return {
+            "id": self.activity_ids[i],
+            "name": self._string("activity.name", i),
+            "parent_id": None if parent < 0 else parent,
+            "level": self.activity_level[i],
+        }
+
+    def activity(self, activity_id: int) -> dict | None:
+        i = self._position(self.activity_ids, activity_id)
+        return None if i is None else self._activity(i)
+
+    def _tree(self, i: int, current_level: int, max_level: int = 2) -> dict:
+        children = []
+        if current_level < max_level:
+            children = [self._tree(child, current_level + 1, max_level) for child in self._slice("activity.child", i)]
+        return {**self._activity(i), "level": current_level, "children": children}
+
+    def activity_tree(self, activity_id: int) -> dict | None:
+        """Поддерево вида деятельности в форме схемы ActivityWithChildren."""
+        i = self._position(self.activity_ids, activity_id)
+        return None if i is None else self._tree(i, self.activity_level[i])
+
+    def activity_forest(self) -> list[dict]:
+        return [self._tree(i, 0) for i in self.activity_roots]
+
+    def activity_organizations(self, activity_id: int) -> memoryview:
+        """ID организаций, связанных с видом деятельности (по возрастанию)."""
+        i = self._position(self.activity_ids, activity_id)
+        return self.file["activity.org"][0:0] if i is None else self._slice("activity.org", i)
+
+    # Организации
+
+    def organization_activities(self, org_id: int) -> memoryview:
+        i = self._position(self.org_ids, org_id)
+        return self.file["org.activity"][0:0] if i is None else self._slice("org.activity", i)
+
+    @cached_property
+    def _org_names_lower(self) -> list[str]:
+        """Индекс для поиска по названию (ILIKE): строится при первом поиске."""
+        return [self._string("org.name", i).lower() for i in range(len(self.org_ids))]
+
+    def _organization(self, i: int) -> dict:
+        org_id = self.org_ids[i]
+        building_id = self.org_building[i]
+        phone_offsets = self.file["org.phone.off"]
+        phone_ids = self.file["phone.id"]
+        return {
+            "id": org_id,
+            "name": self._string("org.name", i),
+            "building_id": building_id,
+            "building": self.building(building_id),
+            "activities": [self.activity(activity_id) for activity_id in self._slice("org.activity", i)],
+            "phones": [
+                {"id": phone_ids[j], "number": self._string("phone.number", j), "organization_id": org_id}
+                for j in range(phone_offsets[i], phone_offsets[i + 1])
+            ],
+        }
+
+    def organization(self, org_id: int) -> dict | None:
+        """Организация в форме схемы Organization."""
+        i = self._position(self.org_ids, org_id)
+        return None if i is None else self._organization(i)
+
+    def find_organizations(
+            self,
+            building_id: int | None = None,
+            activity_id: int | None = None,
+            name: str | None = None
+    ) -> list[int]:
+        """ID организаций по фильтрам list_organizations, по возрастанию."""
+        candidates = None
+        if building_id:
+            i = self._position(self.building_ids, building_id)
+            candidates = set() if i is None else set(self.building_organizations(i))
+        if activity_id:
+            linked = set(self.activity_organizations(activity_id))
+            candidates = linked if candidates is None else candidates & linked
+
+        if name:
+            needle = name.lower()
+            names = self._org_names_lower
+            positions = range(len(self.org_ids)) if candidates is None else (
+                self._position(self.org_ids, org_id) for org_id in candidates
+            )
+            return sorted(self.org_ids[i] for i in positions if i is not None and needle in names[i])
+
+        return list(self.org_ids) if candidates is None else sorted(candidates)
+
+    def activity_facets(self, org_ids: list[int]) -> list[dict]:
+        """
+        Число организаций по видам деятельности с накоплением по дереву
+        в форме схемы ActivityFacet, как select_activity_facets.
+        """
+        counts: dict[int, int] = {}
+        for org_id in org_ids:
+            seen = set()
+            for activity_id in self.organization_activities(org_id):
+                while activity_id >= 0 and activity_id not in seen:
+                    seen.add(activity_id)
+                    i = self._position(self.activity_ids, activity_id)
+                    activity_id = -1 if i is None else self.activity_parent[i]
+            for activity_id in seen:
+                counts[activity_id] = counts.get(activity_id, 0) + 1
+        facets = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{**self.activity(activity_id), "count": count} for activity_id, count in facets]
+
+    def organizations_page(self, org_ids: list[int], page: int, size: int) -> dict:
+        """Страница организаций в форме схемы PaginatedResponse."""
+        items = []
+        for org_id in org_ids[(page - 1) * size:page * size]:
+            items.append(self._organization(self._position(self.org_ids, org_id)))
+        return {"total": len(org_ids), "page": page, "size": size, "items": items}
@@ -0,0 +1,71 @@
+"""
+Общие фикстуры тестов.
+
+Тесты работают с реальной БД PostgreSQL: её имя задаётся TEST_DB_NAME
+(хост и учётные данные — как у приложения, DB_HOST/DB_USER/...). Без
+TEST_DB_NAME тесты, которым нужна БД, пропускаются. База очищается и
+заполняется синтетическими данными генератора бенчмарка.
+"""
+import asyncio
+import os
+
+import pytest
+
+TEST_DB_NAME = os.environ.get("TEST_DB_NAME")
+
+# Настройки читаются при импорте src, поэтому окружение задаётся до него
+os.environ.setdefault("API_KEY", "test-api-key")
+if TEST_DB_NAME:
+    os.environ["DB_NAME"] = TEST_DB_NAME
+os.environ.update({
+    "SQL_STATEMENTS_HEADER": "True",
+    "SNAPSHOT_ENABLED": "False",
+    "READ_ONLY_MODE": "False",
+    "CHANGE_NOTIFICATIONS_ENABLED": "False",
+    "DB_WARMUP_ENABLED": "False",
+    "DB_MIGRATE_ON_STARTUP": "True",
+    "DB_REPLICA_HOSTS": "",
+})
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Клиент приложения (с lifespan) поверх тестовой БД с синтетическими данными."""
+    if not TEST_DB_NAME:
+        pytest.skip("TEST_DB_NAME не задан: тестам нужна отдельная БД PostgreSQL")
+
+    from fastapi.testclient import TestClient
+
+    import main
+    from bench.datagen import generate
+    from src.core.config import settings
+
+    test_client = TestClient(main.app, headers={"x-api-key": settings.API_KEY})
+    try:
+        test_client.__enter__()
+    except OSError as e:
+        pytest.skip(f"Тестовая БД недоступна: {e}")
+    try:
+        asyncio.run(generate(settings.DATABASE_URL, buildings=50, organizations=300, reset=True))
+        yield test_client
+    finally:
+        test_client.__exit__(None, None, None)
+
+
+@pytest.fixture
+def snapshot(client, monkeypatch, tmp_path):
+    """
+    Включённый снимок справочника, собранный из тестовой БД.
+
+    Хуки коммита тестового приложения не подключены, поэтому после записей
+    снимок не перестраивается и отстаёт от БД.
+    """
+    from src.core.config import settings
+    from src.snapshot import snapshot_manager
+
+    monkeypatch.setattr(settings, "SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(snapshot_manager, "path", tmp_path / "directory.snapshot")
+    monkeypatch.setattr(snapshot_manager, "_snapshot", None)
+    client.portal.call(snapshot_manager.rebuild)
+    yield snapshot_manager.current()
+    client.cookies.clear()
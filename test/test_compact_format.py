@@ -0,0 +1,84 @@
+"""Компактный формат страниц организаций (согласование по заголовку Accept)."""
+import pytest
+
+from src.core.serialization import (
+    COMPACT_JSON_TYPE, COMPACT_MSGPACK_TYPE, compact_page, msgpack, page_media_type
+)
+
+BUILDING = {"id": 1, "address": "ул. Ленина, 1", "latitude": 55.75, "longitude": 37.62}
+FOOD = {"id": 1, "name": "Еда", "parent_id": None, "level": 1}
+MEAT = {"id": 2, "name": "Мясная продукция", "parent_id": 1, "level": 2}
+
+
+def organization(org_id: int, activities: list[dict]) -> dict:
+    return {
+        "id": org_id,
+        "name": f"Организация {org_id}",
+        "building_id": BUILDING["id"],
+        "building": BUILDING,
+        "activities": activities,
+        "phones": [{"id": org_id, "number": f"8-800-000-00-0{org_id}", "organization_id": org_id}],
+    }
+
+
+def expand(compact: dict) -> dict:
+    """Восстановить обычную страницу из компактной."""
+    buildings = {building["id"]: building for building in compact["buildings"]}
+    activities = {activity["id"]: activity for activity in compact["activities"]}
+    page = {key: value for key, value in compact.items() if key not in ("buildings", "activities", "items")}
+    page["items"] = [
+        {
+            **{key: value for key, value in item.items() if key not in ("activity_ids", "phones")},
+            "building": buildings[item["building_id"]],
+            "activities": [activities[activity_id] for activity_id in item["activity_ids"]],
+            "phones": [{**phone, "organization_id": item["id"]} for phone in item["phones"]],
+        }
+        for item in compact["items"]
+    ]
+    return page
+
+
+def test_compact_page_lists_shared_objects_once():
+    page = {"total": 2, "page": 1, "size": 10, "items": [organization(1, [FOOD, MEAT]), organization(2, [MEAT])]}
+    compact = compact_page(page)
+
+    assert compact["buildings"] == [BUILDING]
+    assert compact["activities"] == [FOOD, MEAT]
+    assert [item["activity_ids"] for item in compact["items"]] == [[1, 2], [2]]
+    assert expand(compact) == page
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "application/json"),
+    ("*/*", "application/json"),
+    ("application/json", "application/json"),
+    (COMPACT_JSON_TYPE, COMPACT_JSON_TYPE),
+    (f"{COMPACT_JSON_TYPE}, */*;q=0.1", COMPACT_JSON_TYPE),
+    (f"application/json, {COMPACT_JSON_TYPE};q=0.5", "application/json"),
+    (f"{COMPACT_JSON_TYPE};q=0", "application/json"),
+])
+def test_page_media_type(accept, expected):
+    assert page_media_type(accept) == expected
+
+
+def test_msgpack_only_when_installed():
+    expected = COMPACT_MSGPACK_TYPE if msgpack is not None else "application/json"
+    assert page_media_type(COMPACT_MSGPACK_TYPE) == expected
+
+
+RECTANGLE = {"min_lat": 55.6, "max_lat": 55.9, "min_lng": 37.4, "max_lng": 37.8}
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("GET", "/organizations/", None),
+    ("POST", "/search/rectangle", RECTANGLE),
+])
+def test_compact_response_matches_json(client, method, path, body):
+    params = {"size": 100}
+    plain = client.request(method, path, params=params, json=body)
+    compact = client.request(method, path, params=params, json=body, headers={"Accept": COMPACT_JSON_TYPE})
+
+    assert compact.headers["content-type"] == COMPACT_JSON_TYPE
+    assert compact.headers["vary"] == "Accept"
+    assert len(compact.content) < len(plain.content)
+    assert expand(compact.json()) == plain.json()
@@ -0,0 +1,109 @@
+"""Отмена обработки при отключении клиента (DisconnectCancelMiddleware) и таймауты запросов к БД."""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from src.core.errors import QUERY_CANCELED, is_statement_timeout, statement_timeout_to_http
+from src.middleware.disconnect import DisconnectCancelMiddleware
+
+
+async def disconnect_after(app, path: str, delay: float) -> list[dict]:
+    """Выполнить GET path и отключить клиента через delay секунд; вернуть отправленные сообщения."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "server": ("test", 80), "client": ("test", 1024),
+    }
+    requested = False
+    sent = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(delay)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await asyncio.wait_for(DisconnectCancelMiddleware(app)(scope, receive, send), 5)
+    return sent
+
+
+def test_handler_cancelled_on_disconnect():
+    app = FastAPI()
+    cancelled = []
+
+    @app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    assert asyncio.run(disconnect_after(app, "/slow", 0.05)) == []
+    assert cancelled == [True]
+
+
+def test_event_stream_ends_on_disconnect(monkeypatch):
+    from src.api.events import STREAM_PREAMBLE, router
+    from src.core.config import settings
+    from src.core.events import event_hub
+
+    monkeypatch.setattr(settings, "CHANGE_NOTIFICATIONS_ENABLED", True)
+    app = FastAPI()
+    app.include_router(router)
+
+    sent = asyncio.run(disconnect_after(app, "/events/", 0.1))
+    assert sent[0]["type"] == "http.response.start" and sent[0]["status"] == 200
+    assert sent[1]["body"] == STREAM_PREAMBLE
+    assert event_hub.stats()["subscribers"] == 0
+
+
+class QueryCanceled(Exception):
+    sqlstate = QUERY_CANCELED
+
+
+def test_statement_timeout_maps_to_504():
+    error = DBAPIError("SELECT pg_sleep(1)", None, QueryCanceled("canceling statement due to statement timeout"))
+    assert is_statement_timeout(error)
+    assert statement_timeout_to_http(error).status_code == 504
+    assert not is_statement_timeout(DBAPIError("SELECT 1", None, Exception("connection lost")))
+
+
+def test_cancelled_query_returns_connection(client):
+    from src.core.database import async_engine
+    from src.core.session import session_scope, session_tracker
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        async with session_scope(read_only=True) as session:
+            await session.execute(text("SELECT pg_sleep(10)"))
+
+    started = time.monotonic()
+    assert client.portal.call(disconnect_after, app, "/slow", 0.2) == []
+    assert time.monotonic() - started < 5
+    assert async_engine.pool.checkedout() == 0
+    assert session_tracker.active == 0
+
+
+def test_database_statement_timeout(client):
+    from src.core.session import session_scope
+
+    async def sleep_past_timeout():
+        async with session_scope(read_only=True, statement_timeout=50) as session:
+            await session.execute(text("SELECT pg_sleep(1)"))
+
+    with pytest.raises(DBAPIError) as error:
+        client.portal.call(sleep_past_timeout)
+    assert is_statement_timeout(error.value)
+    assert statement_timeout_to_http(error.value).status_code == 504
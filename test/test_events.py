@@ -0,0 +1,106 @@
+"""Поток изменений справочника: EventHub и эндпоинт SSE."""
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, update
+
+from src.core.changes import Change, ChangeBus, ChangeListener
+from src.core.config import settings
+from src.core.events import RESYNC, EventFilter, EventHub
+
+
+def parse(item: bytes) -> dict:
+    """Событие SSE `change` в виде словаря."""
+    event, data = item.decode().rstrip("\n").split("\n")
+    assert event == "event: change"
+    return json.loads(data.removeprefix("data: "))
+
+
+def test_insert_and_update_coalesce():
+    hub = EventHub(queue_size=10, max_subscribers=10, batch_delay=0.01)
+
+    async def run():
+        subscription = hub.subscribe(EventFilter())
+        hub.on_change(Change("organizations", "INSERT", id=5, building_id=1, updated_at="2026-01-01T00:00:00"))
+        hub.on_change(Change("organizations", "UPDATE", id=5, building_id=1, updated_at="2026-01-01T00:00:01"))
+        hub.on_change(Change("phones", "INSERT", id=9, organization_id=5, updated_at="2026-01-01T00:00:02"))
+        hub.on_change(Change("buildings", "UPDATE", id=1, updated_at="2026-01-01T00:00:03"))
+        await asyncio.sleep(0.05)
+        return [parse(subscription.queue.get_nowait()) for _ in range(subscription.queue.qsize())]
+
+    assert asyncio.run(run()) == [
+        {"type": "organization", "id": 5, "op": "insert", "updated_at": "2026-01-01T00:00:02"},
+        {"type": "building", "id": 1, "op": "update", "updated_at": "2026-01-01T00:00:03"},
+    ]
+
+
+def test_slow_subscriber_gets_resync():
+    hub = EventHub(queue_size=2, max_subscribers=10, batch_delay=0.01)
+
+    async def run():
+        subscription = hub.subscribe(EventFilter())
+        for org_id in range(1, 4):
+            hub.on_change(Change("organizations", "UPDATE", id=org_id))
+        await asyncio.sleep(0.05)
+        return subscription
+
+    subscription = asyncio.run(run())
+    assert subscription.queue.get_nowait() is RESYNC
+    assert subscription.queue.empty()
+    assert subscription.dropped == 2
+
+
+def test_subscriber_limit(monkeypatch):
+    from src.api.events import router
+    from src.core.events import event_hub
+
+    monkeypatch.setattr(settings, "CHANGE_NOTIFICATIONS_ENABLED", True)
+    monkeypatch.setattr(event_hub, "max_subscribers", 0)
+    app = FastAPI()
+    app.include_router(router)
+
+    response = TestClient(app).get("/events/")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert event_hub.stats()["subscribers"] == 0
+
+
+def test_committed_change_reaches_subscriber(client):
+    from src.core.session import session_scope
+    from src.models.organization import Organization as OrganizationModel
+
+    bus = ChangeBus()
+    listener = ChangeListener(settings.DATABASE_URL, bus, reconnect_delay=0.1)
+    hub = EventHub(queue_size=10, max_subscribers=10, batch_delay=0.3)
+    bus.subscribe(hub.on_change)
+
+    async def run():
+        listener.start()
+        try:
+            while not listener.connected:
+                await asyncio.sleep(0.01)
+            # Фильтр по зданию: здание организации загружается из БД перед рассылкой
+            subscription = hub.subscribe(EventFilter(building_id=1))
+
+            async with session_scope() as session:
+                org_id = (await session.execute(
+                    insert(OrganizationModel).values(name="Событие SSE", building_id=1).returning(OrganizationModel.id)
+                )).scalar()
+            async with session_scope() as session:
+                await session.execute(
+                    update(OrganizationModel).where(OrganizationModel.id == org_id).values(name="Событие SSE 2")
+                )
+
+            item = await asyncio.wait_for(subscription.queue.get(), 5)
+            await asyncio.sleep(0.5)
+            return org_id, item, subscription.queue.qsize()
+        finally:
+            await listener.stop()
+            await hub.stop()
+
+    org_id, item, remaining = client.portal.call(run)
+    event = parse(item)
+    assert (event["type"], event["id"], event["op"]) == ("organization", org_id, "insert")
+    assert remaining == 0
@@ -0,0 +1,81 @@
+"""Повтор запросов создания по Idempotency-Key (IdempotencyMiddleware)."""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from src.middleware.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, IdempotencyMiddleware
+
+
+def make_app(**options) -> FastAPI:
+    """Приложение с одним эндпоинтом создания, считающим свои выполнения."""
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, **options)
+    app.state.calls = 0
+
+    @app.post("/organizations/")
+    async def create(payload: dict):
+        app.state.calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": app.state.calls, **payload}
+
+    return app
+
+
+def post(app: FastAPI, *requests: tuple[str, dict], pause: float = 0) -> list[httpx.Response]:
+    """Отправить запросы (ключ, тело) одновременно; pause — задержка перед отправкой."""
+    async def send():
+        await asyncio.sleep(pause)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/organizations/", json=body, headers={IDEMPOTENCY_HEADER: key})
+                for key, body in requests
+            ))
+
+    return asyncio.run(send())
+
+
+def test_replay_returns_stored_response():
+    app = make_app()
+    first, = post(app, ("key-1", {"name": "Первая"}))
+    replay, = post(app, ("key-1", {"name": "Первая"}))
+
+    assert app.state.calls == 1
+    assert replay.status_code == first.status_code == 200
+    assert replay.json() == first.json() == {"id": 1, "name": "Первая"}
+    assert replay.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+
+
+def test_key_reused_with_other_body_is_rejected():
+    app = make_app()
+    post(app, ("key-1", {"name": "Первая"}))
+    reused, = post(app, ("key-1", {"name": "Другая"}))
+
+    assert reused.status_code == 422
+    assert app.state.calls == 1
+
+
+def test_concurrent_duplicates_execute_once():
+    app = make_app()
+    responses = post(app, *[("key-1", {"name": "Первая"})] * 5)
+
+    assert app.state.calls == 1
+    assert [response.json() for response in responses] == [{"id": 1, "name": "Первая"}] * 5
+    assert sum(REPLAYED_HEADER in response.headers for response in responses) == 4
+
+
+def test_stored_responses_are_evicted():
+    app = make_app(max_entries=1)
+    post(app, ("key-1", {"name": "Первая"}))
+    post(app, ("key-2", {"name": "Вторая"}))
+    again, = post(app, ("key-1", {"name": "Первая"}))
+    assert app.state.calls == 3
+    assert REPLAYED_HEADER not in again.headers
+
+    app = make_app(ttl=0.1)
+    post(app, ("key-1", {"name": "Первая"}))
+    expired, = post(app, ("key-1", {"name": "Первая"}), pause=0.2)
+    assert app.state.calls == 2
+    assert REPLAYED_HEADER not in expired.headers
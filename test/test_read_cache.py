@@ -0,0 +1,50 @@
+"""Инвалидация кэша чтений по уведомлениям об изменениях."""
+import json
+
+from src.core.cache import ReadCache, TTLCache
+from src.core.changes import Change
+
+
+def filled_cache() -> ReadCache:
+    cache = ReadCache(max_entries=100, ttl=60, settle=0)
+    cache.enabled = True
+    for org_id in range(1, 4):
+        cache.set(("organization", org_id), b"{}", started_at=0)
+    cache.set(("organizations", None, None, None, 1, 10, False), b"{}", started_at=0)
+    cache.set(("activities",), b"[]", started_at=0)
+    return cache
+
+
+def test_invalidate_by_entity_and_kind():
+    cache = filled_cache()
+    assert cache.invalidate({"organization"}, 2) == 1
+    assert cache.get(("organization", 2)) is None
+    assert cache.get(("organization", 1)) is not None
+
+    assert cache.invalidate({"organization", "organizations"}) == 3
+    assert cache.invalidate({"organization", "organizations"}) == 0
+    assert cache.get(("activities",)) is not None
+
+
+def test_evicted_keys_leave_index():
+    cache = TTLCache(max_entries=2, ttl=60, groups=lambda key: [key[0]])
+    for i in range(5):
+        cache.set(("organization", i), i)
+    assert cache.discard_group("organization") == 2
+    assert len(cache) == 0
+
+
+def test_statement_notification_carries_all_rows():
+    payload = json.dumps({"table": "phones", "op": "DELETE", "rows": [
+        [10, 1, None, None, None, "2026-01-01T00:00:00"],
+        [11, 1, None, None, None, "2026-01-01T00:00:00"],
+    ]})
+    changes = Change.from_payload(payload)
+    assert [(change.table, change.op, change.id, change.organization_id) for change in changes] == [
+        ("phones", "DELETE", 10, 1), ("phones", "DELETE", 11, 1)
+    ]
+
+
+def test_row_notification_still_accepted():
+    changes = Change.from_payload(json.dumps({"table": "organizations", "op": "UPDATE", "id": 5, "building_id": 2}))
+    assert [(change.id, change.building_id) for change in changes] == [(5, 2)]
@@ -0,0 +1,100 @@
+"""Поиск в радиусе по расстоянию и keyset-пагинация по курсору (order_by=distance)."""
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.search import decode_cursor, encode_cursor
+
+MALFORMED_CURSORS = [
+    "не курсор",
+    base64.urlsafe_b64encode(b"1.5").decode(),
+    base64.urlsafe_b64encode(b"1.5:2:3").decode(),
+    base64.urlsafe_b64encode(b"abc:2").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+]
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(0.1 + 0.2, 42)) == (0.1 + 0.2, 42)
+    assert decode_cursor(encode_cursor(0.0, 1)) == (0.0, 1)
+
+
+@pytest.mark.parametrize("cursor", MALFORMED_CURSORS)
+def test_malformed_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+@pytest.fixture(scope="module")
+def tied(client):
+    """Центр поиска в здании 1, где несколько организаций на одном расстоянии."""
+    building = client.get("/buildings/1").json()
+    for i in range(3):
+        response = client.post("/organizations/", json={"name": f"Соседи по зданию {i}", "building_id": 1})
+        assert response.status_code == 200, response.text
+    client.cookies.clear()
+    return {"latitude": building["latitude"], "longitude": building["longitude"], "radius_km": 1}
+
+
+def nearest(client, params: dict, size: int, cursor: str | None = None) -> dict:
+    query = {"order_by": "distance", "size": size}
+    if cursor is not None:
+        query["cursor"] = cursor
+    response = client.post("/search/radius", params=query, json=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def walk(client, params: dict, size: int) -> list[dict]:
+    """Все страницы по next_cursor до последней."""
+    items, cursor = [], None
+    while True:
+        page = nearest(client, params, size, cursor)
+        assert len(page["items"]) <= size
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_cursor_pages_through_ties(client, tied):
+    everything = nearest(client, tied, 100)
+    assert everything["next_cursor"] is None
+    assert everything["total"] == len(everything["items"])
+    distances = [item["distance_km"] for item in everything["items"]]
+    assert distances == sorted(distances)
+    assert distances.count(distances[0]) >= 3
+
+    # Размер страницы 2 разрезает группу организаций на одном расстоянии
+    walked = walk(client, tied, 2)
+    assert [item["id"] for item in walked] == [item["id"] for item in everything["items"]]
+
+
+def test_last_page_has_no_cursor(client, tied):
+    total = nearest(client, tied, 1)["total"]
+    assert nearest(client, tied, total)["next_cursor"] is None
+
+    cursor = nearest(client, tied, total - 1)["next_cursor"]
+    last = nearest(client, tied, total - 1, cursor)
+    assert len(last["items"]) == 1
+    assert last["next_cursor"] is None
+
+
+def test_malformed_cursor_is_rejected(client, tied):
+    for cursor in MALFORMED_CURSORS:
+        response = client.post("/search/radius", params={"order_by": "distance", "cursor": cursor}, json=tied)
+        assert response.status_code == 400, cursor
+
+
+def test_snapshot_matches_db(client, tied, snapshot, monkeypatch):
+    from src.core.config import settings
+
+    from_snapshot = walk(client, tied, 2)
+    monkeypatch.setattr(settings, "SNAPSHOT_ENABLED", False)
+    from_db = walk(client, tied, 2)
+
+    assert [item["id"] for item in from_snapshot] == [item["id"] for item in from_db]
+    assert [item["distance_km"] for item in from_snapshot] == pytest.approx([item["distance_km"] for item in from_db])
+    assert from_snapshot == [{**item, "distance_km": snap["distance_km"]} for item, snap in zip(from_db, from_snapshot)]
@@ -0,0 +1,119 @@
+"""Объединение одинаковых одновременных чтений (SingleFlight, coalesced_read)."""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from starlette.requests import Request
+
+from src.core.singleflight import SingleFlight
+
+
+class LoadError(Exception):
+    pass
+
+
+def counting(calls: list, result=None, error: Exception | None = None, delay: float = 0.05):
+    """Работа, которая отмечает каждый запуск в calls и отдаёт result или error."""
+    async def fn():
+        calls.append(True)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return fn
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", counting(calls, {"id": 1})) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+
+def test_leader_error_reaches_all_waiters():
+    flights = SingleFlight()
+    calls = []
+    error = LoadError("сбой чтения")
+
+    async def run():
+        return await asyncio.gather(
+            *(flights.do("key", counting(calls, error=error)) for _ in range(3)), return_exceptions=True
+        )
+
+    assert asyncio.run(run()) == [error] * 3
+    assert len(calls) == 1
+
+
+def test_finished_call_is_forgotten():
+    flights = SingleFlight()
+    calls = []
+
+    async def run():
+        with pytest.raises(LoadError):
+            await flights.do("key", counting(calls, error=LoadError()))
+        return await flights.do("key", counting(calls, 2))
+
+    assert asyncio.run(run()) == 2
+    assert len(calls) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def run():
+        leader = asyncio.create_task(flights.do("key", counting(calls, 1)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("key", counting(calls, 1)))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == 1
+    assert len(calls) == 1
+
+
+def read_request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def test_coalesced_read_runs_one_query(client):
+    from src.core.singleflight import coalesced_read
+
+    loads = []
+
+    async def load(session):
+        loads.append(True)
+        return (await session.execute(text("SELECT pg_sleep(0.1), 42"))).one()[1]
+
+    async def run():
+        request = read_request("/activities/")
+        return await asyncio.gather(*(coalesced_read(request, ("test", "one-query"), load) for _ in range(5)))
+
+    assert client.portal.call(run) == [42] * 5
+    assert len(loads) == 1
+
+
+def test_coalesced_read_error_reaches_all_waiters(client):
+    from src.core.singleflight import coalesced_read
+
+    async def load(session):
+        await session.execute(text("SELECT pg_sleep(0.1)"))
+        raise LoadError("сбой чтения")
+
+    async def run():
+        request = read_request("/activities/")
+        return await asyncio.gather(
+            *(coalesced_read(request, ("test", "error"), load) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = client.portal.call(run)
+    assert all(isinstance(error, LoadError) for error in errors)
+    assert len({id(error) for error in errors}) == 1
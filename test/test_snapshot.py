@@ -0,0 +1,98 @@
+"""
+Снимок справочника.
+
+Снимок, собранный из БД и загруженный из файла, отвечает так же, как БД.
+Он перестраивается с задержкой после записи, поэтому клиент в окне
+read-your-writes должен читать из БД, а не из устаревшего снимка.
+"""
+from fastapi import Response
+
+from src.core.config import settings
+from src.core.routing import READ_YOUR_WRITES_COOKIE, replica_router
+from src.core.session import remember_write
+
+
+RECTANGLE = {"min_lat": 55.7, "max_lat": 55.8, "min_lng": 37.5, "max_lng": 37.7}
+RADIUS = {"latitude": 55.75, "longitude": 37.62, "radius_km": 5}
+
+
+def normalized(org: dict) -> dict:
+    """Организация с видами деятельности и телефонами по ID: порядок связей не задан схемой."""
+    return {
+        **org,
+        "activities": sorted(org["activities"], key=lambda activity: activity["id"]),
+        "phones": sorted(org["phones"], key=lambda phone: phone["id"]),
+    }
+
+
+def found_ids(client, path: str, body: dict) -> list[int]:
+    """ID всех организаций, найденных поиском в БД, по возрастанию."""
+    ids, page = [], 1
+    while True:
+        response = client.post(path, params={"page": page, "size": 100}, json=body)
+        assert response.status_code == 200, response.text
+        ids += [item["id"] for item in response.json()["items"]]
+        if len(ids) >= response.json()["total"]:
+            return sorted(ids)
+        page += 1
+
+
+def test_snapshot_round_trip(client, snapshot, monkeypatch):
+    from src.core.config import settings
+
+    monkeypatch.setattr(settings, "SNAPSHOT_ENABLED", False)
+
+    page = client.get("/organizations/", params={"size": 50}).json()
+    org_ids = [item["id"] for item in page["items"]]
+    assert org_ids
+    for org in page["items"]:
+        assert normalized(snapshot.organization(org["id"])) == normalized(org)
+    assert snapshot.organization(10 ** 9) is None
+
+    snapshot_page = snapshot.organizations_page(org_ids, 2, 20)
+    assert snapshot_page["total"] == len(org_ids)
+    assert [item["id"] for item in snapshot_page["items"]] == org_ids[20:40]
+
+    building = client.get("/buildings/1").json()
+    assert snapshot.building(1) == building
+
+    in_rectangle = snapshot.buildings_in_rectangle(
+        RECTANGLE["min_lat"], RECTANGLE["max_lat"], RECTANGLE["min_lng"], RECTANGLE["max_lng"]
+    )
+    assert snapshot.organizations_in_buildings(in_rectangle) == found_ids(client, "/search/rectangle", RECTANGLE)
+
+    in_radius = snapshot.buildings_in_radius(RADIUS["latitude"], RADIUS["longitude"], RADIUS["radius_km"])
+    assert snapshot.organizations_in_buildings([i for i, _ in in_radius]) == found_ids(client, "/search/radius", RADIUS)
+
+
+def around(building: dict) -> dict:
+    delta = 1e-6
+    return {
+        "min_lat": building["latitude"] - delta, "max_lat": building["latitude"] + delta,
+        "min_lng": building["longitude"] - delta, "max_lng": building["longitude"] + delta,
+    }
+
+
+def test_write_cookie_without_replicas(monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_WINDOW", 2.0)
+    assert not replica_router.nodes
+
+    response = remember_write(Response())
+    assert READ_YOUR_WRITES_COOKIE in response.headers["set-cookie"]
+
+
+def test_write_then_search_bypasses_snapshot(client, snapshot):
+    created = client.post("/organizations/", json={"name": "Сразу после записи", "building_id": 1})
+    assert created.status_code == 200, created.text
+    assert READ_YOUR_WRITES_COOKIE in created.cookies
+    org = created.json()
+    rectangle = around(org["building"])
+
+    fresh = client.post("/search/rectangle", params={"size": 100}, json=rectangle)
+    assert org["id"] in [item["id"] for item in fresh.json()["items"]]
+
+    # Без cookie поиск отвечает из снимка, собранного до записи
+    client.cookies.clear()
+    stale = client.post("/search/rectangle", params={"size": 100}, json=rectangle)
+    assert org["id"] not in [item["id"] for item in stale.json()["items"]]
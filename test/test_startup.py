@@ -0,0 +1,46 @@
+"""
+Бюджет времени импорта приложения.
+
+Каждый воркер при раскатке импортирует main; тяжёлая работа при импорте
+(подключение к БД, создание каталогов, настройка логирования, лишние
+зависимости) умножается на число воркеров. Импорт проверяется в отдельном
+процессе, чтобы не зависеть от модулей, уже загруженных тестами.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Основная часть — импорт FastAPI, SQLAlchemy и pydantic; свой код приложения занимает единицы процентов
+IMPORT_TIME_BUDGET_SEC = float(os.environ.get("IMPORT_TIME_BUDGET_SEC", "1.5"))
+
+
+def import_main(cwd: Path) -> dict[str, int]:
+    """Импортировать main с -X importtime; вернуть накопленное время импорта модулей (мкс)."""
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "API_KEY": "test-api-key"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, name = line.split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def test_main_import_within_budget(tmp_path):
+    cumulative = import_main(tmp_path)
+    seconds = cumulative["main"] / 1_000_000
+    assert seconds <= IMPORT_TIME_BUDGET_SEC, f"импорт main занял {seconds:.2f} с при бюджете {IMPORT_TIME_BUDGET_SEC} с"
+
+
+def test_main_import_has_no_side_effects(tmp_path):
+    import_main(tmp_path)
+    # Логирование и его каталог настраиваются в lifespan, а не при импорте
+    assert list(tmp_path.iterdir()) == []
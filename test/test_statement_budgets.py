@@ -0,0 +1,137 @@
+"""
+Бюджеты SQL-запросов на эндпоинт.
+
+Число запросов берётся из заголовка X-SQL-Statements (StatementCountMiddleware).
+Бюджет — текущее число запросов эндпоинта: если изменение добавляет запрос
+(например, N+1 при выдаче связанных сущностей), тест падает, и бюджет
+нужно либо вернуть, либо осознанно поднять.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+
+from src.middleware.statements import STATEMENTS_HEADER
+
+RECTANGLE = {"min_lat": 55.6, "max_lat": 55.9, "min_lng": 37.4, "max_lng": 37.8}
+RADIUS = {"latitude": 55.75, "longitude": 37.62, "radius_km": 10}
+
+# (метод, путь, параметры запроса, тело, бюджет)
+BUDGETS = {
+    # страница + 3 selectinload + count
+    "organizations_list": ("GET", "/organizations/", {"size": 20}, None, 5),
+    "organizations_by_activity": ("GET", "/organizations/", {"activity_id": 1, "size": 20}, None, 5),
+    "organizations_facets": ("GET", "/organizations/", {"activity_id": 1, "facets": "true"}, None, 6),
+    "organization_get": ("GET", "/organizations/1", None, None, 4),
+    "buildings_list": ("GET", "/buildings/", {"size": 50}, None, 1),
+    "building_get": ("GET", "/buildings/1", None, None, 1),
+    "activities_tree": ("GET", "/activities/", None, None, 1),
+    "activity_get": ("GET", "/activities/1", None, None, 1),
+    # + SET LOCAL statement_timeout маршрута /search/
+    "search_rectangle": ("POST", "/search/rectangle", {"size": 20}, RECTANGLE, 6),
+    "search_radius": ("POST", "/search/radius", {"size": 20}, RADIUS, 6),
+    "search_radius_by_distance": ("POST", "/search/radius", {"size": 20, "order_by": "distance"}, RADIUS, 6),
+    # insert с RETURNING здания + телефоны + виды деятельности + связи, без перечитывания
+    "create_organization": ("POST", "/organizations/", None, {
+        "name": "Бюджет запросов", "building_id": 1, "activity_ids": [1, 2], "phones": [{"number": "8-800-000-00-00"}]
+    }, 4),
+    # update с RETURNING + синхронизация связей (до 4) и телефонов (до 3)
+    "update_organization": ("PUT", "/organizations/2", None, {
+        "activity_ids": [3], "phones": [{"number": "8-900-000-00-01"}, {"number": "8-900-000-00-02"}]
+    }, 8),
+}
+
+
+def statements(response) -> int:
+    assert response.status_code < 400, response.text
+    return int(response.headers[STATEMENTS_HEADER])
+
+
+@pytest.mark.parametrize("name", BUDGETS)
+def test_endpoint_within_budget(client, name):
+    method, path, params, body, budget = BUDGETS[name]
+    count = statements(client.request(method, path, params=params, json=body))
+    assert count <= budget, f"{name}: {count} SQL-запросов при бюджете {budget}"
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("GET", "/organizations/", None),
+    ("GET", "/buildings/", None),
+    ("POST", "/search/rectangle", RECTANGLE),
+])
+def test_statements_do_not_grow_with_page_size(client, method, path, body):
+    small = statements(client.request(method, path, params={"size": 5}, json=body))
+    large = statements(client.request(method, path, params={"size": 100}, json=body))
+    assert large == small
+
+
+# С READ_MODEL_ENABLED страница — один запрос к organization_documents (число строк — оконной функцией)
+READ_MODEL_BUDGETS = {
+    "organizations_list": 1,
+    "organizations_by_activity": 1,
+    "organization_get": 1,
+    "search_rectangle": 2,
+    "search_radius": 2,
+    # страница + count
+    "search_radius_by_distance": 3,
+}
+
+
+@pytest.fixture
+def read_model(monkeypatch):
+    from src.core.config import settings
+
+    monkeypatch.setattr(settings, "READ_MODEL_ENABLED", True)
+
+
+@pytest.mark.parametrize("name", READ_MODEL_BUDGETS)
+def test_read_model_within_budget(client, read_model, name):
+    method, path, params, body, _ = BUDGETS[name]
+    budget = READ_MODEL_BUDGETS[name]
+    count = statements(client.request(method, path, params=params, json=body))
+    assert count <= budget, f"{name} (модель чтения): {count} SQL-запросов при бюджете {budget}"
+
+
+@pytest.mark.parametrize("path", ["/organizations/3", "/organizations/?size=20"])
+def test_read_model_matches_orm(client, monkeypatch, path):
+    from src.core.config import settings
+
+    orm = client.get(path).json()
+    monkeypatch.setattr(settings, "READ_MODEL_ENABLED", True)
+    assert client.get(path).json() == orm
+
+
+async def insert_phones_concurrently(org_id: int, numbers: tuple[str, str]) -> bool:
+    """Две транзакции добавляют телефоны одной организации; True, если вторая ждала первую."""
+    from src.core.config import settings
+    from src.core.database import build_engine
+    from src.models.organization import OrganizationPhone as PhoneModel
+
+    engine = build_engine(settings.DATABASE_URL)
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(insert(PhoneModel).values(organization_id=org_id, number=numbers[0]))
+            # Триггер второй транзакции пересобирает тот же документ и ждёт блокировку организации
+            blocked = asyncio.create_task(
+                second.execute(insert(PhoneModel).values(organization_id=org_id, number=numbers[1]))
+            )
+            await asyncio.sleep(0.3)
+            waited = not blocked.done()
+            await first.commit()
+            await blocked
+            await second.commit()
+        return waited
+    finally:
+        await engine.dispose()
+
+
+def test_read_model_keeps_concurrent_updates(client, monkeypatch):
+    from src.core.config import settings
+
+    numbers = ("8-700-000-00-01", "8-700-000-00-02")
+    assert asyncio.run(insert_phones_concurrently(5, numbers))
+
+    orm = client.get("/organizations/5").json()
+    assert set(numbers) <= {phone["number"] for phone in orm["phones"]}
+    monkeypatch.setattr(settings, "READ_MODEL_ENABLED", True)
+    assert client.get("/organizations/5").json() == orm
@@ -0,0 +1,54 @@
+"""Групповой коммит записей организаций (WRITE_BATCHING_ENABLED)."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def write_batching(monkeypatch):
+    from src.core.config import settings
+
+    monkeypatch.setattr(settings, "WRITE_BATCHING_ENABLED", True)
+
+
+def create(client, name: str):
+    return client.post("/organizations/", json={
+        "name": name, "building_id": 1, "activity_ids": [1], "phones": [{"number": "8-800-100-00-00"}]
+    })
+
+
+def test_concurrent_writes_share_one_commit(client, write_batching):
+    from src.core.write_batch import write_batcher
+
+    names = [f"Группа {i}" for i in range(8)]
+    batches = write_batcher.batches
+    with ThreadPoolExecutor(len(names)) as pool:
+        responses = list(pool.map(lambda name: create(client, name), names))
+
+    assert [response.status_code for response in responses] == [200] * len(names)
+    assert write_batcher.batches - batches < len(names)
+    for name, response in zip(names, responses):
+        org = response.json()
+        assert org["name"] == name
+        assert client.get(f"/organizations/{org['id']}").json() == org
+
+
+def test_failed_item_does_not_abort_batch(client, write_batching):
+    create(client, "Занятое название")
+    with ThreadPoolExecutor(3) as pool:
+        duplicate, missing_building, ok = pool.map(lambda request: request(), [
+            lambda: create(client, "Занятое название"),
+            lambda: client.post("/organizations/", json={"name": "Без здания", "building_id": 10 ** 9}),
+            lambda: create(client, "Соседняя запись"),
+        ])
+
+    assert duplicate.status_code == 409
+    assert missing_building.status_code == 400
+    assert ok.status_code == 200
+    assert client.get(f"/organizations/{ok.json()['id']}").json() == ok.json()
+
+
+def test_update_returns_written_state(client, write_batching):
+    org = client.put("/organizations/4", json={"phones": [{"number": "8-900-100-00-01"}]}).json()
+    assert [phone["number"] for phone in org["phones"]] == ["8-900-100-00-01"]
+    assert client.get("/organizations/4").json() == org